@@ -0,0 +1,50 @@
+import threading
+import zlib
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Small LRU of serialised API responses, invalidated by a content digest.
+
+    Entries are stored with the question bank digest they were built from;
+    once the bank reloads with different rows, the digest moves on and stale
+    bodies are rebuilt on the next request instead of being flushed up front.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (digest, body)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(digest, key):
+        # Derived from the data itself, so it survives restarts and matches across workers
+        return f"{digest}-{zlib.crc32(key.encode('utf-8')):08x}"
+
+    def get_or_build(self, key, digest, build):
+        """Returns the cached body for `key`, calling build() if it's missing or stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == digest:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        body = build()
+        with self._lock:
+            self._entries[key] = (digest, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -1,284 +1,882 @@
 import os
+# SERVER_MODE picks the server Socket.IO runs on: 'threading' (Werkzeug, the default), 'eventlet' or
+# 'gevent'. The async modes patch the standard library, which has to happen before anything imports it.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'threading')
+if SERVER_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif SERVER_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+elif SERVER_MODE != 'threading':
+    raise SystemExit(f"Unknown SERVER_MODE {SERVER_MODE!r}; use threading, eventlet or gevent")
+
+import atexit
+import signal
+import logging
 import sqlite3
-from flask import Flask, jsonify, request, send_from_directory, send_file
+import functools
+import threading
+from flask import Flask, Response, abort, jsonify, request, stream_with_context
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS # Import CORS
 import random
 import time
-
-# Configure Flask to serve static files from frontend directory
+from question_bank import QuestionBank
+from db_pool import ConnectionPool
+from api_cache import ResponseCache
+from scheduler import GameScheduler
+from game_state import Game, FIFTY_FIFTY, NINETIETH_MINUTE, FEELIN_GOOD, LIFELINE_FLAGS, NO_ANSWER
+from room_store import create_room_store
+from game_ids import GameIdAllocator
+from leaderboard import LeaderboardService
+from scoreboard import ScoreboardCoalescer
+from stadium import StadiumBroadcaster, STADIUM
+from matchmaking import MatchQueue, DEFAULT_RATING, bot_level_for, rating_from_record
+from bot_engine import BotEngine, SKILL_TIERS, DEFAULT_SKILL
+from question_stats import QuestionStats
+from seen_questions import SeenQuestions
+from game_results import GameResultsWriter
+from flush_worker import FlushWorker
+from room_snapshots import RoomSnapshotter
+from question_payloads import PacketJSON, prepare_questions
+from chat import TokenBucket, CHAT_PAGE_SIZE
+from static_assets import StaticAssets
+from metrics import MetricsRegistry
+
+# LOG_LEVEL=DEBUG shows every answer, bot move and timer; the default INFO logs room lifecycle only
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger('quiz')
+
+# The frontend directory is served by StaticAssets below rather than Flask's static route
 frontend_dir = os.path.join(os.path.dirname(__file__), '..', 'frontend')
-app = Flask(__name__, static_folder=frontend_dir, static_url_path='')
+app = Flask(__name__, static_folder=None)
 CORS(app) # Enable CORS for all routes
 
 # Use environment variables for production
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'secret!')
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Prometheus-style metrics, served at /metrics
+metrics = MetricsRegistry(prefix='quiz_')
+handler_seconds = metrics.histogram('socketio_handler_seconds', 'Time spent in each Socket.IO event handler.', labels=('event',))
+emits_total = metrics.counter('socketio_emits_total', 'Socket.IO events emitted by the server.', labels=('event',))
+db_query_seconds = metrics.histogram('db_query_seconds', 'Time spent in SQLite execute/executemany calls.')
+quick_match_wait_seconds = metrics.histogram('quick_match_wait_seconds', 'Time players spent in the quick-match queue, by opponent found.',
+                                             labels=('opponent',), buckets=(0.5, 1, 2, 5, 10, 15, 20, 30, 45, 60))
+quick_matches_total = metrics.counter('quick_matches_total', 'Quick-match rooms created, by opponent.', labels=('opponent',))
+background_tasks = 0 # Tasks started with socketio.start_background_task that are still running
+background_tasks_lock = threading.Lock()
+
+class InstrumentedSocketIO(SocketIO):
+    """SocketIO that counts emits and running background tasks for /metrics."""
+
+    def emit(self, event, *args, **kwargs):
+        emits_total.inc(event)
+        return super().emit(event, *args, **kwargs)
+
+    def start_background_task(self, target, *args, **kwargs):
+        def run(*task_args, **task_kwargs):
+            global background_tasks
+            with background_tasks_lock:
+                background_tasks += 1
+            try:
+                return target(*task_args, **task_kwargs)
+            finally:
+                with background_tasks_lock:
+                    background_tasks -= 1
+        return super().start_background_task(run, *args, **kwargs)
+
+# With several workers, SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) fans emits out to
+# clients connected to any worker. Leave it unset for a single process.
+# PacketJSON lets question payloads prepared at game start go out without being encoded again
+socketio = InstrumentedSocketIO(app, cors_allowed_origins="*", message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'),
+                                json=PacketJSON, async_mode=SERVER_MODE)
+
+def on_event(event):
+    """socketio.on() that also records the handler's latency under its event name."""
+    def decorator(handler):
+        timed = handler_seconds.time(event)(handler)
+        socketio.on(event)(timed)
+        return timed
+    return decorator
 
 # Use environment variable for database path in production
 DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join(os.path.dirname(__file__), '..', 'quiz_questions.db'))
-print(f"Database path configured to: {DATABASE_PATH}") # New log
+logger.info("Database path configured to: %s", DATABASE_PATH)
+
+# Connections are pooled and reused across requests and green threads
+db_pool = ConnectionPool(DATABASE_PATH, max_size=int(os.environ.get('DB_POOL_SIZE', 5)))
+db_pool.query_observer = db_query_seconds.observe
 
 def get_db_connection():
-    print(f"Attempting to connect to database at: {DATABASE_PATH}") # New log
+    """Checks a connection out of the pool; call close() to give it back."""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        print("Database connection successful.") # New log
-        return conn
+        return db_pool.acquire()
     except sqlite3.Error as e:
-        print(f"Error connecting to database: {e}") # New log
+        logger.error("Error connecting to database: %s", e)
         return None
 
+@app.route('/api/stats/db_pool', methods=['GET'])
+def get_db_pool_stats():
+    return jsonify(db_pool.stats())
+
+@app.route('/api/stats/rooms', methods=['GET'])
+def get_room_stats():
+    return jsonify({
+        'game_ids': game_id_allocator.stats(),
+        'store': room_store.stats(),
+        'scheduler': scheduler.stats(),
+        'connected_sids': len(sid_rooms),
+        'scoreboard': scoreboard.stats(),
+        'bots': bot_engine.stats(),
+        'snapshots': room_snapshots.stats(),
+        'flushes': flush_worker.stats(),
+    })
+
+@app.route('/api/stats/stadium', methods=['GET'])
+def get_stadium_stats():
+    return jsonify(stadium.stats())
+
+@app.route('/api/stats/matchmaking', methods=['GET'])
+def get_matchmaking_stats():
+    return jsonify(matchmaker.stats())
+
+@app.route('/api/stats/leaderboard', methods=['GET'])
+def get_leaderboard_stats():
+    return jsonify(leaderboard.stats())
+
+@app.route('/api/stats/questions', methods=['GET'])
+def get_question_stats():
+    return jsonify(question_stats.stats())
+
+@app.route('/api/stats/seen_questions', methods=['GET'])
+def get_seen_questions_stats():
+    return jsonify(seen_questions.stats())
+
+@app.route('/api/stats/results', methods=['GET'])
+def get_results_stats():
+    return jsonify(game_results.stats())
+
+# Gauges are read when /metrics is scraped, so they cost nothing between scrapes
+metrics.gauge('active_rooms', 'Rooms owned by this worker.', lambda: len(games))
+metrics.gauge('active_players', 'Human seats in rooms owned by this worker, including held ones.',
+              lambda: sum(len(game.players) for game in list(games.values())))
+metrics.gauge('active_bots', 'Bots in rooms owned by this worker.', lambda: sum(len(game.bots) for game in list(games.values())))
+metrics.gauge('seated_clients', 'Connected clients seated in at least one room.', lambda: len(sid_rooms))
+metrics.gauge('scheduled_tasks', 'Timers waiting on the game scheduler.', lambda: scheduler.stats()['pending'])
+metrics.gauge('background_tasks', 'Socket.IO background tasks still running.', lambda: background_tasks)
+metrics.gauge('threads', 'Live OS threads in this process.', threading.active_count)
+metrics.gauge('db_pool_in_use', 'Pooled SQLite connections checked out.', lambda: db_pool.stats()['in_use'])
+metrics.gauge('results_pending', 'Player and head-to-head results waiting to be written.', lambda: game_results.stats()['pending'])
+metrics.gauge('results_dropped', 'Results dropped because the write-behind queue was full.', lambda: game_results.stats()['dropped'])
+metrics.gauge('quick_match_waiting', 'Players in the quick-match queue.', lambda: matchmaker.waiting())
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Questions are served from memory; the DB is only read at startup and on reload
+question_bank = QuestionBank(db_pool)
+try:
+    question_bank.load()
+except sqlite3.Error as e:
+    logger.error("Could not load question bank from %s: %s", DATABASE_PATH, e)
+
+@app.route('/api/questions/reload', methods=['POST'])
+def reload_questions():
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if admin_token and request.headers.get('X-Admin-Token') != admin_token:
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        count = question_bank.reload()
+    except sqlite3.Error as e:
+        return jsonify({'error': f'Reload failed: {e}'}), 500
+    api_cache.clear()  # bodies built from the old rows would only be evicted one request at a time
+    return jsonify({'questions': count, 'version': question_bank.version, 'digest': question_bank.digest})
+
+# API responses are cached per question bank digest and revalidated with ETags
+api_cache = ResponseCache()
+metrics.gauge('api_cache_entries', 'Serialised API responses held in memory.', lambda: api_cache.stats()['entries'])
+metrics.gauge('api_cache_hits', 'API responses served from the cache.', lambda: api_cache.stats()['hits'])
+metrics.gauge('api_cache_misses', 'API responses that had to be built.', lambda: api_cache.stats()['misses'])
+API_CACHE_MAX_AGE = 60 # seconds clients may reuse a response before revalidating
+MAX_QUESTIONS_PAGE_SIZE = 500
+
+def not_modified(etag):
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'public, max-age={API_CACHE_MAX_AGE}'
+        return response
+    return None
+
+def cached_json_response(cache_key, build_payload):
+    digest = question_bank.digest
+    etag = ResponseCache.etag(digest, cache_key)
+    response = not_modified(etag)
+    if response:
+        return response
+    body = api_cache.get_or_build(cache_key, digest, lambda: app.json.dumps(build_payload()))
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={API_CACHE_MAX_AGE}'
+    return response
+
 @app.route('/api/questions', methods=['GET'])
 def get_questions():
     category = request.args.get('category')
-    conn = get_db_connection()
-    if category:
-        cursor = conn.execute('SELECT * FROM quiz_questions WHERE category = ?', (category,))
-    else:
-        cursor = conn.execute('SELECT * FROM quiz_questions')
-    questions = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(ix) for ix in questions])
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', type=int)
+
+    if limit is not None:
+        # Cursor pagination: {"questions": [...], "next_cursor": <last id> or null}
+        limit = max(1, min(MAX_QUESTIONS_PAGE_SIZE, limit))
+        cache_key = f'questions:{category or "all"}:{cursor}:{limit}'
+        def build_page():
+            rows, next_cursor = question_bank.page(category, cursor, limit)
+            return {'questions': rows, 'next_cursor': next_cursor}
+        return cached_json_response(cache_key, build_page)
+
+    # Full listing is streamed row by row instead of being buffered as one big list
+    etag = ResponseCache.etag(question_bank.digest, f'questions:{category or "all"}:stream')
+    response = not_modified(etag)
+    if response:
+        return response
+
+    def generate():
+        yield '['
+        for i, row in enumerate(question_bank.iter_rows(category)):
+            yield (',' if i else '') + app.json.dumps(row)
+        yield ']'
+
+    response = app.response_class(stream_with_context(generate()), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={API_CACHE_MAX_AGE}'
+    return response
 
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
-    conn = get_db_connection()
-    cursor = conn.execute('SELECT DISTINCT category FROM quiz_questions')
-    categories = [row['category'] for row in cursor.fetchall()]
-    conn.close()
-    return jsonify(categories)
+    return cached_json_response('categories', question_bank.categories)
+
+# Frontend files are hashed and compressed once at startup. index.html links to fingerprinted names
+# (cached for a year); plain names are revalidated after STATIC_MAX_AGE. STATIC_X_SENDFILE=1 hands
+# media files to a fronting nginx/Apache instead of streaming them from Python.
+static_assets = StaticAssets(frontend_dir, max_age=int(os.environ.get('STATIC_MAX_AGE', 3600)),
+                             watch=os.environ.get('FLASK_ENV') != 'production')
+static_assets.build()
+app.config['USE_X_SENDFILE'] = os.environ.get('STATIC_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 
-# Route to serve the main HTML file
 @app.route('/')
 def serve_index():
-    return send_from_directory(frontend_dir, 'index.html')
+    return static_assets.response(static_assets.index)
 
-# Route to serve static files (CSS, JS, images, etc.)
 @app.route('/<path:filename>')
 def serve_static_files(filename):
-    return send_from_directory(frontend_dir, filename)
+    response = static_assets.response(filename)
+    if response is None:
+        abort(404)
+    return response
+
+@app.route('/api/stats/static', methods=['GET'])
+def get_static_stats():
+    return jsonify(static_assets.stats())
 
 # Game state
-games = {}
-leaderboard = [] # In-memory leaderboard for simplicity
+# Each room lives on the worker that created it. ROOM_STORE=sqlite:///path shares a room directory
+# between workers on one host; the default 'memory' store is a plain single-process dict.
+WORKER_ID = os.environ.get('WORKER_ID', '0')
+room_store = create_room_store(os.environ.get('ROOM_STORE', 'memory'), WORKER_ID)
+games = room_store.rooms # game_id -> Game, for rooms this worker owns
+# Game IDs never collide and are recycled when a room closes. With several workers, IDs carry the
+# worker's shard as a prefix (GAME_ID_SHARD_DIGITS, default 1 when the room store is shared) so the
+# owner can be read straight off the ID.
+GAME_ID_SHARD_DIGITS = int(os.environ.get('GAME_ID_SHARD_DIGITS', 1 if room_store.shared else 0))
+game_id_allocator = GameIdAllocator(
+    digits=int(os.environ.get('GAME_ID_DIGITS', 4)),
+    shard=int(WORKER_ID) if GAME_ID_SHARD_DIGITS else 0,
+    shard_digits=GAME_ID_SHARD_DIGITS)
+ROOM_LINGER_AFTER_GAME_OVER = 30 # Seconds a finished room stays open (chat, scoreboard) before it's closed
+# Chat: each sid may burst CHAT_BURST messages, then CHAT_RATE_PER_SECOND; rooms keep a fixed-size history
+CHAT_RATE_PER_SECOND = 1.0
+CHAT_BURST = 5
+CHAT_MAX_LENGTH = 500 # Longer messages are cut, so one message can't blow up the history
+BOT_CHAT_DELAY = (0.5, 2.0) # A bot "types" for this long; messages arriving meanwhile share one reply
+chat_limiters = {} # sid -> TokenBucket
+
+# Every room's timers (bot answers, question expiry, next question) run on one loop
+scheduler = GameScheduler(socketio)
+ANSWER_GRACE_PERIOD = 2 # Extra seconds past time_per_question to allow for network lag
+FORWARD_POLL_INTERVAL = 0.05 # How often a worker drains events forwarded to it by other workers
+RECONNECT_GRACE_PERIOD = int(os.environ.get('RECONNECT_GRACE_PERIOD', 30)) # Seconds a dropped player's seat and score are held
+# In-game scoreboards go out as numbered deltas; changes within this window share one emit
+SCOREBOARD_COALESCE_WINDOW = 0.25
+scoreboard = ScoreboardCoalescer(socketio, scheduler, window=SCOREBOARD_COALESCE_WINDOW)
+# Stadium rooms hold a live-event audience: no per-player scoreboards or rosters, just the top
+# STADIUM_TOP_N, a score histogram everyone ranks themselves against, and a coalesced head count
+STADIUM_MAX_PLAYERS = int(os.environ.get('STADIUM_MAX_PLAYERS', 5000))
+STADIUM_RESULTS_CHUNK = 500 # Stadium results go to the write-behind queue this many players at a time
+stadium = StadiumBroadcaster(socketio, scheduler, top_n=int(os.environ.get('STADIUM_TOP_N', 10)))
+# Quick match: head-to-head players queue instead of sharing a room code, and are paired by category
+# selection and rating (see matchmaking.py). Anyone still waiting after QUICK_MATCH_BOT_AFTER seconds
+# plays a bot at about their level. Each worker keeps its own queue.
+QUICK_MATCH_BOT_AFTER = float(os.environ.get('QUICK_MATCH_BOT_AFTER', 20))
+QUICK_MATCH_SWEEP_INTERVAL = 1.0 # How often waiting players are re-checked as their rating windows widen
+QUICK_MATCH_START_DELAY = 3 # Seconds between match_found and the first question
+matchmaker = MatchQueue(window=int(os.environ.get('QUICK_MATCH_RATING_WINDOW', 100)))
+quick_match_sweep = None # Scheduler handle for the next sweep, while anyone is waiting
+
+# Stores that buffer writes in memory and flush them in batches a little later, on a background
+# worker so their SQLite writes never hold up the game scheduler
+flush_worker = FlushWorker(socketio)
+atexit.register(flush_worker.close)
+
+# Live rooms are snapshotted to a local SQLite file and picked back up after a restart (e.g. a deploy),
+# with every human's seat held for them to rejoin. An empty ROOM_SNAPSHOT_PATH turns this off.
+ROOM_SNAPSHOT_PATH = os.environ.get('ROOM_SNAPSHOT_PATH', os.path.join(os.path.dirname(DATABASE_PATH), 'room_snapshots.db'))
+ROOM_SNAPSHOT_MAX_AGE = 600 # Seconds; older snapshots are dropped rather than resumed
+room_snapshots = RoomSnapshotter(ROOM_SNAPSHOT_PATH or None, flush_worker, worker_id=WORKER_ID,
+                                 interval=float(os.environ.get('ROOM_SNAPSHOT_INTERVAL', 1.0)))
+atexit.register(room_snapshots.flush) # A clean shutdown saves the very latest state
+
+# Single-player high scores: the top 20 live in memory, finished games reach the table in batches
+leaderboard = LeaderboardService(db_pool, top_k=20)
+try:
+    leaderboard.load()
+except sqlite3.Error as e:
+    logger.error("Could not load leaderboard from %s: %s", DATABASE_PATH, e)
+atexit.register(leaderboard.flush) # Don't lose queued scores on shutdown
+LEADERBOARD_ROOM = 'leaderboard' # Clients viewing the leaderboard; only they get live updates
+LEADERBOARD_FLUSH_DELAY = 5 # Seconds queued scores wait so several games share one write
+
+# How hard each question is for humans, counted in memory per answer and upserted in batches
+question_stats = QuestionStats(db_pool)
+try:
+    question_stats.load()
+except sqlite3.Error as e:
+    logger.error("Could not load question stats from %s: %s", DATABASE_PATH, e)
+atexit.register(question_stats.flush)
+QUESTION_STATS_FLUSH_DELAY = 10
+
+# Questions each player was recently given, as per-name bitmaps over question ids, so a new game
+# draws ones they haven't seen. Held in memory for the SEEN_QUESTIONS_PLAYERS most recent names.
+seen_questions = SeenQuestions(db_pool, max_players=int(os.environ.get('SEEN_QUESTIONS_PLAYERS', 50000)))
+try:
+    seen_questions.load()
+except sqlite3.Error as e:
+    logger.error("Could not load seen questions from %s: %s", DATABASE_PATH, e)
+atexit.register(seen_questions.flush)
+SEEN_QUESTIONS_FLUSH_DELAY = 10
+
+# Per-player stats and head-to-head results are merged in memory and written behind the game loop
+# by a background worker. RESULTS_MAX_PENDING bounds what can queue up if the database falls behind.
+game_results = GameResultsWriter(db_pool, socketio,
+                                 max_pending=int(os.environ.get('RESULTS_MAX_PENDING', 5000)),
+                                 flush_interval=float(os.environ.get('RESULTS_FLUSH_INTERVAL', 2.0)))
+try:
+    game_results.load()
+except sqlite3.Error as e:
+    logger.error("Could not prepare game result tables in %s: %s", DATABASE_PATH, e)
+atexit.register(game_results.close) # Stop the worker and write what's left
+
+# Every bot in a room is decided in one pass per question, at the room's skill tier and the
+# question's measured difficulty. BOT_SEED makes bot behaviour reproducible.
+bot_engine = BotEngine(seed=int(os.environ['BOT_SEED']) if os.environ.get('BOT_SEED') else None,
+                       question_stats=question_stats)
+
+# sid -> game_ids the client is seated in, local or on another worker, so disconnects don't scan every room
+sid_rooms = {}
+
+def index_membership(sid, game_id):
+    sid_rooms.setdefault(sid, set()).add(game_id)
+
+def unindex_membership(sid, game_id):
+    rooms = sid_rooms.get(sid)
+    if rooms is not None:
+        rooms.discard(game_id)
+        if not rooms:
+            del sid_rooms[sid]
+
+# --- Cross-worker routing ---
+ROUTED_HANDLERS = {} # event name -> handler, for events forwarded from other workers
+
+def owner_of(game_id):
+    shard = game_id_allocator.shard_of(game_id)
+    if shard is not None:
+        return str(shard) # Sharded IDs name their worker, no directory lookup needed
+    return room_store.owner(game_id)
+
+def routed(event):
+    """Runs a game event on the worker that owns its room, forwarding it there if that isn't us."""
+    def decorator(handler):
+        ROUTED_HANDLERS[event] = handler
+
+        @functools.wraps(handler)
+        def wrapper(data):
+            game_id = data.get('game_id') if isinstance(data, dict) else None
+            if room_store.shared and game_id is not None and game_id not in games:
+                owner = owner_of(game_id)
+                if owner is not None and owner != room_store.worker_id:
+                    if event in ('join_game', 'rejoin_game'):
+                        index_membership(request.sid, game_id) # So our disconnect handler knows to tell the owner
+                    elif event == 'leave_game':
+                        unindex_membership(request.sid, game_id)
+                    room_store.forward(owner, event, request.sid, data)
+                    return
+            return handler(data)
+        return wrapper
+    return decorator
+
+def deliver_forwarded_events():
+    for event, sid, data in room_store.take_events():
+        handler = ROUTED_HANDLERS.get(event)
+        if not handler:
+            logger.warning("Dropping forwarded event %s for SID %s: no handler.", event, sid)
+            continue
+        # Handlers read request.sid and emit to it; the message queue delivers to whichever worker holds the socket
+        with app.test_request_context('/socket.io/'):
+            request.sid = sid
+            request.namespace = '/'
+            try:
+                handler(data)
+            except Exception as e:
+                logger.exception("Forwarded event %s for SID %s failed: %s", event, sid, e)
+    scheduler.call_later(FORWARD_POLL_INTERVAL, deliver_forwarded_events)
+
+if room_store.shared:
+    if not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+        logger.warning("ROOM_STORE is shared but SOCKETIO_MESSAGE_QUEUE is not set; emits won't reach clients on other workers.")
+    scheduler.call_later(FORWARD_POLL_INTERVAL, deliver_forwarded_events)
 
 # --- SocketIO Events ---
-@socketio.on('connect')
-def handle_connect():
-    print('Client connected:', request.sid)
+@on_event('connect')
+def handle_connect(auth=None):
+    logger.debug("Client connected: %s", request.sid)
 
-@socketio.on('configure_game')
+@on_event('configure_game')
+@routed('configure_game')
 def handle_configure_game(data):
     game_id = data.get('game_id')
     game = games.get(game_id)
 
-    if not game or game['host_sid'] != request.sid:
+    if not game or game.host_sid != request.sid:
         emit('error', {'message': 'Only the host can configure the game.'}, room=request.sid)
         return
 
     # Update game settings based on host's input
-    game['max_players'] = int(data.get('max_players', game['max_players']))
-    game['num_bots'] = int(data.get('num_bots', game['num_bots']))
-    game['selected_categories'] = data.get('categories', game['selected_categories'])
+    game.max_players = int(data.get('max_players', game.max_players))
+    game.num_bots = int(data.get('num_bots', game.num_bots))
+    game.selected_categories = data.get('categories', game.selected_categories)
+    if data.get('bot_level') in SKILL_TIERS:
+        game.bot_level = data['bot_level']
 
     # Validate and set time_per_question
-    default_time_per_question = game.get('time_per_question', 15)
+    default_time_per_question = game.time_per_question
     try:
         time_val = int(data.get('time_per_question', default_time_per_question))
-        game['time_per_question'] = max(5, min(60, time_val))  # Clamp: 5-60 seconds
+        game.time_per_question = max(5, min(60, time_val))  # Clamp: 5-60 seconds
     except (ValueError, TypeError):
-        game['time_per_question'] = max(5, min(60, default_time_per_question)) # Fallback to clamped default
+        game.time_per_question = max(5, min(60, default_time_per_question)) # Fallback to clamped default
 
     # Validate and set total_questions
-    default_total_questions = game.get('total_questions', 10)
+    default_total_questions = game.total_questions
     try:
         total_val = int(data.get('total_questions', default_total_questions))
-        game['total_questions'] = max(5, min(50, total_val))  # Clamp: 5-50 questions
+        game.total_questions = max(5, min(50, total_val))  # Clamp: 5-50 questions
     except (ValueError, TypeError):
-        game['total_questions'] = max(5, min(50, default_total_questions)) # Fallback to clamped default
+        game.total_questions = max(5, min(50, default_total_questions)) # Fallback to clamped default
+
+    if game.prepared and game.time_per_question != default_time_per_question:
+        # Questions not shown yet carry the time limit in their prepared payloads, so redo those
+        shown = game.current_question_index + 1
+        game.prepared[shown:] = prepare_questions(game.questions[shown:], game.time_per_question,
+                                                  first_number=shown + 1, total=len(game.questions))
 
     # Adjust bots based on new num_bots
-    current_bot_count = len(game['bots'])
-    if game['num_bots'] > current_bot_count:
-        for i in range(current_bot_count, game['num_bots']):
-            bot_id = f"bot_{i+1}"
+    current_bot_count = len(game.bots)
+    if game.num_bots > current_bot_count:
+        for i in range(current_bot_count, game.num_bots):
+            bot_id = f"bot_{i+1}_{game_id}"
             bot_name = f"Bot {i+1}"
-            game['bots'][bot_id] = {'name': bot_name, 'score': 0, 'lifelines_used': {'fifty_fifty': False, 'ninetieth_minute': False, 'feelin_good': False}, 'feelin_good_active': False}
-            game['scores'][bot_name] = 0
-            print(f"Added {bot_name} to game {game_id} due to configuration change.")
-    elif game['num_bots'] < current_bot_count:
-        bots_to_remove = list(game['bots'].keys())[game['num_bots']:]
+            game.add_bot(bot_id, bot_name)
+            logger.debug("Added %s to game %s due to configuration change.", bot_name, game_id)
+    elif game.num_bots < current_bot_count:
+        bots_to_remove = list(game.bots.keys())[game.num_bots:]
         for bot_id in bots_to_remove:
-            bot_name = game['bots'][bot_id]['name']
-            del game['bots'][bot_id]
-            if bot_name in game['scores']:
-                del game['scores'][bot_name]
-            print(f"Removed {bot_name} from game {game_id} due to configuration change.")
-
-    print(f"Game {game_id} configured by host. Settings: {game}")
+            bot_name = game.remove_participant(bot_id).name
+            logger.debug("Removed %s from game %s due to configuration change.", bot_name, game_id)
+        if game.round and game.round.all_answered():
+            proceed_to_answer_phase(game_id, game.round.index)
+    scoreboard.mark(game)
+    room_snapshots.mark(game)
+
+    logger.info("Game %s configured by host. Max players: %s, Bots: %s, Categories: %s", game_id, game.max_players, game.num_bots, game.selected_categories)
     emit('game_configured', {'game_id': game_id, 'settings': {
-        'max_players': game['max_players'],
-        'num_bots': game['num_bots'],
-        'categories': game['selected_categories'],
-        'time_per_question': game['time_per_question'],
-        'total_questions': game['total_questions'],
+        'max_players': game.max_players,
+        'num_bots': game.num_bots,
+        'bot_level': game.bot_level,
+        'categories': game.selected_categories,
+        'time_per_question': game.time_per_question,
+        'total_questions': game.total_questions,
         'players': get_player_list(game_id) # Send updated player list including bots
     }}, room=game_id) # Broadcast to all in room so UI can update
 
-@socketio.on('disconnect')
+@on_event('disconnect')
 def handle_disconnect():
-    print('Client disconnected:', request.sid)
-    # Handle player leaving a game if they were in one
-    for game_id, game in list(games.items()):
-        if request.sid in game['players']:
-            player_name = game['players'][request.sid]['name']
-            emit('player_left', {'name': player_name, 'sid': request.sid}, room=game_id)
-            del game['players'][request.sid]
-            if not game['players'] and game['game_mode'] != 'singleplayer': # or if all human players left
-                print(f"Game {game_id} ended as last player left.")
-                # Potentially save game state or clean up
-                del games[game_id]
-            break
-
-
-@socketio.on('create_game')
+    logger.debug("Client disconnected: %s", request.sid)
+    chat_limiters.pop(request.sid, None)
+    ticket = matchmaker.remove(request.sid)
+    if ticket:
+        scheduler.cancel(ticket.timer)
+    for game_id in sid_rooms.pop(request.sid, ()):
+        if game_id in games:
+            hold_seat(game_id, request.sid)
+        elif room_store.shared:
+            # Rooms owned by other workers are told through their mailbox
+            owner = owner_of(game_id)
+            if owner is not None:
+                room_store.forward(owner, 'player_disconnected', request.sid, {'game_id': game_id})
+
+
+def hold_seat(game_id, sid):
+    """Keeps a dropped player's seat and score for RECONNECT_GRACE_PERIOD seconds."""
+    game = games.get(game_id)
+    if not game:
+        return
+    player = game.disconnect_player(sid)
+    if not player:
+        return
+    unindex_membership(sid, game_id)
+    chat_limiters.pop(sid, None) # Set up on the worker that owns the room, so dropped here too
+    logger.info("%s (SID: %s) dropped from game %s; holding their seat for %ss.", player.name, sid, game_id, RECONNECT_GRACE_PERIOD)
+    game.timers['seat_' + player.seat_token] = scheduler.call_later(
+        RECONNECT_GRACE_PERIOD, release_seat, game_id, player.seat_token, room=game_id)
+    room_snapshots.mark(game)
+    if not any(p.connected for p in game.players.values()) and game.game_mode != 'singleplayer' and game.round is None:
+        # Nobody left in the lobby; there's nothing to hold the room open for
+        remove_player_from_game(game_id, sid)
+    elif game.round and game.round.all_answered():
+        # They were the last one we were waiting on
+        proceed_to_answer_phase(game_id, game.round.index)
+
+def release_seat(game_id, seat_token):
+    game = games.get(game_id)
+    if not game:
+        return
+    game.timers.pop('seat_' + seat_token, None)
+    sid = game.seat_tokens.get(seat_token)
+    player = game.players.get(sid)
+    if player and not player.connected:
+        logger.info("%s did not reconnect to game %s in time.", player.name, game_id)
+        remove_player_from_game(game_id, sid)
+
+def remove_player_from_game(game_id, sid):
+    game = games.get(game_id)
+    if not game or sid not in game.players:
+        return
+    player = game.remove_participant(sid)
+    scheduler.cancel(game.timers.pop('seat_' + player.seat_token, None))
+    unindex_membership(sid, game_id)
+    if game.game_mode == STADIUM:
+        stadium.mark_audience(game)
+    else:
+        socketio.emit('player_left', {'name': player.name, 'sid': sid}, room=game_id)
+    scoreboard.mark(game)
+    room_snapshots.mark(game)
+    if not game.players and game.game_mode != 'singleplayer': # or if all human players left
+        logger.info("Game %s ended as last player left.", game_id)
+        close_game(game_id)
+    elif game.round and game.round.all_answered():
+        # They were the last one we were waiting on
+        proceed_to_answer_phase(game_id, game.round.index)
+
+def close_game(game_id):
+    """Tears a room down for good: timers, store entry and its game ID."""
+    game = games.get(game_id)
+    if not game:
+        return
+    game.finished = True
+    scheduler.cancel_room(game_id)
+    scoreboard.discard(game_id)
+    stadium.discard(game_id)
+    room_snapshots.discard(game_id)
+    for sid in game.players:
+        unindex_membership(sid, game_id)
+    room_store.unregister(game_id)
+    game_id_allocator.release(game_id)
+    logger.info("Game %s closed.", game_id)
+
+# Only ever forwarded between workers, never sent by clients
+ROUTED_HANDLERS['player_disconnected'] = lambda data: hold_seat(data.get('game_id'), request.sid)
+
+
+@on_event('leave_game')
+@routed('leave_game')
+def handle_leave_game(data):
+    game_id = data.get('game_id')
+    leave_room(game_id)
+    if game_id in games:
+        remove_player_from_game(game_id, request.sid)
+    else:
+        unindex_membership(request.sid, game_id)
+
+
+@on_event('rejoin_game')
+@routed('rejoin_game')
+def handle_rejoin_game(data):
+    game_id = data.get('game_id')
+    game = games.get(game_id)
+    seat_token = data.get('seat_token')
+    player = game.reseat(seat_token, request.sid) if game and seat_token else None
+    if not player:
+        emit('rejoin_failed', {'game_id': game_id, 'message': 'Your seat in that game is no longer available.'}, room=request.sid)
+        return
+
+    scheduler.cancel(game.timers.pop('seat_' + seat_token, None))
+    join_room(game_id)
+    index_membership(request.sid, game_id)
+    logger.info("%s (SID: %s) rejoined game %s", player.name, request.sid, game_id)
+    scoreboard.mark(game) # Everyone else sees the seat move to the new sid
+    room_snapshots.mark(game)
+    snapshot = scoreboard.snapshot(game) if game.game_mode != STADIUM else {'seq': 0, 'players': stadium.top(game)}
+    emit('game_rejoined', {
+        'game_id': game_id,
+        'game_mode': game.game_mode,
+        'is_host': game.host_sid == request.sid,
+        'score': player.score,
+        'lifelines_used': {name: player.has_used(flag) for name, flag in LIFELINE_FLAGS.items()},
+        'players': snapshot['players'],
+        'scoreboard_seq': snapshot['seq'],
+        **chat_history_fields(game),
+    }, room=request.sid)
+    if game.game_mode == STADIUM:
+        emit('stadium_standings', stadium.standings(game), room=request.sid)
+    else:
+        emit('player_rejoined', {'name': player.name, 'sid': request.sid}, room=game_id)
+    if game.round and game.round.waiting_on(player):
+        emit('new_question', game.prepared[game.round.index].payload, room=request.sid)
+
+
+@on_event('create_game')
 def handle_create_game(data):
-    game_id = str(random.randint(1000, 9999))
+    if draining:
+        emit('error', {'message': 'The server is restarting. Please try again in a moment.'}, room=request.sid)
+        return
+    try:
+        game_id = game_id_allocator.allocate()
+    except RuntimeError as e:
+        emit('error', {'message': 'The server is full. Please try again shortly.'}, room=request.sid)
+        logger.warning("Could not create game: %s", e)
+        return
     player_name = data.get('name', 'Player 1')
     game_mode = data.get('game_mode', 'singleplayer') # singleplayer, head_to_head, multiplayer
     num_bots = int(data.get('num_bots', 0))
-    max_players = int(data.get('max_players', 1 if game_mode == 'singleplayer' else (2 if game_mode == 'head_to_head' else 8)))
+    max_players = int(data.get('max_players', 1 if game_mode == 'singleplayer' else (2 if game_mode == 'head_to_head' else (STADIUM_MAX_PLAYERS if game_mode == STADIUM else 8))))
     categories = data.get('categories', ['all']) # New: Get categories for the game
 
-    games[game_id] = {
-        'players': {},
-        'host_sid': request.sid,
-        'game_mode': game_mode,
-        'questions': [],
-        'current_question_index': -1,
-        'scores': {},
-        'timers': {},
-        'chat': [],
-        'max_players': max_players,
-        'num_bots': num_bots,
-        'bots': {},
-        'selected_categories': categories, # New: Store selected categories
-        'player_answers': {}, # New: To store answers for the current question
-        'lifelines_used_by_player': {}, # To track lifeline usage per player SID
-        'feelin_good_active_for_player': {} # SID: True if Feelin' Good is active for next correct answer
-    }
+    game = Game(game_id, request.sid, game_mode, max_players, num_bots, categories)
+    bot_level = data.get('bot_level')
+    game.bot_level = bot_level if bot_level in SKILL_TIERS else DEFAULT_SKILL
+    room_store.register(game) # This worker owns the room and runs its timers
     join_room(game_id)
-    games[game_id]['players'][request.sid] = {'name': player_name, 'score': 0, 'sid': request.sid, 'lifelines_used': {'fifty_fifty': False, 'ninetieth_minute': False, 'feelin_good': False}}
-    games[game_id]['scores'][player_name] = 0
-    games[game_id]['lifelines_used_by_player'][request.sid] = {'fifty_fifty': False, 'ninetieth_minute': False, 'feelin_good': False}
-    games[game_id]['feelin_good_active_for_player'][request.sid] = False
+    player = game.add_player(request.sid, player_name)
+    index_membership(request.sid, game_id)
+    room_snapshots.mark(game)
 
-    print(f"Game {game_id} created by {player_name} (SID: {request.sid}). Mode: {game_mode}, Max Players: {max_players}, Bots: {num_bots}, Categories: {categories}")
+    logger.info("Game %s created by %s (SID: %s). Mode: %s, Max Players: %s, Bots: %s (%s), Categories: %s", game_id, player_name, request.sid, game_mode, max_players, num_bots, game.bot_level, categories)
 
     # Add bots if any
     for i in range(num_bots):
         bot_id = f"bot_{i+1}_{game_id}" # Ensure bot_id is unique across games if bots dict becomes global
         bot_name = f"Bot {i+1}"
-        games[game_id]['bots'][bot_id] = {'name': bot_name, 'score': 0, 'lifelines_used': {'fifty_fifty': False, 'ninetieth_minute': False, 'feelin_good': False}, 'feelin_good_active': False}
-        games[game_id]['scores'][bot_name] = 0
-        print(f"Added {bot_name} to game {game_id}")
+        game.add_bot(bot_id, bot_name)
+        logger.debug("Added %s to game %s", bot_name, game_id)
 
-    emit('game_created', {'game_id': game_id, 'host_name': player_name, 'game_mode': game_mode, 'players': get_player_list(game_id)}, room=request.sid)
+    emit('game_created', {'game_id': game_id, 'host_name': player_name, 'game_mode': game_mode, 'players': get_player_list(game_id), 'max_players': max_players, 'seat_token': player.seat_token}, room=request.sid)
     emit('player_joined', {'name': player_name, 'sid': request.sid, 'is_host': True, 'players': get_player_list(game_id)}, room=game_id)
 
 
-@socketio.on('join_game')
+@on_event('join_game')
+@routed('join_game')
 def handle_join_game(data):
     game_id = data.get('game_id')
-    player_name = data.get('name', f'Player {len(games.get(game_id, {}).get("players", {})) + 1}')
     game = games.get(game_id)
 
     if not game:
         emit('error', {'message': 'Game not found.'}, room=request.sid)
         return
 
-    if len(game['players']) >= game['max_players']:
+    player_name = data.get('name', f'Player {len(game.players) + 1}')
+    if len(game.players) >= game.max_players:
         emit('error', {'message': 'Game room is full.'}, room=request.sid)
         return
 
     join_room(game_id)
-    game['players'][request.sid] = {'name': player_name, 'score': 0, 'sid': request.sid, 'lifelines_used': {'fifty_fifty': False, 'ninetieth_minute': False, 'feelin_good': False}}
-    game['scores'][player_name] = 0
-    game['lifelines_used_by_player'][request.sid] = {'fifty_fifty': False, 'ninetieth_minute': False, 'feelin_good': False}
-    game['feelin_good_active_for_player'][request.sid] = False
-    print(f"{player_name} (SID: {request.sid}) joined game {game_id}")
-    emit('player_joined', {'name': player_name, 'sid': request.sid, 'is_host': False, 'players': get_player_list(game_id)}, room=game_id)
-    emit('game_joined', {'game_id': game_id, 'players': get_player_list(game_id), 'chat_history': game.get('chat', [])}, room=request.sid)
+    player = game.add_player(request.sid, player_name)
+    index_membership(request.sid, game_id)
+    scoreboard.mark(game)
+    room_snapshots.mark(game)
+    logger.info("%s (SID: %s) joined game %s", player_name, request.sid, game_id)
+    players = get_player_list(game_id)
+    if game.game_mode == STADIUM:
+        stadium.mark_audience(game) # A join storm becomes one head count per window, not a roster per join
+    else:
+        emit('player_joined', {'name': player_name, 'sid': request.sid, 'is_host': False, 'players': players}, room=game_id)
+    emit('game_joined', {'game_id': game_id, 'game_mode': game.game_mode, 'players': players, 'max_players': game.max_players,
+                         'audience': len(game.players), 'seat_token': player.seat_token, **chat_history_fields(game)}, room=request.sid)
+    if game.round and game.round.is_open():
+        # Joined mid-question: they're now counted as a responder, so show them the question
+        emit('new_question', game.prepared[game.round.index].payload, room=request.sid)
+
+
+@on_event('quick_match')
+def handle_quick_match(data):
+    if draining:
+        emit('error', {'message': 'The server is restarting. Please try again in a moment.'}, room=request.sid)
+        return
+    sid = request.sid
+    player_name = data.get('name', 'Player 1')
+    try:
+        rating = rating_from_record(*game_results.head_to_head_record(player_name))
+    except sqlite3.Error as e:
+        logger.error("Could not read head-to-head record for %s: %s", player_name, e)
+        rating = DEFAULT_RATING
+    ticket, opponent = matchmaker.add(sid, player_name, data.get('categories', ['all']), rating)
+    if ticket is None:
+        return # Already searching
+    if opponent is not None:
+        scheduler.cancel(opponent.timer)
+        start_quick_match(opponent, ticket)
+        return
+    ticket.timer = scheduler.call_later(QUICK_MATCH_BOT_AFTER, quick_match_bot, sid)
+    logger.debug("%s (SID: %s) queued for a quick match at rating %s.", player_name, sid, rating)
+    emit('quick_match_queued', {'rating': rating, 'waiting': matchmaker.waiting(), 'bot_after': QUICK_MATCH_BOT_AFTER}, room=sid)
+    arm_quick_match_sweep()
+
+@on_event('cancel_quick_match')
+def handle_cancel_quick_match(data=None):
+    ticket = matchmaker.remove(request.sid)
+    if ticket:
+        scheduler.cancel(ticket.timer)
+        emit('quick_match_cancelled', {}, room=request.sid)
+
+def arm_quick_match_sweep():
+    global quick_match_sweep
+    if quick_match_sweep is None:
+        quick_match_sweep = scheduler.call_later(QUICK_MATCH_SWEEP_INTERVAL, sweep_quick_match)
+
+def sweep_quick_match():
+    global quick_match_sweep
+    quick_match_sweep = None
+    for first, second in matchmaker.sweep():
+        scheduler.cancel(first.timer)
+        scheduler.cancel(second.timer)
+        start_quick_match(first, second)
+    if matchmaker.waiting():
+        arm_quick_match_sweep()
+
+def quick_match_bot(sid):
+    ticket = matchmaker.take(sid)
+    if ticket:
+        start_quick_match(ticket)
+
+def start_quick_match(*tickets):
+    """Seats two matched players, or one player and a bot, in a new head-to-head room that starts by itself."""
+    now = time.monotonic()
+    against_bot = len(tickets) == 1
+    opponent_kind = 'bot' if against_bot else 'player'
+    quick_matches_total.inc(opponent_kind)
+    for ticket in tickets:
+        quick_match_wait_seconds.observe(now - ticket.since, opponent_kind)
+    try:
+        game_id = game_id_allocator.allocate()
+    except RuntimeError as e:
+        logger.warning("Could not create quick match: %s", e)
+        for ticket in tickets:
+            socketio.emit('error', {'message': 'The server is full. Please try again shortly.'}, room=ticket.sid)
+        return
+    host = tickets[0] # The longer-waiting player
+    game = Game(game_id, host.sid, 'head_to_head', 2, 1 if against_bot else 0, list(host.key))
+    game.bot_level = bot_level_for(host.rating) if against_bot else DEFAULT_SKILL
+    room_store.register(game)
+    seat_tokens = {}
+    for ticket in tickets:
+        socketio.server.enter_room(ticket.sid, game_id, namespace='/') # Outside the player's own request, so no join_room
+        seat_tokens[ticket.sid] = game.add_player(ticket.sid, ticket.name).seat_token
+        index_membership(ticket.sid, game_id)
+    if against_bot:
+        game.add_bot(f"bot_1_{game_id}", "Bot 1")
+    room_snapshots.mark(game)
+    logger.info("Quick match %s: %s vs %s after %.1fs.", game_id, host.name,
+                f"a {game.bot_level} bot" if against_bot else tickets[1].name, now - host.since)
+
+    players = game.player_list()
+    for ticket in tickets:
+        opponent = 'Bot 1' if against_bot else next(t.name for t in tickets if t is not ticket)
+        socketio.emit('match_found', {'game_id': game_id, 'game_mode': 'head_to_head', 'is_host': ticket is host,
+                                      'players': players, 'opponent': opponent, 'against_bot': against_bot,
+                                      'seat_token': seat_tokens[ticket.sid], 'starts_in': QUICK_MATCH_START_DELAY,
+                                      **chat_history_fields(game)}, room=ticket.sid)
+    game.timers['quick_match_start'] = scheduler.call_later(QUICK_MATCH_START_DELAY, start_game, game_id, room=game_id)
 
 
 def get_player_list(game_id):
+    """Everyone in the room, or only the top of a stadium room."""
     game = games.get(game_id)
     if not game:
         return []
-    player_list = [{'name': p_info['name'], 'score': p_info['score'], 'sid': sid, 'is_bot': False} for sid, p_info in game['players'].items()]
-    player_list.extend([{'name': b_info['name'], 'score': b_info['score'], 'sid': bid, 'is_bot': True} for bid, b_info in game['bots'].items()])
-    return player_list
+    if game.game_mode == STADIUM:
+        return stadium.top(game)
+    return game.player_list()
 
 
-@socketio.on('start_game')
+@on_event('start_game')
+@routed('start_game')
 def handle_start_game(data):
     game_id = data.get('game_id')
     game = games.get(game_id)
 
-    if not game or game['host_sid'] != request.sid:
+    if not game or game.host_sid != request.sid:
         emit('error', {'message': 'Only the host can start the game.'}, room=request.sid)
         return
+    start_game(game_id)
 
-    print(f"Attempting to start game {game_id}. Fetching questions...") # New log
-    conn = get_db_connection()
-    if not conn:
-        emit('error', {'message': 'Database connection failed.'}, room=game_id)
-        print(f"Failed to start game {game_id} due to DB connection error.") # New log
-        return
 
-    num_questions_to_fetch = 30 if game['game_mode'] == 'singleplayer' else 10
-    selected_categories = game.get('selected_categories', ['all'])
-    query = 'SELECT * FROM quiz_questions'
-    params = []
-
-    if selected_categories and 'all' not in selected_categories:
-        placeholders = ', '.join('?' for _ in selected_categories)
-        query += f' WHERE category IN ({placeholders})'
-        params.extend(selected_categories)
-    
-    query += ' ORDER BY RANDOM() LIMIT ?'
-    params.append(num_questions_to_fetch)
-
-    try:
-        print(f"Executing query: {query} with params: {params}") # Log query and params
-        cursor = conn.execute(query, tuple(params))
-        fetched_questions = [dict(q) for q in cursor.fetchall()]
-        if fetched_questions: # New: Check if any questions were fetched
-            print(f"Sample fetched question structure: {fetched_questions[0].keys()}") # New: Log keys of the first question
-        game['questions'] = fetched_questions
-        print(f"Fetched {len(game['questions'])} questions from DB for game {game_id} based on categories: {selected_categories}.")
-    except sqlite3.Error as e:
-        print(f"Error fetching questions from DB: {e}") # New log
-        emit('error', {'message': f'Error fetching questions: {e}'}, room=game_id)
-        game['questions'] = [] # Ensure it's an empty list on error
-    finally:
-        conn.close()
-        print("Database connection closed after fetching questions.") # New log
-
-    if not game['questions']:
-        emit('error', {'message': 'No questions found for the game. Please check database and table.'}, room=game_id) # Modified message
-        print(f"No questions loaded for game {game_id}. Game will not start properly.") # New log
+def start_game(game_id):
+    game = games.get(game_id)
+    if not game:
         return
-
-    game['current_question_index'] = -1
-    game['scores'] = {p_info['name']: 0 for p_info in game['players'].values()}
-    for bot_name in game['bots']:
-        game['scores'][bot_name] = 0
-
-    print(f"Game {game_id} started by host. Total questions: {len(game['questions'])}")
-    emit('game_started', {'game_id': game_id, 'total_questions': len(game['questions']), 'players': get_player_list(game_id)}, room=game_id)
+    scheduler.cancel(game.timers.pop('quick_match_start', None)) # The host may start a matched game early
+
+    num_questions_to_fetch = 30 if game.game_mode == 'singleplayer' else 10
+    selected_categories = game.selected_categories or ['all']
+    # Steer clear of what the room's humans have recently been given; a stadium audience is too big to ask
+    humans = [player.name for player in game.players.values()] if game.game_mode != STADIUM else []
+    exclude = seen_questions.exclusion(humans) if humans else None
+    # A spread of difficulties in proportion to each category's size, played easiest first
+    game.questions = question_bank.sample_game(selected_categories, num_questions_to_fetch, exclude=exclude)
+    logger.debug("Sampled %d questions for game %s based on categories: %s.", len(game.questions), game_id, selected_categories)
+    # Every question's shuffle, answer index and payloads are worked out now, not while the room waits
+    game.prepared = prepare_questions(game.questions, game.time_per_question)
+
+    if not game.questions:
+        socketio.emit('error', {'message': 'No questions found for the game. Please check database and table.'}, room=game_id) # Modified message
+        logger.warning("No questions loaded for game %s. Game will not start properly.", game_id)
+        return
+    if humans:
+        seen_questions.record(humans, [q['id'] for q in game.questions], len(question_bank))
+        flush_worker.request('seen_questions', seen_questions.flush, SEEN_QUESTIONS_FLUSH_DELAY)
+
+    game.current_question_index = -1
+    game.round = None
+    game.reset_scores()
+
+    logger.info("Game %s started by host. Total questions: %d", game_id, len(game.questions))
+    if game.game_mode == STADIUM:
+        standings = stadium.standings(game)
+        socketio.emit('game_started', {'game_id': game_id, 'total_questions': len(game.questions), 'players': standings['top'], 'scoreboard_seq': 0, 'standings': standings}, room=game_id)
+    else:
+        snapshot = scoreboard.reset(game) # Deltas for this game count up from here
+        socketio.emit('game_started', {'game_id': game_id, 'total_questions': len(game.questions), 'players': snapshot['players'], 'scoreboard_seq': snapshot['seq']}, room=game_id)
     send_next_question(game_id)
 
 
@@ -287,307 +885,256 @@ def send_next_question(game_id):
     if not game:
         return
 
-    game['current_question_index'] += 1
-    # Check if game still exists and if current_question_index is valid
-    if game['current_question_index'] >= len(game.get('questions', [])):
+    next_index = game.current_question_index + 1
+    # Check if game still exists and if the next question index is valid
+    if next_index >= len(game.questions):
         end_game(game_id)
         return
 
-    question_data = game['questions'][game['current_question_index']]
-    answers = [question_data['correct_answer'], question_data['wrong1'], question_data['wrong2'], question_data['wrong3']]
-    random.shuffle(answers)
+    # A fresh Round replaces the previous one, so answers from old questions aren't kept around.
+    # The correct answer stays on the server side for verification.
+    game.start_round(next_index)
+
+    socketio.emit('new_question', game.prepared[next_index].payload, room=game_id)
+    logger.debug("Sent question %d for game %s", next_index + 1, game_id)
+    arm_round_timers(game)
+    room_snapshots.mark(game)
 
-    # Mask correct answer for client
-    current_question_for_client = {
-        'id': question_data['id'],
-        'question': question_data['question'],
-        'answers': answers,
-        'category': question_data['category'],
-        'question_number': game['current_question_index'] + 1,
-        'total_questions': len(game['questions']),
-        'time_per_question': game.get('time_per_question', 15)
-    }
 
-    game['question_start_time'] = time.time()
-    game['player_answers'][game['current_question_index']] = {} # Reset answers for new question
-    # Store the correct answer on the server side for verification
-    game['current_correct_answer'] = question_data['correct_answer']
+def arm_round_timers(game):
+    """Schedules the open question's expiry and its bot answers, measured from when the round started."""
+    game_id = game.game_id
+    q_index = game.round.index
+    elapsed = time.time() - game.round.start_time
 
-    socketio.emit('new_question', current_question_for_client, room=game_id)
-    print(f"Sent question {game['current_question_index'] + 1} for game {game_id}")
+    # Server-side deadline, so a question ends even if a client never sends __TIMEOUT__
+    game.timers['question_expiry'] = scheduler.call_later(
+        max(0, game.time_per_question + ANSWER_GRACE_PERIOD - elapsed), expire_question, game_id, q_index, room=game_id)
 
-    # Bot answers (if any)
-    if game['bots']:
-        # Ensure bots only answer if the game hasn't ended (e.g. by a quick disconnect)
-        if game_id in games and game['current_question_index'] < len(game.get('questions', [])):
-            socketio.start_background_task(target=bots_answer, game_id=game_id, question_data=question_data)
+    # All bots are decided up front; their answers then go in on one timer, in delay order
+    bot_actions = [action for action in bot_engine.plan(game, q_index) if not game.has_answered(action.bot_id)]
+    if bot_actions:
+        game.timers['bot_answers'] = scheduler.call_later(
+            max(0, bot_actions[0].delay - elapsed), run_bot_actions, game_id, q_index, bot_actions, 0, room=game_id)
 
-def delayed_send_next_question(game_id, delay=5):
+
+def expire_question(game_id, q_index):
     game = games.get(game_id)
-    if not game:
-        print(f"Game {game_id} not found for delayed_send_next_question.")
+    if not game or not game.round or game.round.index != q_index or game.round.proceeded:
         return
-    print(f"Starting {delay}s delay before next question for game {game_id}")
-    socketio.sleep(delay)
-    # Check if game still exists after delay, e.g. not cleaned up by disconnect
-    if game_id in games:
-        print(f"Delay finished for game {game_id}. Sending next question.")
-        send_next_question(game_id)
-    else:
-        print(f"Game {game_id} no longer exists after delay. Not sending next question.")
 
+    logger.debug("Question %d in game %s timed out on the server.", q_index, game_id)
+    if game.game_mode != STADIUM: # A stadium audience that sat a question out isn't sent a result each
+        for participant in list(game.participants()):
+            # A held seat's player isn't there to miss it; a recorded miss would skew question difficulty
+            if participant.connected and not game.round.answered(participant):
+                submit_answer(game_id, participant.sid, NO_ANSWER, None, is_bot=participant.is_bot)
+
+    # Nobody left to answer (e.g. multiplayer room with no humans): move on anyway
+    if not game.round.proceeded:
+        proceed_to_answer_phase(game_id, q_index)
 
-def bots_answer(game_id, question_data):
+
+def run_bot_actions(game_id, q_index, actions, start):
+    """Submits every planned bot answer that's due, then re-arms for the next one."""
     game = games.get(game_id)
-    if not game: return
+    if not game or not game.round or game.round.index != q_index or game.round.proceeded:
+        return # Game ended or question changed; the rest of the plan is dropped
 
-    for bot_id, bot_info in list(game['bots'].items()): # Use list() for safe iteration if modifying
-        # Ensure bot still exists in game (could be removed by config change)
-        if bot_id not in game['bots']:
-            continue
+    elapsed = time.time() - game.round.start_time
+    end = start
+    while end < len(actions) and actions[end].delay <= elapsed:
+        end += 1
+    submit_bot_answers(game_id, actions[start:end])
 
-        # Bot decision-making delay
-        socketio.sleep(random.uniform(1, game.get('time_per_question', 15) * 0.6))
+    if end < len(actions) and not game.round.proceeded:
+        game.timers['bot_answers'] = scheduler.call_later(
+            actions[end].delay - elapsed, run_bot_actions, game_id, q_index, actions, end, room=game_id)
 
-        # Check if game still exists and question is current before bot acts
-        if game_id not in games or game['current_question_index'] >= len(game.get('questions', [])):
-            print(f"Bot {bot_info['name']} skipped acting as game ended or question changed.")
+
+def submit_bot_answers(game_id, actions):
+    """Records a batch of bot answers and checks once at the end whether the question is done."""
+    game = games.get(game_id)
+    current_round = game.round
+    answered = 0
+    for action in actions:
+        bot = game.bots.get(action.bot_id)
+        # Bot could have been removed by a config change since the plan was made
+        if not bot or current_round.answered(bot):
             continue
-        
-        current_q_data_for_bot = game['questions'][game['current_question_index']]
-        correct_answer_for_bot = current_q_data_for_bot['correct_answer']
-        all_incorrect_for_bot = [current_q_data_for_bot['wrong1'], current_q_data_for_bot['wrong2'], current_q_data_for_bot['wrong3']]
-
-        # Lifeline decisions for bot
-        used_fifty_fifty_this_turn = False
-        used_ninetieth_minute_this_turn = False
-        activated_feelin_good_this_turn = False # New flag for bot's Feelin' Good usage
-
-        if game['game_mode'] in ['head_to_head', 'multiplayer']:
-            # 50:50 Lifeline for Bot
-            if not bot_info['lifelines_used'].get('fifty_fifty', False) and not bot_info.get('feelin_good_active', False):
-                if random.random() < 0.20: # 20% chance to use 50:50 if available
-                    bot_info['lifelines_used']['fifty_fifty'] = True
-                    used_fifty_fifty_this_turn = True
-                    print(f"Bot {bot_info['name']} in game {game_id} is using 50:50 lifeline.")
-
-            # 90th Minute Lifeline for Bot
-            if not bot_info['lifelines_used'].get('ninetieth_minute', False) and not bot_info.get('feelin_good_active', False):
-                chance_to_use_90th = 0.15 # Base 15% chance
-                questions_remaining = len(game['questions']) - game['current_question_index']
-                if questions_remaining <= max(2, len(game['questions']) * 0.25):
-                    chance_to_use_90th = 0.30
-                
-                if random.random() < chance_to_use_90th:
-                    bot_info['lifelines_used']['ninetieth_minute'] = True
-                    used_ninetieth_minute_this_turn = True
-                    print(f"Bot {bot_info['name']} in game {game_id} is using 90th Minute lifeline.")
-            
-            # Feelin' Good Lifeline for Bot (can only be activated if not already active)
-            if not bot_info['lifelines_used'].get('feelin_good', False) and not bot_info.get('feelin_good_active', False):
-                if random.random() < 0.10: # 10% chance to use Feelin' Good if available
-                    bot_info['lifelines_used']['feelin_good'] = True
-                    bot_info['feelin_good_active'] = True # Activate it for the bot
-                    activated_feelin_good_this_turn = True
-                    print(f"Bot {bot_info['name']} in game {game_id} is activating Feelin' Good lifeline.")
-
-        # Determine bot's answer based on lifelines
-        answer = None
-        # Bot prioritizes 90th minute if used
-        if used_ninetieth_minute_this_turn:
-            answer = correct_answer_for_bot
-        elif used_fifty_fifty_this_turn:
-            kept_incorrect = random.choice(all_incorrect_for_bot)
-            if random.random() < 0.85: 
-                answer = correct_answer_for_bot
-            else:
-                answer = kept_incorrect
-        else:
-            # Original bot logic: 70% chance of correct answer
-            is_bot_correct_this_time = random.random() < 0.70
-            answer = correct_answer_for_bot if is_bot_correct_this_time else random.choice(all_incorrect_for_bot)
-        
-        # Simulate bot submitting answer
-        if game_id in games and game['current_question_index'] < len(game.get('questions', [])) and \
-           game['questions'][game['current_question_index']]['id'] == current_q_data_for_bot['id']:
-            handle_submit_answer({'game_id': game_id, 'answer': answer, 'timestamp': time.time()}, bot_id=bot_id)
-        else:
-            print(f"Bot {bot_info['name']} did not submit answer as game/question state changed after lifeline decision.")
+        if action.lifelines:
+            bot.use(action.lifelines)
+            if action.lifelines & FEELIN_GOOD:
+                bot.feelin_good_active = True
+        game.record_answer(action.bot_id, action.answer)
+        feelin_good_was_active = bot.consume_feelin_good()
+        if action.answer == current_round.correct_index:
+            game.add_points(bot, action.points * 2 if feelin_good_was_active else action.points) # Feelin' Good doubles it
+        answered += 1
+
+    if not answered:
+        return
+    room_snapshots.mark(game)
+    logger.debug("%d bot(s) answered question %d in game %s.", answered, current_round.index, game_id)
+    if current_round.all_answered():
+        logger.debug("All participants have answered question %d in game %s. Proceeding to show answer phase.", current_round.index, game_id)
+        proceed_to_answer_phase(game_id, current_round.index)
 
 
-@socketio.on('submit_answer')
-def handle_submit_answer(data, bot_id=None): # bot_id is internal for bot submissions
+@on_event('submit_answer')
+@routed('submit_answer')
+def handle_submit_answer(data):
     game_id = data.get('game_id')
-    answer = data.get('answer')
-    timestamp = data.get('timestamp') # Get timestamp from client
-    player_sid = request.sid if not bot_id else bot_id # Use bot_id if provided
+    if game_id not in games:
+        emit('error', {'message': 'Game not found.'}, room=request.sid)
+        return
+    submit_answer(game_id, request.sid, parse_answer(games[game_id], data), data.get('timestamp')) # Get timestamp from client
+
+
+def parse_answer(game, data):
+    """The submitted answer as an index into the answers as shown, or NO_ANSWER.
 
+    Clients send `answer_index`; the answer text (or "__TIMEOUT__") is still accepted on its own.
+    """
+    prepared = game.current_prepared()
+    if prepared is None:
+        return NO_ANSWER
+    answer_index = data.get('answer_index')
+    if isinstance(answer_index, int) and not isinstance(answer_index, bool) and 0 <= answer_index < len(prepared.answers):
+        return answer_index
+    answer_index = prepared.answer_index(data.get('answer'))
+    return NO_ANSWER if answer_index is None else answer_index
+
+
+def submit_answer(game_id, player_sid, answer, timestamp, is_bot=False):
+    """Records one answer (an index into the answers as shown, or NO_ANSWER) and advances the question if everyone is done."""
     game = games.get(game_id)
-    if not game:
-        emit('error', {'message': 'Game not found.'}, room=player_sid if not bot_id else None)
+    if not game or not game.round:
         return
 
-    current_q_index = game['current_question_index']
-    # Prevent duplicate/late submissions for human players
-    if not bot_id and player_sid in game['player_answers'].get(current_q_index, {}):
-        print(f"Player {player_sid} already answered question {current_q_index} in game {game_id}.")
+    current_round = game.round
+    current_q_index = current_round.index
+    # Prevent duplicate/late submissions
+    if game.has_answered(player_sid):
+        logger.debug("Player %s already answered question %d in game %s.", player_sid, current_q_index, game_id)
         return
 
-    time_since_question_start = time.time() - game.get('question_start_time', 0)
-    allowed_time = game.get('time_per_question', 15) + 2 # Add a small buffer for network
-    if answer != "__TIMEOUT__" and time_since_question_start > allowed_time:
-        print(f"Player {player_sid} submitted answer too late for question {current_q_index} in game {game_id}.")
-        answer = "__TIMEOUT__" # Force to timeout if server deems it too late
+    time_since_question_start = time.time() - current_round.start_time
+    allowed_time = game.time_per_question + ANSWER_GRACE_PERIOD # Add a small buffer for network
+    if answer != NO_ANSWER and time_since_question_start > allowed_time:
+        logger.debug("Player %s submitted answer too late for question %d in game %s.", player_sid, current_q_index, game_id)
+        answer = NO_ANSWER # Force to timeout if server deems it too late
 
-    player_info = game['players'].get(player_sid) if not bot_id else game['bots'].get(bot_id)
+    player_info = game.players.get(player_sid) if not is_bot else game.bots.get(player_sid)
     if not player_info:
-        print(f"Player/Bot {player_sid} not found in game {game_id}")
+        logger.debug("Player/Bot %s not found in game %s", player_sid, game_id)
         return
 
-    player_name = player_info['name']
-    
+    player_name = player_info.name
+
     # Store the answer
-    if current_q_index not in game['player_answers']:
-        game['player_answers'][current_q_index] = {}
-    game['player_answers'][current_q_index][player_sid] = {'answer': answer, 'timestamp': timestamp, 'name': player_name}
+    everyone_answered = game.record_answer(player_sid, answer)
 
     # If Feelin' Good was active for this player/bot, it's consumed now, regardless of answer.
     # The bonus is applied below if the answer is correct.
-    feelin_good_was_active_for_this_submission = False
-    if not bot_id and game['feelin_good_active_for_player'].get(player_sid, False):
-        feelin_good_was_active_for_this_submission = True
-        game['feelin_good_active_for_player'][player_sid] = False # Consume it
-    elif bot_id and player_info.get('feelin_good_active', False):
-        feelin_good_was_active_for_this_submission = True
-        player_info['feelin_good_active'] = False # Consume it for bot
-
-    if not bot_id:
-        time_taken = time.time() - game.get('question_start_time', time.time())
-        is_correct = (answer == game.get('current_correct_answer')) and (answer != "__TIMEOUT__")
+    feelin_good_was_active_for_this_submission = player_info.consume_feelin_good()
+
+    if not is_bot:
+        time_taken = time.time() - current_round.start_time
+        is_correct = answer == current_round.correct_index
+
+        time_limit = game.time_per_question
+        question_id = game.questions[current_q_index]['id']
+        question_stats.record(question_id, is_correct, None if answer == NO_ANSWER else min(time_taken / time_limit, 1.0))
+        flush_worker.request('question_stats', question_stats.flush, QUESTION_STATS_FLUSH_DELAY)
+        game_results.record_answer(player_name, is_correct, min(time_taken, time_limit))
 
         score_earned = 0
         if is_correct:
-            time_limit = game.get('time_per_question', 15)
             effective_time_taken = min(time_taken, time_limit)
             score_earned = max(10, int(100 - (effective_time_taken / time_limit) * 90))
-            
+
             bonus_points = 0
             if feelin_good_was_active_for_this_submission:
                 bonus_points = score_earned # Double the points
                 score_earned += bonus_points
-                print(f"Player {player_name} got Feelin' Good bonus of {bonus_points} points!")
-                emit('feelin_good_bonus', {'bonus_points': bonus_points}, room=player_sid)
-            
-            game['scores'][player_name] = game['scores'].get(player_name, 0) + score_earned
-            game['players'][player_sid]['score'] = game['scores'][player_name]
+                logger.debug("Player %s got Feelin' Good bonus of %d points!", player_name, bonus_points)
+                socketio.emit('feelin_good_bonus', {'bonus_points': bonus_points}, room=player_sid)
+
+            game.add_points(player_info, score_earned)
         elif feelin_good_was_active_for_this_submission: # Incorrect answer but FG was active
-            emit('feelin_good_expired', room=player_sid) # Inform client FG expired without bonus
+            socketio.emit('feelin_good_expired', room=player_sid) # Inform client FG expired without bonus
 
-        print(f"Player {player_name} in game {game_id} answered: {answer}. Correct: {is_correct}. Score earned: {score_earned}. Timestamp: {timestamp}")
-        
-        emit('answer_result', {
+        logger.debug("Player %s in game %s answered: %s. Correct: %s. Score earned: %d. Timestamp: %s", player_name, game_id, answer, is_correct, score_earned, timestamp)
+
+        socketio.emit('answer_result', {
             'correct': is_correct,
-            'correct_answer': game.get('current_correct_answer'),
+            'correct_answer': current_round.correct_answer,
             'score_earned': score_earned,
-            'your_total_score': game['scores'][player_name]
+            'your_total_score': player_info.score
         }, room=player_sid)
+    room_snapshots.mark(game)
 
-    elif bot_id and answer != "__TIMEOUT__":
-        is_correct = (answer == game.get('current_correct_answer'))
-        score_earned_bot = 0 # Initialize score for bot for this answer
-        if is_correct:
-            score_earned_bot = random.randint(50, 90) # Bots get a random score if correct
-            
-            if feelin_good_was_active_for_this_submission:
-                bonus_points_bot = score_earned_bot # Double points for bot
-                score_earned_bot += bonus_points_bot
-                print(f"Bot {player_name} got Feelin' Good bonus of {bonus_points_bot} points!")
-                # No need to emit 'feelin_good_bonus' to bot, but log is good
-
-            game['scores'][player_name] = game['scores'].get(player_name, 0) + score_earned_bot
-            game['bots'][bot_id]['score'] = game['scores'][player_name]
-        elif feelin_good_was_active_for_this_submission: # Incorrect answer but FG was active for bot
-            print(f"Bot {player_name}'s Feelin' Good expired without bonus.")
-            # No client-side event needed for bot's FG expiry
-
-        print(f"Bot {player_name} in game {game_id} answered: {answer}. Correct: {is_correct}. Score earned: {score_earned_bot}")
-
-    # Check if it's time to proceed to the next question's answer display period
-    proceed_to_show_answer_phase = False
-    game_mode = game['game_mode']
-    proceeded_flag_key = f'q_{current_q_index}_proceeded'
-
-    if game.get(proceeded_flag_key, False):
-        print(f"Question {current_q_index} in game {game_id} has already proceeded. Current submission by {player_name} will not re-trigger phase transition.")
-    else:
-        if game_mode == 'multiplayer':
-            human_player_sids = [sid for sid in game['players'].keys()]
-            answered_sids_for_current_q = game['player_answers'].get(current_q_index, {}).keys()
-            all_human_players_answered = True
-            if not human_player_sids: # No human players left (e.g. all disconnected)
-                all_human_players_answered = False # Or handle this scenario differently, maybe end game?
-                # For now, if no human players, bots might be playing alone, let them proceed if they are the only ones.
-                if not game['players'] and game['bots']:
-                    # Check if all bots have answered
-                    bot_sids = [sid for sid in game['bots'].keys()]
-                    all_bots_answered = True
-                    for b_sid in bot_sids:
-                        if b_sid not in answered_sids_for_current_q:
-                            all_bots_answered = False
-                            break
-                    if all_bots_answered:
-                        proceed_to_show_answer_phase = True
-                        print(f"All bots have answered (no humans) for question {current_q_index} in game {game_id}. Proceeding.")
-
-            else:
-                for sid in human_player_sids:
-                    if sid not in answered_sids_for_current_q:
-                        all_human_players_answered = False
-                        break
-                if all_human_players_answered:
-                    proceed_to_show_answer_phase = True
-                    print(f"All human players have answered question {current_q_index} in game {game_id}. Proceeding to show answer phase.")
-                else:
-                    print(f"Waiting for other players to answer question {current_q_index} in game {game_id}.")
-
-        elif game_mode == 'singleplayer':
-            if not bot_id: # Only human player's submission triggers next phase
-                proceed_to_show_answer_phase = True
-                print(f"Single player answered question {current_q_index}. Proceeding to show answer phase.")
-
-        elif game_mode == 'head_to_head':
-            total_participants = len(game['players']) + len(game['bots'])
-            if len(game['player_answers'].get(current_q_index, {})) == total_participants:
-                proceed_to_show_answer_phase = True
-                print(f"All H2H participants answered question {current_q_index}. Proceeding to show answer phase.")
-            else:
-                print(f"H2H: Waiting for all participants for question {current_q_index} in game {game_id}.")
-
-    if proceed_to_show_answer_phase and not game.get(proceeded_flag_key, False):
-        game[proceeded_flag_key] = True # Set the flag immediately
+    # Bots only come through here when a question times out on them; their real answers go through submit_bot_answers
 
-        if game_mode != 'singleplayer': # Scores are relevant for multiplayer & H2H
-             # Changed event name to 'scoreboard_update' and payload to be the direct player list
-             socketio.emit('scoreboard_update', get_player_list(game_id), room=game_id)
-        
-        inter_question_delay = 5 # Default for multiplayer and H2H vs Player
-        if game_mode == 'singleplayer':
-            inter_question_delay = 2
-        elif game_mode == 'head_to_head' and game.get('num_bots', 0) == 1:
-            # This implies a H2H game against a single bot
-            inter_question_delay = 2
-        
-        # Signal start of the answer display period
-        socketio.emit('show_answer_period_start', {
-            'duration': inter_question_delay,
-            'correct_answer': game.get('current_correct_answer')
-        }, room=game_id)
-        
-        # Start background task for delayed next question
-        socketio.start_background_task(target=delayed_send_next_question, game_id=game_id, delay=inter_question_delay)
+    # Outstanding responders are tracked per round, so this check is O(1) in every mode
+    if current_round.proceeded:
+        logger.debug("Question %d in game %s has already proceeded. Current submission by %s will not re-trigger phase transition.", current_q_index, game_id, player_name)
+    elif everyone_answered:
+        logger.debug("All participants have answered question %d in game %s. Proceeding to show answer phase.", current_q_index, game_id)
+        proceed_to_answer_phase(game_id, current_q_index)
+    else:
+        logger.debug("Waiting for %d more answer(s) to question %d in game %s.", current_round.remaining(), current_q_index, game_id)
 
 
-@socketio.on('use_lifeline')
+def proceed_to_answer_phase(game_id, q_index):
+    game = games.get(game_id)
+    if not game or not game.round or game.round.index != q_index or game.round.proceeded:
+        return
+    game.round.proceeded = True # Set the flag immediately
+    scheduler.cancel(game.timers.pop('question_expiry', None))
+    room_snapshots.mark(game)
+
+    game_mode = game.game_mode
+    if game_mode != 'singleplayer': # Scores are relevant for multiplayer & H2H
+        scoreboard.flush(game) # Only the scores that changed this question, sent now rather than after the window
+
+    inter_question_delay = 5 # Default for multiplayer and H2H vs Player
+    if game_mode == 'singleplayer':
+        inter_question_delay = 2
+    elif game_mode == 'head_to_head' and game.num_bots == 1:
+        # This implies a H2H game against a single bot
+        inter_question_delay = 2
+
+    # Signal start of the answer display period
+    reveal = {
+        'duration': inter_question_delay,
+        'correct_answer': game.round.correct_answer
+    }
+    if game_mode == STADIUM:
+        # One broadcast per question whatever the audience: the answer histogram and the standings
+        reveal['correct_index'] = game.round.correct_index
+        reveal['answer_counts'] = stadium.answer_counts(game)
+        reveal['standings'] = stadium.standings(game)
+    socketio.emit('show_answer_period_start', reveal, room=game_id)
+
+    # Next question fires from the shared scheduler instead of a sleeping background task
+    scheduler.call_later(inter_question_delay, send_next_question, game_id, room=game_id)
+
+
+@on_event('request_scoreboard')
+@routed('request_scoreboard')
+def handle_request_scoreboard(data):
+    """Full scoreboard for a client that missed a delta."""
+    game = games.get(data.get('game_id'))
+    if game and game.game_mode == STADIUM:
+        emit('stadium_standings', stadium.standings(game), room=request.sid)
+    elif game:
+        emit('scoreboard_snapshot', scoreboard.snapshot(game), room=request.sid)
+
+
+@on_event('use_lifeline')
+@routed('use_lifeline')
 def handle_use_lifeline(data):
     game_id = data.get('game_id')
     lifeline_type = data.get('lifeline_type')
@@ -598,88 +1145,62 @@ def handle_use_lifeline(data):
         emit('error', {'message': 'Game not found for lifeline.'}, room=player_sid)
         return
 
-    player_info = game['players'].get(player_sid)
+    player_info = game.players.get(player_sid)
     if not player_info:
         emit('error', {'message': 'Player not found for lifeline.'}, room=player_sid)
         return
 
     if lifeline_type == 'fifty_fifty':
-        if player_info['lifelines_used'].get('fifty_fifty', False):
+        if player_info.has_used(FIFTY_FIFTY):
             emit('error', {'message': '50:50 lifeline already used.'}, room=player_sid)
             return
 
-        if game['current_question_index'] < 0 or game['current_question_index'] >= len(game['questions']):
+        prepared = game.current_prepared()
+        if not prepared:
             emit('error', {'message': 'No active question for lifeline.'}, room=player_sid)
             return
-        
-        player_info['lifelines_used']['fifty_fifty'] = True
-        # Also update the game-level tracking if you still use it, though per-player is primary
-        if player_sid in game['lifelines_used_by_player']:
-             game['lifelines_used_by_player'][player_sid]['fifty_fifty'] = True
 
+        player_info.use(FIFTY_FIFTY)
 
-        current_question_details = game['questions'][game['current_question_index']]
-        correct_answer = current_question_details['correct_answer']
-        incorrect_answers = [current_question_details['wrong1'], current_question_details['wrong2'], current_question_details['wrong3']]
-        
-        # Ensure incorrect_answers doesn't somehow contain the correct_answer if data is bad
-        incorrect_answers = [ans for ans in incorrect_answers if ans != correct_answer]
-        
-        if len(incorrect_answers) < 2: # Should not happen with valid question data
+        # Which wrong answers 50:50 removes was decided, and encoded, when the game started
+        if prepared.fifty_fifty is None: # Should not happen with valid question data
             emit('error', {'message': 'Not enough incorrect answers to use 50:50.'}, room=player_sid)
             # Potentially revert lifeline usage if this is a critical error
-            # player_info['lifelines_used']['fifty_fifty'] = False 
             return
 
-        # Randomly choose one incorrect answer to keep
-        kept_incorrect = random.choice(incorrect_answers)
-        
-        # The other incorrect answers are to be disabled
-        disabled_answers = [ans for ans in incorrect_answers if ans != kept_incorrect]
-        
-        # If there were initially 3 unique incorrect answers, disabled_answers will now have 2.
-        # If there were only 2 unique incorrect answers (e.g. a True/False question was badly formatted as 4 options),
-        # this logic would still pick one to keep and one to disable.
-        # For safety, ensure we only send up to two to disable.
-        
-        emit('fifty_fifty_result', {'disabled_answers': disabled_answers[:2]}, room=player_sid)
-        print(f"Player {player_info['name']} (SID: {player_sid}) used 50:50. Disabling: {disabled_answers[:2]}. Keeping: {kept_incorrect} alongside {correct_answer}.")
+        emit('fifty_fifty_result', prepared.fifty_fifty, room=player_sid)
+        logger.debug("Player %s (SID: %s) used 50:50. Disabling: %s.", player_info.name, player_sid, prepared.fifty_fifty.data['disabled_answers'])
 
     elif lifeline_type == 'ninetieth_minute':
-        if player_info['lifelines_used'].get('ninetieth_minute', False):
+        if player_info.has_used(NINETIETH_MINUTE):
             emit('error', {'message': '90th Minute lifeline already used.'}, room=player_sid)
             return
 
-        if game['current_question_index'] < 0 or game['current_question_index'] >= len(game['questions']):
+        current_question_details = game.current_question()
+        if not current_question_details:
             emit('error', {'message': 'No active question for 90th Minute lifeline.'}, room=player_sid)
             return
-        
-        player_info['lifelines_used']['ninetieth_minute'] = True
-        if player_sid in game['lifelines_used_by_player']:
-             game['lifelines_used_by_player'][player_sid]['ninetieth_minute'] = True
 
-        current_question_details = game['questions'][game['current_question_index']]
+        player_info.use(NINETIETH_MINUTE)
         correct_answer_text = current_question_details['correct_answer']
         
         emit('ninetieth_minute_result', {'correct_answer_text': correct_answer_text}, room=player_sid)
-        print(f"Player {player_info['name']} (SID: {player_sid}) used 90th Minute. Correct answer: {correct_answer_text} revealed to them.")
+        logger.debug("Player %s (SID: %s) used 90th Minute. Correct answer: %s revealed to them.", player_info.name, player_sid, correct_answer_text)
     
     elif lifeline_type == 'feelin_good':
-        if player_info['lifelines_used'].get('feelin_good', False):
+        if player_info.has_used(FEELIN_GOOD):
             emit('error', {'message': 'Feelin\' Good lifeline already used.'}, room=player_sid)
             return
         
-        if game['feelin_good_active_for_player'].get(player_sid, False):
+        if player_info.feelin_good_active:
             emit('error', {'message': 'Feelin\' Good is already active for you.'}, room=player_sid)
             return
 
-        player_info['lifelines_used']['feelin_good'] = True
-        game['feelin_good_active_for_player'][player_sid] = True
-        if player_sid in game['lifelines_used_by_player']:
-             game['lifelines_used_by_player'][player_sid]['feelin_good'] = True
+        player_info.use(FEELIN_GOOD)
+        player_info.feelin_good_active = True
         
         emit('feelin_good_active', room=player_sid) # Inform client it's active
-        print(f"Player {player_info['name']} (SID: {player_sid}) activated Feelin' Good lifeline.")
+        logger.debug("Player %s (SID: %s) activated Feelin' Good lifeline.", player_info.name, player_sid)
     
     # elif lifeline_type == 'another_lifeline':
     #     pass # Future lifelines
@@ -689,9 +1210,10 @@ def end_game(game_id):
     game = games.get(game_id)
     if not game:
         return
+    game.finished = True # From here on the room is never snapshotted, so a restart can't score it again
+    scheduler.cancel_room(game_id) # Nothing left to fire once the game is over
 
-    final_scores = game['scores']
-    sorted_scores = sorted(final_scores.items(), key=lambda item: item[1], reverse=True)
+    sorted_scores = game.final_scores()
 
     winner_info = {}
     if not sorted_scores:
@@ -712,50 +1234,105 @@ def end_game(game_id):
         else:
             winner_info = {'winnerName': sorted_scores[0][0]}
 
-    print(f"Game {game_id} ended. Final scores: {sorted_scores}. Winner info: {winner_info}")
-    socketio.emit('game_over', {'scores': sorted_scores, 'game_id': game_id, 'winner_info': winner_info}, room=game_id)
-
-    if game['game_mode'] == 'singleplayer':
-        player_sid = list(game['players'].keys())[0]
-        player_name = game['players'][player_sid]['name']
-        player_score = game['scores'][player_name]
-        leaderboard.append({'name': player_name, 'score': player_score, 'timestamp': time.time()})
-        leaderboard.sort(key=lambda x: x['score'], reverse=True)
-        emit_leaderboard_update()
-
-@socketio.on('send_chat_message')
+    if game.game_mode == STADIUM:
+        logger.info("Stadium game %s ended with %d players. Top scores: %s. Winner info: %s", game_id, len(sorted_scores), sorted_scores[:stadium.top_n], winner_info)
+        socketio.emit('game_over', {'scores': sorted_scores[:stadium.top_n], 'game_id': game_id, 'winner_info': winner_info,
+                                    'standings': stadium.standings(game)}, room=game_id)
+    else:
+        logger.info("Game %s ended. Final scores: %s. Winner info: %s", game_id, sorted_scores, winner_info)
+        socketio.emit('game_over', {'scores': sorted_scores, 'game_id': game_id, 'winner_info': winner_info}, room=game_id)
+    scheduler.call_later(ROOM_LINGER_AFTER_GAME_OVER, close_game, game_id, room=game_id)
+    room_snapshots.discard(game_id) # Results are recorded below; a finished game isn't worth resuming
+
+    results = [(player.name, player.score) for player in game.players.values()]
+    opponents = [(bot.name, bot.score) for bot in game.bots.values()]
+    chunk = STADIUM_RESULTS_CHUNK if game.game_mode == STADIUM else len(results) or 1
+    for start in range(0, len(results), chunk):
+        # A stadium goes in several pieces so its results fit the queue's bound
+        if not game_results.record_game(game.game_mode, results[start:start + chunk], opponents):
+            logger.warning("Results of game %s dropped: the results queue is full.", game_id)
+
+    if game.game_mode == 'singleplayer' and game.players:
+        player = next(iter(game.players.values()))
+        if leaderboard.record(player.name, player.score):
+            emit_leaderboard_update()
+        flush_worker.request('leaderboard', leaderboard.flush, LEADERBOARD_FLUSH_DELAY)
+
+@on_event('send_chat_message')
+@routed('send_chat_message')
 def handle_send_chat_message(data):
     game_id = data.get('game_id')
     message_text = data.get('message')
     player_sid = request.sid
 
     game = games.get(game_id)
-    if not game:
+    if not game or not isinstance(message_text, str) or not message_text.strip():
         return
 
-    player_name = game['players'].get(player_sid, {}).get('name', 'Unknown Player')
-    chat_message = {'sender_name': player_name, 'sender_sid': player_sid, 'text': message_text, 'timestamp': time.time()}
-    game['chat'].append(chat_message)
+    limiter = chat_limiters.get(player_sid)
+    if limiter is None:
+        limiter = chat_limiters[player_sid] = TokenBucket(CHAT_RATE_PER_SECOND, CHAT_BURST)
+    if not limiter.take():
+        emit('chat_rate_limited', {'game_id': game_id, 'retry_after': round(limiter.retry_after(), 1)}, room=player_sid)
+        return
+
+    message_text = message_text[:CHAT_MAX_LENGTH]
+    player = game.players.get(player_sid)
+    player_name = player.name if player else 'Unknown Player'
+    chat_message = game.chat.append({'sender_name': player_name, 'sender_sid': player_sid, 'text': message_text, 'timestamp': time.time()})
+    room_snapshots.mark(game)
 
     emit('new_chat_message', chat_message, room=game_id)
-    print(f"Chat in {game_id} from {player_name}: {message_text}")
+    logger.debug("Chat in %s from %s: %s", game_id, player_name, message_text)
 
-    if game['game_mode'] == 'head_to_head' and game['num_bots'] > 0:
-        bot_id = list(game['bots'].keys())[0]
-        socketio.start_background_task(target=bot_chat_reply, game_id=game_id, bot_id=bot_id, original_message=message_text)
-    elif game['game_mode'] == 'multiplayer' and game['bots']:
+    if game.game_mode == 'head_to_head' and game.bots:
+        queue_bot_chat_reply(game, next(iter(game.bots)), message_text)
+    elif game.game_mode == 'multiplayer' and game.bots:
         if random.random() < 0.5:
-            bot_id_to_reply = random.choice(list(game['bots'].keys()))
-            socketio.start_background_task(target=bot_chat_reply, game_id=game_id, bot_id=bot_id_to_reply, original_message=message_text)
+            queue_bot_chat_reply(game, random.choice(list(game.bots.keys())), message_text)
+
+
+def chat_history_fields(game):
+    """The newest page of chat for a client arriving in a room; older pages come from request_chat_history."""
+    messages, has_more = game.chat.page(limit=CHAT_PAGE_SIZE)
+    return {'chat_history': messages, 'chat_has_more': has_more}
+
+
+@on_event('request_chat_history')
+@routed('request_chat_history')
+def handle_request_chat_history(data):
+    game_id = data.get('game_id')
+    game = games.get(game_id)
+    if not game or request.sid not in game.players:
+        return
+    before = data.get('before')
+    if not isinstance(before, int) or isinstance(before, bool):
+        before = None
+    messages, has_more = game.chat.page(before=before, limit=CHAT_PAGE_SIZE)
+    emit('chat_history_page', {'game_id': game_id, 'messages': messages, 'has_more': has_more}, room=request.sid)
+
+
+def queue_bot_chat_reply(game, bot_id, original_message):
+    """Schedules a bot's reply on the room scheduler. While one is pending, newer messages
+    replace what it replies to rather than queueing another."""
+    pending = game.timers.get('bot_chat')
+    delay = random.uniform(*BOT_CHAT_DELAY)
+    if pending is not None and not pending.cancelled:
+        delay = max(0, pending.deadline - time.monotonic())
+        scheduler.cancel(pending)
+    game.timers['bot_chat'] = scheduler.call_later(delay, bot_chat_reply, game.game_id, bot_id, original_message, room=game.game_id)
 
 
 def bot_chat_reply(game_id, bot_id, original_message):
     game = games.get(game_id)
-    if not game or bot_id not in game['bots']:
+    if not game:
+        return
+    game.timers.pop('bot_chat', None)
+    if bot_id not in game.bots:
         return
 
-    bot_name = game['bots'][bot_id]['name']
-    socketio.sleep(random.uniform(0.5, 2.0))
+    bot = game.bots[bot_id]
+    bot_name = bot.name
 
     replies = [
         f"Interesting point, {original_message.split()[0] if ' ' in original_message else ''}!",
@@ -770,52 +1347,145 @@ def bot_chat_reply(game_id, bot_id, original_message):
     if '?' in original_message:
         replies.append("That's a good question!")
     if 'score' in original_message.lower():
-        replies.append(f"My score is {game['bots'][bot_id]['score']}, what's yours?")
+        replies.append(f"My score is {bot.score}, what's yours?")
 
     bot_message_text = random.choice(replies)
-    chat_message = {'sender_name': bot_name, 'sender_sid': bot_id, 'text': bot_message_text, 'timestamp': time.time(), 'is_bot': True}
-    game['chat'].append(chat_message)
+    chat_message = game.chat.append({'sender_name': bot_name, 'sender_sid': bot_id, 'text': bot_message_text, 'timestamp': time.time(), 'is_bot': True})
+    room_snapshots.mark(game)
     socketio.emit('new_chat_message', chat_message, room=game_id)
-    print(f"Bot Chat in {game_id} from {bot_name}: {bot_message_text}")
+    logger.debug("Bot Chat in %s from %s: %s", game_id, bot_name, bot_message_text)
 
 
-@socketio.on('request_leaderboard')
+@on_event('request_leaderboard')
 def handle_request_leaderboard():
+    join_room(LEADERBOARD_ROOM) # Stay subscribed to changes while the leaderboard is open
     emit_leaderboard_update(room=request.sid)
 
+@on_event('leave_leaderboard')
+def handle_leave_leaderboard():
+    leave_room(LEADERBOARD_ROOM)
+
 def emit_leaderboard_update(room=None):
-    sorted_leaderboard = sorted(leaderboard, key=lambda x: x['score'], reverse=True)[:20]
+    """Sends the top 20 to one client, or to everyone subscribed when it has changed."""
     if room:
-        emit('leaderboard_update', sorted_leaderboard, room=room)
+        emit('leaderboard_update', leaderboard.top(), room=room)
     else:
-        socketio.emit('leaderboard_update', sorted_leaderboard)
+        socketio.emit('leaderboard_update', leaderboard.top(), room=LEADERBOARD_ROOM)
 
 
-if __name__ == '__main__':
+def restore_rooms():
+    """Brings back the rooms this worker had open before a restart.
+
+    Every human comes back disconnected, with their seat held for RECONNECT_GRACE_PERIOD
+    so the client can rejoin with its seat token. An open question keeps its original
+    deadline; one whose answer was already showing moves on to the next question.
+    """
+    restored = 0
+    for game in room_snapshots.load(question_bank.get, max_age=ROOM_SNAPSHOT_MAX_AGE):
+        game_id = game.game_id
+        if game_id in games or not game_id_allocator.claim(game_id):
+            room_snapshots.discard(game_id)
+            continue
+        room_store.register(game)
+        for player in list(game.players.values()):
+            game.disconnect_player(player.sid)
+            game.timers['seat_' + player.seat_token] = scheduler.call_later(
+                RECONNECT_GRACE_PERIOD, release_seat, game_id, player.seat_token, room=game_id)
+        if game.round is not None:
+            if game.game_mode != STADIUM:
+                scoreboard.reset(game)
+            if game.round.proceeded:
+                scheduler.call_later(ANSWER_GRACE_PERIOD, send_next_question, game_id, room=game_id)
+            else:
+                arm_round_timers(game)
+        restored += 1
+    if restored:
+        logger.info("Restored %d room(s) from %s.", restored, ROOM_SNAPSHOT_PATH)
+
+try:
+    restore_rooms()
+except sqlite3.Error as e:
+    logger.error("Could not restore rooms from %s: %s", ROOM_SNAPSHOT_PATH, e)
+
+# Shutdown: on SIGTERM the worker stops taking new rooms, gives games in play up to
+# SHUTDOWN_GRACE_PERIOD seconds to finish, then saves whatever is still running so the next
+# process resumes it (see restore_rooms) and clients rejoin with their seat tokens.
+SHUTDOWN_GRACE_PERIOD = float(os.environ.get('SHUTDOWN_GRACE_PERIOD', 20))
+draining = False
+
+def begin_drain(signum=None, frame=None):
+    global draining
+    if draining:
+        return
+    draining = True
+    signal.signal(signal.SIGTERM, signal.SIG_DFL) # A second SIGTERM stops at once
+    logger.info("Draining: no new rooms, waiting up to %ss for %d room(s).", SHUTDOWN_GRACE_PERIOD,
+                sum(not game.finished for game in list(games.values())))
+    socketio.start_background_task(drain)
+
+def drain():
+    socketio.emit('server_draining', {'grace_period': SHUTDOWN_GRACE_PERIOD})
+    for ticket in matchmaker.clear(): # Nobody new gets matched here; they can queue again after the restart
+        scheduler.cancel(ticket.timer)
+    deadline = time.monotonic() + SHUTDOWN_GRACE_PERIOD
+    # Finished rooms only linger for their game_over screen; their results are already recorded
+    while time.monotonic() < deadline and any(game.questions and not game.finished for game in list(games.values())):
+        socketio.sleep(0.5)
+    scheduler.stop() # Freeze the remaining rooms where they are before saving them
+    for game in list(games.values()):
+        if not game.finished:
+            room_snapshots.mark(game)
+    saved = room_snapshots.flush()
+    logger.info("Drained; saved %d room(s) for the next process.", saved)
+    # The atexit flushes run once the server loop returns
+    if SERVER_MODE == 'threading':
+        os.kill(os.getpid(), signal.SIGINT) # Werkzeug's serve_forever ends on KeyboardInterrupt in the main thread
+    else:
+        socketio.stop()
+
+def check_database():
     if not os.path.exists(DATABASE_PATH):
-        print(f"Database not found at {DATABASE_PATH}. Please ensure it exists and is in the correct location relative to app.py.")
+        logger.error("Database not found at %s. Please ensure it exists and is in the correct location relative to app.py.", DATABASE_PATH)
     else:
-        print(f"Database found at {DATABASE_PATH}")
+        logger.info("Database found at %s", DATABASE_PATH)
 
     try:
         conn = get_db_connection()
         conn.execute('SELECT 1 FROM quiz_questions LIMIT 1')
         conn.close()
-        print("Successfully connected to the database and queried quiz_questions table.")
+        logger.info("Successfully connected to the database and queried quiz_questions table.")
     except sqlite3.Error as e:
-        print(f"Error connecting to or querying the database: {e}")
-        print(f"Please ensure the database '{os.path.basename(DATABASE_PATH)}' is in the same directory as this script or adjust DATABASE_PATH.")
+        logger.error("Error connecting to or querying the database: %s", e)
+        logger.error("Please ensure the database '%s' is in the same directory as this script or adjust DATABASE_PATH.", os.path.basename(DATABASE_PATH))
         exit(1)
 
-    print("Starting server...")    # Use environment variables for host and port (for Render deployment)
+def create_app(handle_signals=True):
+    """Checks the database and returns the Flask app with Socket.IO attached, ready to serve.
+
+    This is the entry point for WSGI servers (see wsgi.py). handle_signals installs the SIGTERM
+    drain; leave it off when the server owns the worker's signals, as gunicorn does.
+    """
+    check_database()
+    if handle_signals:
+        signal.signal(signal.SIGTERM, begin_drain)
+    return app
+
+
+if __name__ == '__main__':
+    create_app()
+
+    logger.info("Starting server...")    # Use environment variables for host and port (for Render deployment)
     host = os.environ.get('HOST', '0.0.0.0')
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') != 'production'
     
-    print(f"Server starting on {host}:{port} (debug={debug})")
+    logger.info("Server starting on %s:%s (mode=%s, debug=%s)", host, port, SERVER_MODE, debug)
     
-    # For production deployment, allow unsafe Werkzeug
-    if os.environ.get('FLASK_ENV') == 'production':
+    if SERVER_MODE != 'threading':
+        socketio.run(app, debug=debug, host=host, port=port)
+    elif os.environ.get('FLASK_ENV') == 'production':
+        # Werkzeug holds a thread per connection; set SERVER_MODE=eventlet for many concurrent players
+        logger.warning("Serving production traffic on Werkzeug; SERVER_MODE=eventlet handles far more connections.")
         socketio.run(app, debug=debug, host=host, port=port, allow_unsafe_werkzeug=True)
     else:
         socketio.run(app, debug=debug, host=host, port=port)
@@ -0,0 +1,63 @@
+"""Time to decide every bot's answer for one question: NumPy batch vs per-bot Python.
+
+Run from the repo root:  python backend/benchmarks/bot_engine.py [--bots 10 100 500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot_engine import BotEngine, np  # noqa: E402
+from game_state import Game  # noqa: E402
+from question_payloads import prepare_questions  # noqa: E402
+
+
+def build_room(bots, questions):
+    game = Game('1234', 'sid0', 'multiplayer', 8, bots, ['all'])
+    game.questions = [
+        {'id': i, 'question': f'Q{i}', 'correct_answer': 'right', 'wrong1': 'a', 'wrong2': 'b', 'wrong3': 'c',
+         'category': 'General'}
+        for i in range(questions)
+    ]
+    game.prepared = prepare_questions(game.questions, game.time_per_question)
+    for i in range(bots):
+        game.add_bot(f'bot_{i + 1}_1234', f'Bot {i + 1}')
+    return game
+
+
+def time_plans(engine, game, repeats):
+    start = time.perf_counter()
+    for r in range(repeats):
+        engine.plan(game, r % len(game.questions))
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bots', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    results = []
+    for bots in args.bots:
+        game = build_room(bots, 10)
+        row = {'bots': bots, 'python_ms_per_question': round(time_plans(BotEngine(args.seed, use_numpy=False), game, args.repeats) * 1000, 3)}
+        if np is not None:
+            numpy_engine = BotEngine(args.seed, vectorize_min_bots=0)
+            row['numpy_ms_per_question'] = round(time_plans(numpy_engine, game, args.repeats) * 1000, 3)
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for row in results:
+            print('  '.join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""Load test of the full Socket.IO game flow: N rooms of M players from create_game to game_over.
+
+Runs the app in-process through the Flask-SocketIO test client by default, on a
+throwaway copy of the database. Pass --url to drive a running server instead
+(needs the python-socketio client extras: pip install "python-socketio[client]").
+
+Run from the repo root:  python backend/benchmarks/load_game_flow.py [--rooms 50 --players 4] [--json]
+"""
+import argparse
+import gc
+import json
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Request event -> the event that answers it, for latency measurement
+RESPONSES = {
+    'create_game': 'game_created',
+    'join_game': 'game_joined',
+    'start_game': 'game_started',
+    'submit_answer': 'answer_result',
+    'use_lifeline': 'fifty_fifty_result',
+}
+LIFELINE_RESPONSES = {'fifty_fifty_result', 'ninetieth_minute_result', 'feelin_good_active'}
+
+
+class InProcessTransport:
+    """One player connected through the Flask-SocketIO test client."""
+
+    def __init__(self, app_module):
+        self.client = app_module.socketio.test_client(app_module.app)
+
+    def emit(self, event, data):
+        self.client.emit(event, data)
+
+    def receive(self):
+        return [(message['name'], message['args'][0] if message['args'] else None) for message in self.client.get_received()]
+
+    def close(self):
+        if self.client.is_connected():
+            self.client.disconnect()
+
+
+class RemoteTransport:
+    """One player connected to a running server over a real Socket.IO connection."""
+
+    def __init__(self, url):
+        import socketio  # the client needs extras the server doesn't, so only import it here
+        self._inbox = queue.SimpleQueue()
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('*', lambda event, data=None: self._inbox.put((event, data)))
+        self.client.connect(url, transports=['websocket'])
+
+    def emit(self, event, data):
+        self.client.emit(event, data)
+
+    def receive(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self._inbox.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self):
+        self.client.disconnect()
+
+
+class Latencies:
+    def __init__(self):
+        self.samples = {}  # response event -> [seconds]
+
+    def add(self, event, seconds):
+        self.samples.setdefault(event, []).append(seconds)
+
+    @staticmethod
+    def _percentile(ordered, pct):
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self):
+        result = {}
+        for event, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            result[event] = {
+                'count': len(ordered),
+                'p50_ms': round(self._percentile(ordered, 50) * 1000, 3),
+                'p90_ms': round(self._percentile(ordered, 90) * 1000, 3),
+                'p99_ms': round(self._percentile(ordered, 99) * 1000, 3),
+                'max_ms': round(ordered[-1] * 1000, 3),
+            }
+        return result
+
+
+class Player:
+    def __init__(self, transport, name, latencies):
+        self.transport = transport
+        self.name = name
+        self.latencies = latencies
+        self._waiting = {}  # response event -> time the request went out
+        self._buffer = []  # received but not yet handed to the room
+
+    def request(self, event, data, response=None):
+        self._waiting[response or RESPONSES[event]] = time.perf_counter()
+        self.transport.emit(event, data)
+        # The in-process client answers synchronously, so this times the handler rather than our polling loop
+        self._collect()
+
+    def _collect(self):
+        messages = self.transport.receive()
+        now = time.perf_counter()
+        for name, _ in messages:
+            key = 'fifty_fifty_result' if name in LIFELINE_RESPONSES else name
+            sent = self._waiting.pop(key, None)
+            if sent is not None:
+                self.latencies.add(key, now - sent)
+        self._buffer.extend(messages)
+
+    def poll(self):
+        self._collect()
+        messages, self._buffer = self._buffer, []
+        return messages
+
+
+class Room:
+    """Walks one room through create -> join -> start -> answer every question -> game_over."""
+
+    def __init__(self, players, bots, time_per_question, rng):
+        self.players = players
+        self.bots = bots
+        self.time_per_question = time_per_question
+        self.rng = rng
+        self.game_id = None
+        self.state = 'creating'
+        self.joined = 0
+        self.questions_answered = 0
+        self.errors = []
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        host = players[0]
+        host.request('create_game', {'name': host.name, 'game_mode': 'multiplayer', 'num_bots': bots,
+                                     'max_players': len(players)})
+
+    def step(self):
+        for index, player in enumerate(self.players):
+            for name, data in player.poll():
+                self._handle(index, player, name, data)
+
+    def _handle(self, index, player, name, data):
+        if name == 'error':
+            self.errors.append(data.get('message') if isinstance(data, dict) else data)
+        elif name == 'game_created':
+            self.game_id = data['game_id']
+            if len(self.players) == 1:
+                self._start()
+            for guest in self.players[1:]:
+                guest.request('join_game', {'game_id': self.game_id, 'name': guest.name})
+        elif name == 'game_joined':
+            self.joined += 1
+            if self.joined == len(self.players) - 1:
+                self._start()
+        elif name == 'new_question':
+            if data['question_number'] == 1 and index == 0:
+                player.request('use_lifeline', {'game_id': self.game_id, 'lifeline_type': 'fifty_fifty'})
+            player.request('submit_answer', {'game_id': self.game_id, 'answer': self.rng.choice(data['answers'])})
+            self.questions_answered += 1
+        elif name == 'game_over' and index == 0:
+            self.state = 'over'
+            self.finished_at = time.perf_counter()
+
+    def _start(self):
+        host = self.players[0]
+        host.transport.emit('configure_game', {'game_id': self.game_id, 'time_per_question': self.time_per_question,
+                                               'num_bots': self.bots, 'max_players': len(self.players)})
+        host.request('start_game', {'game_id': self.game_id})
+        self.state = 'playing'
+
+    def close(self):
+        for player in self.players:
+            player.transport.close()
+
+
+def count_greenlets():
+    try:
+        from greenlet import greenlet
+    except ImportError:
+        return None
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, greenlet))
+
+
+def load_app(database):
+    os.environ['DATABASE_PATH'] = database
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')  # per-event logging would swamp the report
+    import app as app_module
+    return app_module
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=50)
+    parser.add_argument('--players', type=int, default=4, help='humans per room, including the host')
+    parser.add_argument('--bots', type=int, default=2, help='bots per room')
+    parser.add_argument('--questions', type=int, default=3, help='questions per game (in-process only)')
+    parser.add_argument('--time-per-question', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=300, help='give up after this many seconds')
+    parser.add_argument('--url', help='drive a running server (e.g. http://localhost:5000) instead of the in-process app')
+    parser.add_argument('--database', help='database for the in-process app; defaults to a temporary copy of quiz_questions.db')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    results = run(args)  # the in-process app's logging is turned down to warnings in load_app()
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for key, value in results.items():
+            if key == 'latency':
+                for event, stats in value.items():
+                    print(f"{'latency ' + event:>28}: " + '  '.join(f"{k}={v}" for k, v in stats.items()))
+            else:
+                print(f"{key:>28}: {value}")
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    latencies = Latencies()
+    tmpdir = None
+    app_module = None
+    if args.url:
+        make_transport = lambda: RemoteTransport(args.url)  # noqa: E731
+    else:
+        database = args.database
+        if not database:
+            tmpdir = tempfile.mkdtemp(prefix='quiz-bench-')
+            database = os.path.join(tmpdir, 'quiz_questions.db')
+            shutil.copy(os.path.join(BACKEND_DIR, '..', 'quiz_questions.db'), database)
+        os.environ.setdefault('BOT_SEED', str(args.seed))
+        app_module = load_app(database)
+        sample_game = app_module.question_bank.sample_game
+        app_module.question_bank.sample_game = lambda categories, count, exclude=None: sample_game(
+            categories, args.questions, exclude=exclude)
+        make_transport = lambda: InProcessTransport(app_module)  # noqa: E731
+
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    threads_before = threading.active_count()
+    started = time.perf_counter()
+    rooms = []
+    for r in range(args.rooms):
+        players = [Player(make_transport(), f'Load {r}-{p}', latencies) for p in range(args.players)]
+        rooms.append(Room(players, args.bots, args.time_per_question, rng))
+    setup_seconds = time.perf_counter() - started
+
+    peak_memory = 0
+    peak_threads = threading.active_count()
+    deadline = started + args.timeout
+    while time.perf_counter() < deadline:
+        for room in rooms:
+            if room.state != 'over':
+                room.step()
+        if all(room.state == 'over' for room in rooms):
+            break
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[0] - memory_before)
+        peak_threads = max(peak_threads, threading.active_count())
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    greenlets = count_greenlets()
+    tracemalloc.stop()
+
+    finished = [room for room in rooms if room.state == 'over']
+    game_seconds = sorted(room.finished_at - room.started_at for room in finished)
+    results = {
+        'mode': 'url' if args.url else 'in_process',
+        'rooms': args.rooms,
+        'players_per_room': args.players,
+        'bots_per_room': args.bots,
+        'questions': None if args.url else args.questions,
+        'rooms_finished': len(finished),
+        'elapsed_s': round(elapsed, 3),
+        'setup_s': round(setup_seconds, 3),
+        'rooms_per_sec': round(len(finished) / elapsed, 3) if elapsed else None,
+        'game_seconds_p50': round(game_seconds[len(game_seconds) // 2], 3) if game_seconds else None,
+        'answers_submitted': sum(room.questions_answered for room in rooms),
+        'errors': sum(len(room.errors) for room in rooms),
+        'latency': latencies.summary(),
+        'peak_memory_per_room_bytes': round(peak_memory / args.rooms) if args.rooms else None,
+        'threads_before': threads_before,
+        'peak_threads': peak_threads,
+        'greenlets': greenlets,
+    }
+    if app_module is not None:
+        results['scheduler'] = app_module.scheduler.stats()
+
+    for room in rooms:
+        room.close()
+    if tmpdir:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+
+if __name__ == '__main__':
+    main()
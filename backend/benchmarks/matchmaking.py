@@ -0,0 +1,100 @@
+"""Quick-match queue under load: wait times, bot fallbacks and queue cost at a given arrival rate.
+
+Simulates --seconds of arrivals at --rate players per second, with ratings
+spread around the default and category picks skewed towards 'all' the way
+real lobbies are. The clock is simulated, so an evening peak runs in seconds.
+
+Run from the repo root:  python backend/benchmarks/matchmaking.py [--rate 5 50 500] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matchmaking import DEFAULT_RATING, MatchQueue  # noqa: E402
+
+CATEGORIES = (['all'],) * 6 + (['Football'], ['Basketball'], ['Cricket'], ['Tennis'])
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def simulate(rate, seconds, bot_after, sweep_interval, seed):
+    rng = random.Random(seed)
+    queue = MatchQueue()
+    waits, bot_waits = [], []
+    deadlines = deque()  # (deadline, sid) for the bot fallback, in arrival order
+    busy = 0.0
+    now, next_sweep, arrivals, sid = 0.0, sweep_interval, 0, 0
+
+    def matched(pair, at):
+        for ticket in pair:
+            waits.append(at - ticket.since)
+
+    while now < seconds or queue.waiting():
+        now += rng.expovariate(rate) if now < seconds else sweep_interval
+        while next_sweep <= now:
+            started = time.perf_counter()
+            for pair in queue.sweep(next_sweep):
+                matched(pair, next_sweep)
+            busy += time.perf_counter() - started
+            next_sweep += sweep_interval
+        while deadlines and deadlines[0][0] <= now:
+            _, expired = deadlines.popleft()
+            ticket = queue.take(expired, now)
+            if ticket:
+                bot_waits.append(now - ticket.since)
+        if now >= seconds:
+            continue
+        sid += 1
+        arrivals += 1
+        rating = round(rng.gauss(DEFAULT_RATING, 120))
+        started = time.perf_counter()
+        ticket, opponent = queue.add(sid, f'Player {sid}', rng.choice(CATEGORIES), rating, now)
+        busy += time.perf_counter() - started
+        if opponent:
+            matched((ticket, opponent), now)
+        else:
+            deadlines.append((now + bot_after, sid))
+
+    return {
+        'rate': rate,
+        'arrivals': arrivals,
+        'paired': len(waits),
+        'vs_bot': len(bot_waits),
+        'wait_p50_s': round(percentile(waits, 0.5), 2),
+        'wait_p95_s': round(percentile(waits, 0.95), 2),
+        'queue_us_per_arrival': round(busy / arrivals * 1e6, 2) if arrivals else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rate', type=float, nargs='+', default=[0.5, 5, 50, 500], help='arrivals per second')
+    parser.add_argument('--seconds', type=float, default=600)
+    parser.add_argument('--bot-after', type=float, default=20)
+    parser.add_argument('--sweep-interval', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    results = [simulate(rate, args.seconds, args.bot_after, args.sweep_interval, args.seed) for rate in args.rate]
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for row in results:
+            print('  '.join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == '__main__':
+    main()
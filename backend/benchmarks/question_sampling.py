@@ -0,0 +1,73 @@
+"""Repeat questions across a player's consecutive games, with and without seen-sets, and what they cost.
+
+Plays --games single-player games of --questions for one player name, counting
+how many of each game's questions were already given to them in the previous
+--lookback games, and how their difficulties came out. Sampling time is
+averaged over each run.
+
+Run from the repo root:  python backend/benchmarks/question_sampling.py [--games 12] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_pool import ConnectionPool  # noqa: E402
+from question_bank import DIFFICULTIES, QuestionBank  # noqa: E402
+from seen_questions import SeenQuestions  # noqa: E402
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'quiz_questions.db')
+
+
+def play(bank, seen, games, questions, lookback, categories):
+    history, repeats, seconds = [], [], 0.0
+    mix = dict.fromkeys(DIFFICULTIES, 0)
+    for _ in range(games):
+        started = time.perf_counter()
+        exclude = seen.exclusion(['Player']) if seen else None
+        ids = bank.game_ids(categories, questions, exclude=exclude)
+        seconds += time.perf_counter() - started
+        recent = set().union(*history[-lookback:])
+        repeats.append(len(recent.intersection(ids)))
+        history.append(set(ids))
+        for qid in ids:
+            mix[bank.get(qid)['difficulty']] += 1
+        if seen:
+            seen.record(['Player'], ids, len(bank))
+    return {
+        'seen_sets': seen is not None,
+        'repeats_per_game': repeats,
+        'total_repeats': sum(repeats),
+        'sample_us': round(seconds / games * 1e6, 1),
+        'difficulty_mix': '/'.join(str(mix[d]) for d in DIFFICULTIES),
+        'bytes_per_player': seen.stats()['avg_bytes_per_player'] if seen else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB, help='question database (only read)')
+    parser.add_argument('--games', type=int, default=12)
+    parser.add_argument('--questions', type=int, default=30, help='questions per game (single-player uses 30)')
+    parser.add_argument('--lookback', type=int, default=6, help='previous games a repeat is counted against')
+    parser.add_argument('--categories', nargs='+', default=['all'])
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    bank = QuestionBank(ConnectionPool(args.db))
+    bank.load()
+    results = [play(bank, seen, args.games, args.questions, args.lookback, args.categories)
+               for seen in (None, SeenQuestions(db_pool=None))]
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for row in results:
+            print('  '.join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Bytes per active room: the old nested-dict room vs the Game/Participant/Round model.
+
+Run from the repo root:  python backend/benchmarks/room_memory.py [--rooms 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_state import Game, FIFTY_FIFTY, FEELIN_GOOD  # noqa: E402
+from question_payloads import prepare_questions  # noqa: E402
+
+LIFELINES = {'fifty_fifty': False, 'ninetieth_minute': False, 'feelin_good': False}
+# Built once and shared, like the question lists, so only per-room state is measured
+PREPARED = prepare_questions([{'id': i, 'question': f'Q{i}', 'correct_answer': 'answer', 'wrong1': 'a', 'wrong2': 'b',
+                               'wrong3': 'c', 'category': 'General'} for i in range(50)], 15)
+
+
+def legacy_room(game_id, humans, bots, questions_played):
+    """Builds a room the way the old handlers did, including per-question leftovers."""
+    game = {
+        'players': {}, 'host_sid': 'sid0', 'game_mode': 'multiplayer', 'questions': [],
+        'current_question_index': -1, 'scores': {}, 'timers': {}, 'chat': [],
+        'max_players': 8, 'num_bots': bots, 'bots': {}, 'selected_categories': ['all'],
+        'player_answers': {}, 'lifelines_used_by_player': {}, 'feelin_good_active_for_player': {},
+    }
+    for i in range(humans):
+        sid = f'sid{i}_{game_id}'
+        name = f'Player {i}'
+        game['players'][sid] = {'name': name, 'score': 0, 'sid': sid, 'lifelines_used': dict(LIFELINES)}
+        game['scores'][name] = 0
+        game['lifelines_used_by_player'][sid] = dict(LIFELINES)
+        game['feelin_good_active_for_player'][sid] = False
+    for i in range(bots):
+        bot_id = f'bot_{i+1}_{game_id}'
+        game['bots'][bot_id] = {'name': f'Bot {i+1}', 'score': 0, 'lifelines_used': dict(LIFELINES), 'feelin_good_active': False}
+        game['scores'][f'Bot {i+1}'] = 0
+    now = time.time()
+    for q in range(questions_played):
+        game['current_question_index'] = q
+        game['question_start_time'] = now
+        game['current_correct_answer'] = 'answer'
+        answers = game['player_answers'][q] = {}
+        for sid, info in list(game['players'].items()) + list(game['bots'].items()):
+            answers[sid] = {'answer': 'answer', 'timestamp': now, 'name': info['name']}
+        game[f'q_{q}_proceeded'] = True
+    return game
+
+
+def model_room(game_id, humans, bots, questions_played):
+    game = Game(game_id, 'sid0', 'multiplayer', 8, bots, ['all'])
+    game.prepared = PREPARED
+    for i in range(humans):
+        p = game.add_player(f'sid{i}_{game_id}', f'Player {i}')
+        p.use(FIFTY_FIFTY)
+    for i in range(bots):
+        b = game.add_bot(f'bot_{i+1}_{game_id}', f'Bot {i+1}')
+        b.use(FEELIN_GOOD)
+    for q in range(questions_played):
+        current = game.start_round(q)
+        for p in game.participants():
+            current.answers[p.sid] = current.correct_index
+        current.proceeded = True
+    return game
+
+
+def measure(builder, rooms, humans, bots, questions_played):
+    # Question lists are shared with the question bank in both layouts, so they're left out
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [builder(str(1000 + i), humans, bots, questions_played) for i in range(rooms)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del kept
+    return total / rooms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=2000)
+    parser.add_argument('--humans', type=int, default=4)
+    parser.add_argument('--bots', type=int, default=4)
+    parser.add_argument('--questions', type=int, default=10, help='questions already played in each room')
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    results = {
+        'rooms': args.rooms,
+        'humans': args.humans,
+        'bots': args.bots,
+        'questions_played': args.questions,
+        'legacy_bytes_per_room': round(measure(legacy_room, args.rooms, args.humans, args.bots, args.questions)),
+        'model_bytes_per_room': round(measure(model_room, args.rooms, args.humans, args.bots, args.questions)),
+    }
+    results['reduction'] = round(1 - results['model_bytes_per_room'] / results['legacy_bytes_per_room'], 3)
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for key, value in results.items():
+            print(f"{key:>24}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Cost of snapshotting one room: encode/decode time and blob size, by room size.
+
+Run from the repo root:  python backend/benchmarks/room_snapshots.py [--players 2 8 50] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_state import Game  # noqa: E402
+from question_payloads import prepare_questions  # noqa: E402
+from room_snapshots import CHAT_TAIL, decode_game, encode_game  # noqa: E402
+
+
+def build_room(players, questions, chat):
+    game = Game('1234', 'sid0', 'multiplayer', players, 0, ['all'])
+    game.questions = [
+        {'id': i, 'question': f'Question number {i}?', 'correct_answer': 'right', 'wrong1': 'a', 'wrong2': 'b',
+         'wrong3': 'c', 'category': 'General'}
+        for i in range(questions)
+    ]
+    game.prepared = prepare_questions(game.questions, game.time_per_question)
+    for i in range(players):
+        game.add_player(f'sid{i}', f'Player {i}').score = i * 37
+    game.start_round(3)
+    for i in range(0, players, 2):
+        game.record_answer(f'sid{i}', game.round.correct_index)
+    for i in range(chat):
+        game.chat.append({'sender_name': f'Player {i % players}', 'sender_sid': f'sid{i % players}',
+                          'text': f'message number {i}', 'timestamp': 1700000000.0 + i})
+    return game
+
+
+def time_it(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, nargs='+', default=[2, 8, 50])
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--chat', type=int, default=200, help='chat messages in the room (only the tail is kept)')
+    parser.add_argument('--repeats', type=int, default=2000)
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    questions = {}
+    results = []
+    for players in args.players:
+        game = build_room(players, args.questions, args.chat)
+        questions.update((q['id'], q) for q in game.questions)
+        encode_s, blob = time_it(lambda: encode_game(game), args.repeats)
+        decode_s, _ = time_it(lambda: decode_game(blob, questions.get), args.repeats)
+        results.append({
+            'players': players,
+            'chat_kept': min(args.chat, CHAT_TAIL),
+            'bytes': len(blob),
+            'encode_us': round(encode_s * 1e6, 1),
+            'decode_us': round(decode_s * 1e6, 1),
+        })
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for row in results:
+            print('  '.join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == '__main__':
+    main()
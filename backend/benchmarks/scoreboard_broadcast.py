@@ -0,0 +1,110 @@
+"""Scoreboard traffic per round: full player lists vs coalesced scoreboard deltas.
+
+Run from the repo root:  python backend/benchmarks/scoreboard_broadcast.py [--rounds 1000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_state import Game  # noqa: E402
+from scoreboard import ScoreboardCoalescer  # noqa: E402
+
+
+class RecordingSocketIO:
+    """Stands in for SocketIO and counts what would have gone over the wire."""
+
+    def __init__(self):
+        self.emits = 0
+        self.bytes = 0
+
+    def emit(self, event, payload, room=None):
+        self.emits += 1
+        self.bytes += len(json.dumps([event, payload], separators=(',', ':')))
+
+
+class ImmediateScheduler:
+    # The benchmark flushes at the answer phase itself, so windowed flushes never need to fire
+    def call_later(self, delay, callback, *args, room=None):
+        return None
+
+    def cancel(self, handle):
+        pass
+
+
+def build_room(humans, bots):
+    game = Game('1234', 'sid0', 'multiplayer', 8, bots, ['all'])
+    for i in range(humans):
+        game.add_player(f'sid{i:017d}', f'Player {i + 1}')  # socket.io sids are 20 characters
+    for i in range(bots):
+        game.add_bot(f'bot_{i + 1}_1234', f'Bot {i + 1}')
+    return game
+
+
+def play_round(game, rng, accuracy):
+    for p in game.participants():
+        if rng.random() < accuracy:
+            p.score += rng.randint(10, 100)
+
+
+def measure_legacy(humans, bots, rounds, accuracy, seed):
+    rng = random.Random(seed)
+    game = build_room(humans, bots)
+    socketio = RecordingSocketIO()
+    for _ in range(rounds):
+        play_round(game, rng, accuracy)
+        socketio.emit('scoreboard_update', game.player_list(), room=game.game_id)
+    return socketio
+
+
+def measure_deltas(humans, bots, rounds, accuracy, seed):
+    rng = random.Random(seed)
+    game = build_room(humans, bots)
+    socketio = RecordingSocketIO()
+    coalescer = ScoreboardCoalescer(socketio, ImmediateScheduler())
+    coalescer.reset(game)
+    for _ in range(rounds):
+        play_round(game, rng, accuracy)
+        # Answers and roster changes during a question only mark the room; the answer phase flushes once
+        for _ in game.participants():
+            coalescer.mark(game)
+        coalescer.flush(game)
+    return socketio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=1000)
+    parser.add_argument('--humans', type=int, default=4)
+    parser.add_argument('--bots', type=int, default=4)
+    parser.add_argument('--accuracy', type=float, default=0.6, help='chance each participant scores in a round')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    legacy = measure_legacy(args.humans, args.bots, args.rounds, args.accuracy, args.seed)
+    deltas = measure_deltas(args.humans, args.bots, args.rounds, args.accuracy, args.seed)
+    results = {
+        'rounds': args.rounds,
+        'humans': args.humans,
+        'bots': args.bots,
+        'accuracy': args.accuracy,
+        'legacy_emits_per_round': round(legacy.emits / args.rounds, 3),
+        'delta_emits_per_round': round(deltas.emits / args.rounds, 3),
+        'legacy_bytes_per_round': round(legacy.bytes / args.rounds, 1),
+        'delta_bytes_per_round': round(deltas.bytes / args.rounds, 1),
+    }
+    results['bytes_reduction'] = round(1 - results['delta_bytes_per_round'] / results['legacy_bytes_per_round'], 3)
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for key, value in results.items():
+            print(f"{key:>24}: {value}")
+
+
+if __name__ == '__main__':
+    main()
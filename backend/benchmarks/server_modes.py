@@ -0,0 +1,214 @@
+"""Compares SERVER_MODEs: Socket.IO connections one worker holds and how fast it fans messages out.
+
+Starts `python backend/app.py` once per mode on a throwaway copy of the database,
+opens --connections WebSocket clients, seats them in multiplayer rooms of
+--room-size, has every client send --messages chat messages at once and counts
+the deliveries. Then sends SIGTERM and times the drain. Modes whose packages
+aren't installed are skipped.
+
+Clients speak Engine.IO v4 directly over simple-websocket, which Flask-SocketIO
+already depends on, so each connection costs the benchmark one thread and no
+extra packages.
+
+Run from the repo root:  python backend/benchmarks/server_modes.py [--modes threading eventlet] [--connections 500] [--json]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import simple_websocket
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+MODE_PACKAGES = {'threading': (), 'eventlet': ('eventlet',), 'gevent': ('gevent',)}
+
+
+class RawClient:
+    """One Socket.IO connection: answers pings, counts chat deliveries and queues every other event."""
+
+    def __init__(self, url, timeout):
+        self.ws = simple_websocket.Client.connect(url + '/socket.io/?EIO=4&transport=websocket')
+        if not (self.ws.receive(timeout) or '').startswith('0'):
+            raise ConnectionError('no Engine.IO open packet')
+        self.ws.send('40')
+        if not (self.ws.receive(timeout) or '').startswith('40'):
+            raise ConnectionError('Socket.IO connect refused')
+        self.events = queue.SimpleQueue()
+        self.chat_received = 0
+        self.last_chat = 0.0
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        try:
+            while True:
+                packet = self.ws.receive()
+                if packet is None:
+                    return
+                if packet == '2':
+                    self.ws.send('3')
+                elif packet.startswith('42'):
+                    event, *args = json.loads(packet[2:])
+                    if event == 'new_chat_message':
+                        self.chat_received += 1
+                        self.last_chat = time.perf_counter()
+                    else:
+                        self.events.put((event, args[0] if args else None))
+        except (simple_websocket.ConnectionClosed, OSError):
+            return
+
+    def emit(self, event, data):
+        self.ws.send('42' + json.dumps([event, data]))
+
+    def wait_for(self, event, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            name, data = self.events.get(timeout=max(0.01, deadline - time.monotonic()))
+            if name == event:
+                return data
+
+    def close(self):
+        try:
+            self.ws.close()
+        except (simple_websocket.ConnectionClosed, OSError):
+            pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def start_server(mode, database, port, timeout):
+    env = dict(os.environ, SERVER_MODE=mode, PORT=str(port), HOST='127.0.0.1', FLASK_ENV='production',
+               DATABASE_PATH=database, ROOM_SNAPSHOT_PATH='', LOG_LEVEL='WARNING')
+    server = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, 'app.py')], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'{mode} server exited with {server.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def run_mode(mode, args, database):
+    port = free_port()
+    server = start_server(mode, database, port, args.timeout)
+    url = f'ws://127.0.0.1:{port}'
+    result = {'mode': mode}
+    clients = []
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=64) as pool:
+            attempts = [pool.submit(RawClient, url, args.timeout) for _ in range(args.connections)]
+        failed = 0
+        for attempt in attempts:
+            try:
+                clients.append(attempt.result())
+            except (OSError, ConnectionError, simple_websocket.ConnectionError):
+                failed += 1
+        result['connections_held'] = len(clients)
+        result['connect_failures'] = failed
+        result['connect_s'] = round(time.perf_counter() - started, 2)
+
+        # Seat everyone: the first client of each group hosts, the rest join
+        rooms = [clients[i:i + args.room_size] for i in range(0, len(clients), args.room_size)]
+        for room in rooms:
+            room[0].emit('create_game', {'name': 'Host', 'game_mode': 'multiplayer', 'max_players': args.room_size})
+            room_id = room[0].wait_for('game_created', args.timeout)['game_id']
+            for i, client in enumerate(room[1:], 1):
+                client.emit('join_game', {'game_id': room_id, 'name': f'P{i}'})
+            for client in room[1:]:
+                client.wait_for('game_joined', args.timeout)
+            for client in room:
+                client.room_id = room_id
+        expected = sum(len(room) * len(room) for room in rooms) * args.messages
+
+        started = time.perf_counter()
+        for n in range(args.messages):
+            for client in clients:
+                client.emit('send_chat_message', {'game_id': client.room_id, 'message': f'message {n}'})
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline and sum(c.chat_received for c in clients) < expected:
+            time.sleep(0.05)
+        received = sum(c.chat_received for c in clients)
+        elapsed = max(c.last_chat for c in clients) - started if received else 0
+        result['emits_expected'] = expected
+        result['emits_received'] = received
+        result['emits_per_s'] = round(received / elapsed) if elapsed > 0 else None
+        result['server_rss_mb'] = rss_mb(server.pid)
+    finally:
+        for client in clients:
+            client.close()
+        started = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+        result['shutdown_s'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['threading', 'eventlet', 'gevent'], choices=sorted(MODE_PACKAGES))
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--room-size', type=int, default=8, help='clients per room; each message reaches the whole room')
+    parser.add_argument('--messages', type=int, default=5, help='chat messages per client (at most the chat burst size)')
+    parser.add_argument('--timeout', type=float, default=60, help='seconds to wait at each step')
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='quiz-server-modes-')
+    results = []
+    try:
+        database = os.path.join(workdir, 'quiz_questions.db')
+        shutil.copy(os.path.join(REPO_DIR, 'quiz_questions.db'), database)
+        for mode in args.modes:
+            missing = [p for p in MODE_PACKAGES[mode] if importlib.util.find_spec(p) is None]
+            if missing:
+                results.append({'mode': mode, 'skipped': f"not installed: {', '.join(missing)}"})
+                continue
+            results.append(run_mode(mode, args, database))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for row in results:
+            print('  '.join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Per-question cost of a big room: multiplayer scoreboard deltas vs stadium standings, by audience size.
+
+Bytes are what goes over the wire to the whole room (payload size times recipients);
+server time is building the scoreboard payload for one question.
+
+Run from the repo root:  python backend/benchmarks/stadium.py [--audience 100 1000 5000 20000] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_state import Game  # noqa: E402
+from scoreboard import ScoreboardCoalescer  # noqa: E402
+from stadium import StadiumBroadcaster  # noqa: E402
+from scoreboard_broadcast import ImmediateScheduler, RecordingSocketIO  # noqa: E402
+
+
+def build_room(mode, audience):
+    game = Game('1234', 'sid0', mode, audience, 0, ['all'])
+    for i in range(audience):
+        game.add_player(f'sid{i:017d}', f'Player {i + 1}')  # socket.io sids are 20 characters
+    return game
+
+
+def play_question(game, rng, accuracy):
+    for p in list(game.participants()):
+        if rng.random() < accuracy:
+            game.add_points(p, rng.randint(10, 100))
+
+
+def measure(mode, audience, questions, accuracy, seed):
+    rng = random.Random(seed)
+    game = build_room(mode, audience)
+    socketio = RecordingSocketIO()
+    if mode == 'stadium':
+        broadcaster = StadiumBroadcaster(socketio, ImmediateScheduler())
+        send = lambda: socketio.emit('show_answer_period_start', {'standings': broadcaster.standings(game)})  # noqa: E731
+    else:
+        coalescer = ScoreboardCoalescer(socketio, ImmediateScheduler())
+        coalescer.reset(game)
+        send = lambda: coalescer.flush(game)  # noqa: E731
+    seconds = 0.0
+    for _ in range(questions):
+        play_question(game, rng, accuracy)
+        started = time.perf_counter()
+        send()
+        seconds += time.perf_counter() - started
+    return {
+        'mode': mode,
+        'audience': audience,
+        'payload_bytes': round(socketio.bytes / questions),
+        'room_bytes': round(socketio.bytes / questions * audience),
+        'build_ms': round(seconds / questions * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--audience', type=int, nargs='+', default=[100, 1000, 5000, 20000])
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--accuracy', type=float, default=0.6, help='chance each player scores on a question')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print machine-readable output')
+    args = parser.parse_args()
+
+    results = []
+    for audience in args.audience:
+        for mode in ('multiplayer', 'stadium'):
+            results.append(measure(mode, audience, args.questions, args.accuracy, args.seed))
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for row in results:
+            print('  '.join(f"{key}={value}" for key, value in row.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import math
+import random
+
+from game_state import FIFTY_FIFTY, NINETIETH_MINUTE, FEELIN_GOOD
+from question_stats import PRIOR_CORRECT_RATE, PRIOR_TIME_FRACTION
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path makes the same decisions, just per bot
+    np = None
+
+FIFTY_FIFTY_CHANCE = 0.20
+NINETIETH_MINUTE_CHANCE = 0.15
+NINETIETH_MINUTE_LATE_CHANCE = 0.30  # once the last quarter of the game (or last 2 questions) is reached
+FEELIN_GOOD_CHANCE = 0.10
+VECTORIZE_MIN_BOTS = 32  # below this the NumPy call overhead costs more than the per-bot loop
+
+
+def _logit(p):
+    p = min(max(p, 0.01), 0.99)
+    return math.log(p / (1 - p))
+
+
+class BotSkill:
+    """A named bot tier: how often it's right on an average question and how fast it answers.
+
+    Accuracy is shifted on the log-odds scale by how much easier or harder
+    humans find a question than average, so an easy bot still gets trivia
+    everyone knows and a hard bot still misses the odd stinker.
+    """
+
+    __slots__ = ('name', 'accuracy', 'speed', '_offset')
+
+    def __init__(self, name, accuracy, speed):
+        self.name = name
+        self.accuracy = accuracy
+        self.speed = speed  # (low, high) share of the time limit, before the question's own pace
+        self._offset = _logit(accuracy) - _logit(PRIOR_CORRECT_RATE)
+
+    def accuracy_for(self, correct_rate):
+        return 1 / (1 + math.exp(-(_logit(correct_rate) + self._offset)))
+
+
+SKILL_TIERS = {
+    'easy': BotSkill('easy', 0.45, (0.45, 0.85)),
+    'medium': BotSkill('medium', 0.70, (0.2, 0.6)),
+    'hard': BotSkill('hard', 0.85, (0.1, 0.45)),
+}
+DEFAULT_SKILL = 'medium'
+
+
+class BotAction:
+    """One bot's answer to one question, decided up front and submitted `delay` seconds in."""
+
+    __slots__ = ('delay', 'bot_id', 'answer', 'lifelines', 'points')
+
+    def __init__(self, delay, bot_id, answer, lifelines, points):
+        self.delay = delay
+        self.bot_id = bot_id
+        self.answer = answer  # index into the answers as shown for the question
+        self.lifelines = lifelines  # LIFELINE_FLAGS bits the bot uses on this question
+        self.points = points
+
+
+class _QuestionPlan:
+    # Everything about the current question and tier that is the same for every bot in the room
+    __slots__ = ('correct_index', 'wrong_indexes', 'lifelines_allowed', 'ninetieth_chance', 'accuracy', 'speed', 'time_limit')
+
+
+class BotEngine:
+    """Decides every bot's answer, lifelines and response time for a question in one pass.
+
+    With NumPy available, all draws for a room come from one array call and
+    the rules are applied as vector operations, so a room with hundreds of
+    bots costs little more than one with a handful. Small rooms use the
+    plain loop, which is faster at that size. The returned plan is sorted
+    by delay so the caller can submit it with a single timer.
+    """
+
+    def __init__(self, seed=None, question_stats=None, use_numpy=True, vectorize_min_bots=VECTORIZE_MIN_BOTS):
+        self.question_stats = question_stats  # QuestionStats, or None to treat every question as average
+        self.vectorized = use_numpy and np is not None
+        self.vectorize_min_bots = vectorize_min_bots
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed) if self.vectorized else None
+        self.planned = 0
+        self.vectorized_plans = 0
+
+    @staticmethod
+    def _ninetieth_minute_chance(game, q_index):
+        questions_remaining = len(game.questions) - q_index
+        if questions_remaining <= max(2, len(game.questions) * 0.25):
+            return NINETIETH_MINUTE_LATE_CHANCE
+        return NINETIETH_MINUTE_CHANCE
+
+    def plan(self, game, q_index):
+        """Returns a list of BotAction for every bot in the game, soonest first."""
+        bots = list(game.bots.values())
+        if not bots:
+            return []
+        question = game.prepared[q_index]
+        skill = SKILL_TIERS.get(game.bot_level, SKILL_TIERS[DEFAULT_SKILL])
+        correct_rate, time_fraction = PRIOR_CORRECT_RATE, PRIOR_TIME_FRACTION
+        if self.question_stats is not None:
+            correct_rate = self.question_stats.correct_rate(question.question_id)
+            time_fraction = self.question_stats.time_fraction(question.question_id)
+
+        q = _QuestionPlan()
+        q.correct_index = question.correct_index
+        q.wrong_indexes = question.wrong_indexes
+        q.lifelines_allowed = game.game_mode in ('head_to_head', 'multiplayer')
+        q.ninetieth_chance = self._ninetieth_minute_chance(game, q_index)
+        q.accuracy = skill.accuracy_for(correct_rate)
+        # Slow questions for humans are slow for bots too, within reason
+        pace = min(1.5, max(0.5, time_fraction / PRIOR_TIME_FRACTION))
+        q.speed = (skill.speed[0] * pace, skill.speed[1] * pace)
+        q.time_limit = game.time_per_question
+
+        if self.vectorized and len(bots) >= self.vectorize_min_bots:
+            self.vectorized_plans += 1
+            actions = self._plan_vectorized(bots, q)
+        else:
+            actions = self._plan_each(bots, q)
+        self.planned += len(actions)
+        return actions
+
+    @staticmethod
+    def _delay_bounds(time_limit):
+        # At least a second to "read", and always in before the question closes
+        return 1, max(1, time_limit * 0.9)
+
+    def _plan_vectorized(self, bots, q):
+        n = len(bots)
+        used = np.fromiter((b.lifelines_used for b in bots), dtype=np.uint8, count=n)
+        armed = np.fromiter((b.feelin_good_active for b in bots), dtype=bool, count=n)
+        rng = self._np_rng
+        draws = rng.random((n, 4))
+
+        # A bot with Feelin' Good already armed doesn't reach for another lifeline
+        can_use = ~armed if q.lifelines_allowed else np.zeros(n, dtype=bool)
+        fifty = can_use & ((used & FIFTY_FIFTY) == 0) & (draws[:, 0] < FIFTY_FIFTY_CHANCE)
+        ninetieth = can_use & ((used & NINETIETH_MINUTE) == 0) & (draws[:, 1] < q.ninetieth_chance)
+        feelin_good = can_use & ((used & FEELIN_GOOD) == 0) & (draws[:, 2] < FEELIN_GOOD_CHANCE)
+
+        # 90th Minute always gives the right answer and takes priority over 50:50,
+        # which leaves a coin flip between two answers when the bot doesn't know it
+        accuracy = np.where(ninetieth, 1.0, np.where(fifty, q.accuracy + (1 - q.accuracy) / 2, q.accuracy))
+        correct = draws[:, 3] < accuracy
+        wrong = rng.integers(0, len(q.wrong_indexes), n)
+        low, high = self._delay_bounds(q.time_limit)
+        delays = np.clip(rng.uniform(q.speed[0], q.speed[1], n) * q.time_limit, low, high)
+        points = np.maximum(10, (100 - delays / q.time_limit * 90).astype(np.int64))  # same formula as human answers
+        lifelines = fifty * FIFTY_FIFTY | ninetieth * NINETIETH_MINUTE | feelin_good * FEELIN_GOOD
+
+        order = np.argsort(delays, kind='stable')
+        rows = zip(order.tolist(), delays[order].tolist(), correct[order].tolist(), wrong[order].tolist(),
+                   lifelines[order].tolist(), points[order].tolist())
+        return [BotAction(delay, bots[i].sid, q.correct_index if is_correct else q.wrong_indexes[w], flags, pts)
+                for i, delay, is_correct, w, flags, pts in rows]
+
+    def _plan_each(self, bots, q):
+        rng = self._rng
+        low, high = self._delay_bounds(q.time_limit)
+        actions = []
+        for bot in bots:
+            flags = 0
+            if q.lifelines_allowed and not bot.feelin_good_active:
+                if not bot.has_used(FIFTY_FIFTY) and rng.random() < FIFTY_FIFTY_CHANCE:
+                    flags |= FIFTY_FIFTY
+                if not bot.has_used(NINETIETH_MINUTE) and rng.random() < q.ninetieth_chance:
+                    flags |= NINETIETH_MINUTE
+                if not bot.has_used(FEELIN_GOOD) and rng.random() < FEELIN_GOOD_CHANCE:
+                    flags |= FEELIN_GOOD
+            if flags & NINETIETH_MINUTE:
+                accuracy = 1.0
+            elif flags & FIFTY_FIFTY:
+                accuracy = q.accuracy + (1 - q.accuracy) / 2
+            else:
+                accuracy = q.accuracy
+            answer = q.correct_index if rng.random() < accuracy else rng.choice(q.wrong_indexes)
+            delay = min(high, max(low, rng.uniform(*q.speed) * q.time_limit))
+            points = max(10, int(100 - delay / q.time_limit * 90))
+            actions.append(BotAction(delay, bot.sid, answer, flags, points))
+        actions.sort(key=lambda action: action.delay)
+        return actions
+
+    def stats(self):
+        return {'vectorized': self.vectorized, 'planned': self.planned, 'vectorized_plans': self.vectorized_plans}
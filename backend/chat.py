@@ -0,0 +1,75 @@
+import itertools
+import time
+from collections import deque
+
+CHAT_HISTORY_SIZE = 100  # messages a room keeps; older ones drop off the ring
+CHAT_PAGE_SIZE = 20  # messages per history page, including the one sent on join
+
+
+class ChatLog:
+    """A room's chat as a fixed-size ring buffer of the newest messages.
+
+    Every message gets a room-local id that only ever increases, so clients
+    can page back through what's still kept with `before=<oldest id seen>`.
+    """
+
+    __slots__ = ('_messages', '_next_id')
+
+    def __init__(self, maxlen=CHAT_HISTORY_SIZE, messages=()):
+        self._messages = deque(messages, maxlen=maxlen)
+        self._next_id = self._messages[-1]['id'] + 1 if self._messages else 0
+
+    def append(self, message):
+        """Stamps the message with its id and stores it, evicting the oldest if the ring is full."""
+        message['id'] = self._next_id
+        self._next_id += 1
+        self._messages.append(message)
+        return message
+
+    def page(self, before=None, limit=CHAT_PAGE_SIZE):
+        """Up to `limit` messages older than id `before` (newest if None), oldest first.
+
+        Returns (messages, has_more), has_more meaning older messages are still kept.
+        """
+        count = len(self._messages)
+        if not count:
+            return [], False
+        first_id = self._messages[0]['id']
+        end = count if before is None else max(0, min(count, before - first_id))
+        start = max(0, end - limit)
+        return list(itertools.islice(self._messages, start, end)), start > 0
+
+    def tail(self, n):
+        return list(itertools.islice(self._messages, max(0, len(self._messages) - n), None))
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return iter(self._messages)
+
+
+class TokenBucket:
+    """Allows bursts of up to `capacity` actions, refilled at `rate` per second."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Spends a token if one is available. Returns False when the caller should be throttled."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self):
+        """Seconds until the next token is available."""
+        return max(0.0, (1 - self.tokens) / self.rate)
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection frees up within the pool timeout."""
+
+
+# Applied once per physical connection, not per checkout
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',  # readers don't block the occasional writer
+    'PRAGMA synchronous=NORMAL',  # safe with WAL, far fewer fsyncs than FULL
+    'PRAGMA cache_size=-8000',  # ~8 MB page cache per connection
+    'PRAGMA mmap_size=67108864',  # map up to 64 MB of the DB file
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+)
+
+
+class PooledConnection:
+    """Thin wrapper around a sqlite3 connection; close() hands it back to the pool."""
+
+    __slots__ = ('_pool', '_conn')
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def execute(self, sql, parameters=()):
+        observe = self._pool.query_observer
+        if observe is None:
+            return self._conn.execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return self._conn.execute(sql, parameters)
+        finally:
+            observe(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        observe = self._pool.query_observer
+        if observe is None:
+            return self._conn.executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return self._conn.executemany(sql, seq_of_parameters)
+        finally:
+            observe(time.perf_counter() - started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by requests and green threads."""
+
+    def __init__(self, database_path, max_size=5, timeout=5.0, cached_statements=256):
+        self.database_path = database_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements  # per-connection prepared statement cache
+        self._idle = deque()
+        self._created = 0
+        self._cond = threading.Condition()
+        self.query_observer = None  # optional callable(seconds), called after every execute/executemany
+        # Counters for sizing the pool under load
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _open(self):
+        conn = sqlite3.connect(self.database_path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """Checks out a connection, opening a new one only if the pool isn't full yet."""
+        with self._cond:
+            if not self._idle and self._created >= self.max_size:
+                self.waits += 1
+                started = time.monotonic()
+                deadline = started + self.timeout
+                while not self._idle and self._created >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No database connection available after {self.timeout}s")
+                    self._cond.wait(remaining)
+                waited = time.monotonic() - started
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+            if self._idle:
+                self.hits += 1
+                return PooledConnection(self, self._idle.pop())
+            self._created += 1
+            self.misses += 1
+
+        # Open the new connection outside the lock so other checkouts aren't held up
+        try:
+            return PooledConnection(self, self._open())
+        except sqlite3.Error:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()  # never hand out a connection with a half-finished transaction
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._created -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'open': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_time_total': round(self.wait_time_total, 6),
+                'wait_time_max': round(self.wait_time_max, 6),
+            }
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class FlushWorker:
+    """Runs buffered stores' flushes on a background worker instead of the game scheduler.
+
+    request() asks for a store's flush to run `delay` seconds from now; a
+    name that is already waiting keeps its time, so each store has at most
+    one flush queued and a burst of changes is written together. The worker
+    sleeps until the earliest one is due, so a slow or locked database holds
+    up only other flushes, never a room's question and answer deadlines.
+    """
+
+    def __init__(self, socketio=None):
+        self.socketio = socketio  # used to start the worker the same way as the game scheduler
+        self._due = {}  # name -> (monotonic time it's due, flush)
+        self._cond = threading.Condition()
+        self._started = False
+        self._stopped = False
+        self.runs = 0
+        self.errors = 0
+
+    def start(self):
+        """Starts the background worker; the first request() does this too."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        if self.socketio is not None:
+            self.socketio.start_background_task(self._run)
+        else:
+            threading.Thread(target=self._run, name='flush-worker', daemon=True).start()
+
+    def request(self, name, flush, delay):
+        """Queues flush() to run in `delay` seconds, unless `name` is already queued."""
+        with self._cond:
+            if name in self._due or self._stopped:
+                return
+            self._due[name] = (time.monotonic() + delay, flush)
+            self._cond.notify_all()
+        if not self._started:
+            self.start()
+
+    def _take_due(self):
+        # Caller holds the condition. Waits until something is due; returns [] once stopped.
+        while not self._stopped:
+            now = time.monotonic()
+            due = [name for name, (when, _) in self._due.items() if when <= now]
+            if due:
+                return [(name, self._due.pop(name)[1]) for name in due]
+            self._cond.wait(min(when for when, _ in self._due.values()) - now if self._due else None)
+        return []
+
+    def _run(self):
+        while True:
+            with self._cond:
+                due = self._take_due()
+            if not due:
+                return
+            for name, flush in due:
+                try:
+                    flush()
+                except Exception:
+                    logger.exception("Background flush of %s failed.", name)
+                    with self._cond:
+                        self.errors += 1
+                with self._cond:
+                    self.runs += 1
+
+    def close(self):
+        """Stops the worker. Stores flush whatever is left themselves at exit."""
+        with self._cond:
+            self._stopped = True
+            self._due.clear()
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {'queued': sorted(self._due), 'runs': self.runs, 'errors': self.errors}
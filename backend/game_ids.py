@@ -0,0 +1,117 @@
+import math
+import random
+import threading
+from collections import deque
+
+
+class GameIdAllocator:
+    """Hands out game IDs that never collide with a live room, and recycles them.
+
+    IDs are `digits` long (no leading zero) with an optional shard prefix,
+    e.g. shard 3 with 4 digits gives IDs like "34821". Fresh IDs come from a
+    fixed stride walk over the whole range, so they look random but every
+    number is visited exactly once. A bitmap tracks which IDs are live, and
+    released IDs go to a FIFO free list that is only used once the fresh
+    range runs out.
+    """
+
+    def __init__(self, digits=4, shard=0, shard_digits=0):
+        self.digits = digits
+        self.shard_digits = shard_digits
+        self.shard = shard
+        self._prefix = f"{shard:0{shard_digits}d}" if shard_digits else ''
+        self._low = 10 ** (digits - 1)
+        self.capacity = 9 * self._low
+        self._bitmap = bytearray((self.capacity + 7) // 8)
+        self._free = deque()
+        self._fresh = 0  # how far the stride walk has got
+        self._start = random.randrange(self.capacity)
+        self._stride = self._pick_stride()
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.recycled = 0
+
+    def _pick_stride(self):
+        # Any stride coprime with the capacity visits every offset once before repeating
+        while True:
+            stride = random.randrange(self.capacity // 3, self.capacity) | 1
+            if math.gcd(stride, self.capacity) == 1:
+                return stride
+
+    def _is_set(self, offset):
+        return self._bitmap[offset >> 3] & (1 << (offset & 7))
+
+    def allocate(self):
+        """Returns a new game ID as a string. Raises RuntimeError if every ID is in use."""
+        with self._lock:
+            while True:
+                if self._fresh < self.capacity:
+                    offset = (self._start + self._fresh * self._stride) % self.capacity
+                    self._fresh += 1
+                elif self._free:
+                    offset = self._free.popleft()
+                    self.recycled += 1
+                else:
+                    raise RuntimeError(f"All {self.capacity} game IDs are in use.")
+                if not self._is_set(offset):
+                    break  # otherwise it was claimed out of turn; keep walking
+            self._bitmap[offset >> 3] |= 1 << (offset & 7)
+            self._in_use += 1
+            self.allocations += 1
+        return f"{self._prefix}{self._low + offset}"
+
+    def _offset_of(self, game_id):
+        if not isinstance(game_id, str) or len(game_id) != self.shard_digits + self.digits or not game_id.isdigit():
+            return None
+        if game_id[:self.shard_digits] != self._prefix:
+            return None
+        return int(game_id[self.shard_digits:]) - self._low
+
+    def claim(self, game_id):
+        """Marks a specific ID as live, e.g. for a room restored after a restart.
+
+        Returns False if the ID is malformed, belongs to another shard or is already in use.
+        """
+        offset = self._offset_of(game_id)
+        if offset is None or not 0 <= offset < self.capacity:
+            return False
+        with self._lock:
+            if self._is_set(offset):
+                return False
+            self._bitmap[offset >> 3] |= 1 << (offset & 7)
+            self._in_use += 1
+        return True
+
+    def release(self, game_id):
+        """Returns an ID to the pool once its room is gone. Unknown or foreign IDs are ignored."""
+        offset = self._offset_of(game_id)
+        if offset is None:
+            return
+        with self._lock:
+            if not self._is_set(offset):
+                return
+            self._bitmap[offset >> 3] &= ~(1 << (offset & 7)) & 0xFF
+            self._in_use -= 1
+            self._free.append(offset)
+
+    def shard_of(self, game_id):
+        """Worker shard encoded in an ID, or None if the ID isn't sharded or is malformed."""
+        if not self.shard_digits or not isinstance(game_id, str) or not game_id[:self.shard_digits].isdigit():
+            return None
+        if len(game_id) != self.shard_digits + self.digits:
+            return None
+        return int(game_id[:self.shard_digits])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'capacity': self.capacity,
+                'in_use': self._in_use,
+                'occupancy': round(self._in_use / self.capacity, 4),
+                'fresh_remaining': self.capacity - self._fresh,
+                'free_list': len(self._free),
+                'allocations': self.allocations,
+                'recycled': self.recycled,
+                'shard': self.shard if self.shard_digits else None,
+            }
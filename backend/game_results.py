@@ -0,0 +1,262 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# player_stats delta layout: games_played, total_score, questions_answered, correct_answers, best_score, total_time
+_PLAYER_FIELDS = 6
+# head_to_head_stats delta layout: games_played, games_won, games_lost, games_tied, total_score, highest_score
+_H2H_FIELDS = 6
+
+
+class GameResultsWriter:
+    """Write-behind queue for player_stats, head_to_head_stats and head_to_head_records.
+
+    Answers and finished games are merged into per-player deltas in memory
+    (O(1), no SQLite on the game loop) and a background worker writes them
+    in one transaction every `flush_interval` seconds, or sooner once
+    `batch_size` items are waiting. Memory is bounded by `max_pending`:
+    a result for a player who already has a delta queued is merged into it,
+    and one that would need a new entry while the queue is full is dropped
+    (and counted) and the worker woken, so a submit never waits on the
+    database. close() writes whatever is left, so results survive a clean
+    shutdown.
+    """
+
+    def __init__(self, db_pool, socketio=None, max_pending=5000, batch_size=200, flush_interval=2.0):
+        self.db_pool = db_pool
+        self.socketio = socketio  # used to start the worker the same way as the game scheduler
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._players = {}  # player_name -> player_stats delta
+        self._h2h = {}  # player_name -> head_to_head_stats delta
+        self._records = []  # head_to_head_records rows
+        self._cond = threading.Condition()
+        self._flushing = threading.Lock()  # one writer at a time, so deltas are applied in order
+        self._started = False
+        self._stopped = False
+        self.accepted = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def load(self):
+        """Creates the result tables if this database doesn't have them yet."""
+        with self.db_pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS player_stats (
+                    player_name TEXT PRIMARY KEY,
+                    games_played INTEGER DEFAULT 0,
+                    total_score INTEGER DEFAULT 0,
+                    questions_answered INTEGER DEFAULT 0,
+                    correct_answers INTEGER DEFAULT 0,
+                    best_score INTEGER DEFAULT 0,
+                    total_time INTEGER DEFAULT 0
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS head_to_head_stats (
+                    player_name TEXT PRIMARY KEY,
+                    games_played INTEGER DEFAULT 0,
+                    games_won INTEGER DEFAULT 0,
+                    games_lost INTEGER DEFAULT 0,
+                    games_tied INTEGER DEFAULT 0,
+                    total_score INTEGER DEFAULT 0,
+                    highest_score INTEGER DEFAULT 0
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS head_to_head_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    player1_name TEXT NOT NULL,
+                    player2_name TEXT NOT NULL,
+                    winner_name TEXT,
+                    date TEXT NOT NULL,
+                    player1_score INTEGER,
+                    player2_score INTEGER
+                )""")
+            conn.commit()
+
+    def start(self):
+        """Starts the background worker; submitting the first result does this too."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        if self.socketio is not None:
+            self.socketio.start_background_task(self._run)
+        else:
+            threading.Thread(target=self._run, name='game-results-writer', daemon=True).start()
+
+    def _pending(self):
+        # Caller holds the condition
+        return len(self._players) + len(self._h2h) + len(self._records)
+
+    def _admit(self, new_items):
+        # Caller holds the condition. Never waits: called from the game loop, so a full queue means drop.
+        if self._pending() + new_items <= self.max_pending:
+            return True
+        self.dropped += 1
+        self._cond.notify_all()  # wake the worker now rather than at the next interval
+        return False
+
+    def _submitted(self):
+        # Caller holds the condition
+        self.accepted += 1
+        if self._pending() >= self.batch_size:
+            self._cond.notify_all()
+
+    @staticmethod
+    def _merge(table, key, values, size, max_index):
+        entry = table.get(key)
+        if entry is None:
+            table[key] = entry = [0] * size
+        for i, value in enumerate(values):
+            if i == max_index:
+                entry[i] = max(entry[i], value)
+            else:
+                entry[i] += value
+
+    def record_answer(self, player_name, correct, time_taken):
+        """Counts one human answer towards the player's stats. Returns False if it had to be dropped."""
+        with self._cond:
+            if player_name not in self._players and not self._admit(1):
+                return False
+            self._merge(self._players, player_name, (0, 0, 1, 1 if correct else 0, 0, time_taken), _PLAYER_FIELDS, 4)
+            self._submitted()
+        if not self._started:
+            self.start()
+        return True
+
+    def record_game(self, game_mode, players, opponents=()):
+        """Queues a finished game.
+
+        players are the (name, score) pairs of the humans whose stats are kept;
+        opponents are everyone else in the room (bots), used to decide
+        head-to-head results. Returns False if the game had to be dropped.
+        """
+        if not players:
+            return True
+        h2h_pair = None
+        if game_mode == 'head_to_head':
+            everyone = list(players) + list(opponents)
+            if len(everyone) == 2:
+                h2h_pair = everyone
+        with self._cond:
+            new_items = sum(1 for name, _ in players if name not in self._players)
+            if h2h_pair:
+                new_items += 1 + sum(1 for name, _ in players if name not in self._h2h)
+            if not self._admit(new_items):
+                return False
+            for name, score in players:
+                self._merge(self._players, name, (1, score, 0, 0, score, 0), _PLAYER_FIELDS, 4)
+            if h2h_pair:
+                (name1, score1), (name2, score2) = h2h_pair
+                winner = name1 if score1 > score2 else name2 if score2 > score1 else None
+                self._records.append((name1, name2, winner, datetime.now().isoformat(), score1, score2))
+                for name, score in players:
+                    won, lost = winner == name, winner is not None and winner != name
+                    self._merge(self._h2h, name, (1, int(won), int(lost), int(winner is None), score, score),
+                                _H2H_FIELDS, 5)
+            self._submitted()
+        if not self._started:
+            self.start()
+        return True
+
+    def head_to_head_record(self, player_name):
+        """(games_played, games_won, games_lost) for a player, counting results not written yet."""
+        with self.db_pool.connection() as conn:
+            row = conn.execute('SELECT games_played, games_won, games_lost FROM head_to_head_stats WHERE player_name = ?',
+                               (player_name,)).fetchone()
+        record = list(row) if row else [0, 0, 0]
+        with self._cond:
+            pending = self._h2h.get(player_name)
+            if pending:
+                for i in range(3):
+                    record[i] += pending[i]
+        return tuple(record)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopped and self._pending() < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Writes everything queued in one transaction. Kept for the next try if the write fails."""
+        with self._flushing:
+            with self._cond:
+                players, self._players = self._players, {}
+                h2h, self._h2h = self._h2h, {}
+                records, self._records = self._records, []
+            count = len(players) + len(h2h) + len(records)
+            if not count:
+                return 0
+            try:
+                with self.db_pool.connection() as conn:
+                    conn.executemany("""
+                        INSERT INTO player_stats (player_name, games_played, total_score, questions_answered,
+                                                  correct_answers, best_score, total_time)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(player_name) DO UPDATE SET
+                            games_played = games_played + excluded.games_played,
+                            total_score = total_score + excluded.total_score,
+                            questions_answered = questions_answered + excluded.questions_answered,
+                            correct_answers = correct_answers + excluded.correct_answers,
+                            best_score = MAX(best_score, excluded.best_score),
+                            total_time = total_time + excluded.total_time""",
+                        [(name, *values[:5], round(values[5])) for name, values in players.items()])
+                    conn.executemany("""
+                        INSERT INTO head_to_head_stats (player_name, games_played, games_won, games_lost,
+                                                        games_tied, total_score, highest_score)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(player_name) DO UPDATE SET
+                            games_played = games_played + excluded.games_played,
+                            games_won = games_won + excluded.games_won,
+                            games_lost = games_lost + excluded.games_lost,
+                            games_tied = games_tied + excluded.games_tied,
+                            total_score = total_score + excluded.total_score,
+                            highest_score = MAX(highest_score, excluded.highest_score)""",
+                        [(name, *values) for name, values in h2h.items()])
+                    conn.executemany(
+                        'INSERT INTO head_to_head_records (player1_name, player2_name, winner_name, date, '
+                        'player1_score, player2_score) VALUES (?, ?, ?, ?, ?, ?)', records)
+                    conn.commit()
+            except sqlite3.Error as e:
+                with self._cond:
+                    for name, values in players.items():
+                        self._merge(self._players, name, values, _PLAYER_FIELDS, 4)
+                    for name, values in h2h.items():
+                        self._merge(self._h2h, name, values, _H2H_FIELDS, 5)
+                    self._records[:0] = records
+                    self.flush_errors += 1
+                logger.error("Game results flush of %d rows failed: %s", count, e)
+                return 0
+            with self._cond:
+                self.flushed += count
+                self.flushes += 1
+            return count
+
+    def close(self):
+        """Stops the worker and writes whatever is still queued."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        return self.flush()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pending': self._pending(),
+                'max_pending': self.max_pending,
+                'accepted': self.accepted,
+                'dropped': self.dropped,
+                'flushed': self.flushed,
+                'flushes': self.flushes,
+                'flush_errors': self.flush_errors,
+            }
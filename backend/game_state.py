@@ -0,0 +1,484 @@
+import bisect
+import secrets
+import time
+from array import array
+
+from chat import ChatLog
+
+# Lifelines are tracked as bits on each participant instead of nested dicts
+FIFTY_FIFTY = 1
+NINETIETH_MINUTE = 2
+FEELIN_GOOD = 4
+LIFELINE_FLAGS = {
+    'fifty_fifty': FIFTY_FIFTY,
+    'ninetieth_minute': NINETIETH_MINUTE,
+    'feelin_good': FEELIN_GOOD,
+}
+NO_ANSWER = -1  # recorded answer index for a timeout or an answer that isn't one of the options
+
+
+class Participant:
+    """A human player or a bot seated in a game."""
+
+    __slots__ = ('sid', 'name', 'score', 'is_bot', 'lifelines_used', 'feelin_good_active', 'connected', 'seat_token',
+                 'seat')
+
+    def __init__(self, sid, name, is_bot=False):
+        self.sid = sid
+        self.name = name
+        self.score = 0
+        self.is_bot = is_bot
+        self.lifelines_used = 0  # bitmask of LIFELINE_FLAGS
+        self.feelin_good_active = False  # Feelin' Good armed for the next answer
+        self.connected = True  # False while a human's seat is held for them to reconnect
+        self.seat_token = None if is_bot else secrets.token_urlsafe(12)  # proves seat ownership on rejoin
+        self.seat = None  # index into a stadium room's SeatScores
+
+    def has_used(self, flag):
+        return bool(self.lifelines_used & flag)
+
+    def use(self, flag):
+        self.lifelines_used |= flag
+
+    def consume_feelin_good(self):
+        """Returns True if Feelin' Good was armed, and disarms it."""
+        was_active = self.feelin_good_active
+        self.feelin_good_active = False
+        return was_active
+
+    def to_dict(self):
+        return {'name': self.name, 'score': self.score, 'sid': self.sid, 'is_bot': self.is_bot}
+
+
+class Round:
+    """State for the question currently on screen. Replaced, not kept, when the next one starts."""
+
+    __slots__ = ('index', 'start_time', 'correct_answer', 'correct_index', 'answers', 'counts', 'pending', 'proceeded')
+
+    def __init__(self, index, correct_answer, correct_index, pending, options=4):
+        self.index = index
+        self.start_time = time.time()
+        self.correct_answer = correct_answer
+        self.correct_index = correct_index  # position of the correct answer in the order clients were shown
+        self.answers = {}  # sid -> submitted answer index, or NO_ANSWER
+        self.counts = [0] * options  # answers per option, in the order clients were shown
+        self.pending = pending  # sids still expected to answer; empty means everyone is in
+        self.proceeded = False  # answer phase already started for this question
+
+    def is_open(self):
+        return not self.proceeded
+
+    def answered(self, participant):
+        return participant.sid in self.answers
+
+    def waiting_on(self, participant):
+        return participant.sid in self.pending
+
+    def remaining(self):
+        return len(self.pending)
+
+    def responded(self):
+        """How many answers are in, timeouts included."""
+        return len(self.answers)
+
+    def expect(self, participant):
+        """Waits on a participant who joined while the question is open."""
+        self.pending.add(participant.sid)
+
+    def release(self, participant):
+        """Stops waiting on a participant who dropped or left."""
+        self.pending.discard(participant.sid)
+
+    def record(self, participant, answer):
+        self.answers[participant.sid] = answer
+        if answer != NO_ANSWER:
+            self.counts[answer] += 1
+        self.pending.discard(participant.sid)
+
+    def vacate(self, participant):
+        pass  # answers are kept by sid, and a sid is never handed out twice
+
+    def rejoined(self, participant, old_sid):
+        """Follows a reseated player to their new sid."""
+        if old_sid in self.answers:
+            self.answers[participant.sid] = self.answers.pop(old_sid)
+        elif self.is_open():
+            self.pending.add(participant.sid)
+        self.pending.discard(old_sid)
+
+    def answers_by_sid(self):
+        return dict(self.answers)
+
+    def pending_sids(self):
+        return list(self.pending)
+
+    def restore(self, answers, pending):
+        self.answers = answers
+        self.pending = set(pending)
+        self.recount()
+
+    def recount(self):
+        """Rebuilds the per-option counts from the answers, e.g. after a restore."""
+        self.counts = [0] * len(self.counts)
+        for answer in self.answers.values():
+            if answer != NO_ANSWER:
+                self.counts[answer] += 1
+
+    def all_answered(self):
+        return not self.proceeded and not self.pending
+
+
+class SeatScores:
+    """Scores of a stadium room by seat, bucketed by score as they change.
+
+    Every participant gets a seat number. Scores live in one array indexed
+    by seat, and each seat sits in the bucket for its score, with the
+    distinct scores kept sorted. The top N and the score histogram are read
+    from the buckets, so neither walks the audience, and neither does a
+    score change.
+    """
+
+    def __init__(self):
+        self.scores = array('q')
+        self.occupants = []  # seat -> Participant, or None while the seat is free
+        self.connected = 0  # connected humans, i.e. who a question waits on
+        self.bots = 0
+        self._free = []
+        self._buckets = {}  # score -> set of seats
+        self._levels = []  # distinct scores held, ascending
+
+    def __len__(self):
+        return len(self.occupants) - len(self._free)
+
+    def _enter(self, seat, score):
+        bucket = self._buckets.get(score)
+        if bucket is None:
+            bucket = self._buckets[score] = set()
+            bisect.insort(self._levels, score)
+        bucket.add(seat)
+
+    def _leave(self, seat, score):
+        bucket = self._buckets[score]
+        bucket.discard(seat)
+        if not bucket:
+            del self._buckets[score]
+            del self._levels[bisect.bisect_left(self._levels, score)]
+
+    def seat(self, participant):
+        if self._free:
+            seat = self._free.pop()
+            self.scores[seat] = participant.score
+            self.occupants[seat] = participant
+        else:
+            seat = len(self.occupants)
+            self.scores.append(participant.score)
+            self.occupants.append(participant)
+        participant.seat = seat
+        self._enter(seat, participant.score)
+        if participant.is_bot:
+            self.bots += 1
+        elif participant.connected:
+            self.connected += 1
+
+    def unseat(self, participant):
+        seat = participant.seat
+        self._leave(seat, self.scores[seat])
+        self.scores[seat] = 0
+        self.occupants[seat] = None
+        self._free.append(seat)
+        if participant.is_bot:
+            self.bots -= 1
+        elif participant.connected:
+            self.connected -= 1
+
+    def add(self, participant, points):
+        seat = participant.seat
+        old = self.scores[seat]
+        self._leave(seat, old)
+        self._enter(seat, old + points)
+        self.scores[seat] = old + points
+
+    def reset(self):
+        seats = [seat for seat, p in enumerate(self.occupants) if p is not None]
+        self.scores = array('q', bytes(self.scores.itemsize * len(self.occupants)))
+        self._buckets = {0: set(seats)} if seats else {}
+        self._levels = [0] if seats else []
+
+    def top(self, n):
+        """The n highest-scoring participants, best first."""
+        leaders = []
+        for score in reversed(self._levels):
+            for seat in self._buckets[score]:
+                leaders.append(self.occupants[seat])
+                if len(leaders) == n:
+                    return leaders
+        return leaders
+
+    def histogram(self, bins):
+        """(width, counts): how many scored in each `width`-point bucket from 0 up, in at most `bins` buckets."""
+        highest = self._levels[-1] if self._levels else 0
+        width = max(1, -(-(highest + 1) // bins))
+        counts = [0] * (highest // width + 1)
+        for score in self._levels:
+            counts[score // width] += len(self._buckets[score])
+        return width, counts
+
+
+class StadiumRound:
+    """Round for a stadium room, where answers are kept by seat rather than by sid.
+
+    `marks` holds one byte per seat (0 until the seat answers, then the
+    answer index + 2, timeouts included) and `waiting` counts who is still
+    to answer, so a question costs a bytearray, not a dict and a set the
+    size of the audience. Same interface as Round.
+    """
+
+    __slots__ = ('index', 'start_time', 'correct_answer', 'correct_index', 'board', 'marks', 'counts', 'waiting',
+                 'bots_required', 'proceeded', '_responded')
+
+    def __init__(self, index, correct_answer, correct_index, board, bots_required, options=4):
+        self.index = index
+        self.start_time = time.time()
+        self.correct_answer = correct_answer
+        self.correct_index = correct_index
+        self.board = board
+        self.marks = bytearray(len(board.occupants))
+        self.counts = [0] * options
+        self.bots_required = bots_required  # nobody was connected when it opened, so the bots close it
+        self.waiting = board.bots if bots_required else board.connected
+        self.proceeded = False
+        self._responded = 0
+
+    def is_open(self):
+        return not self.proceeded
+
+    def all_answered(self):
+        return not self.proceeded and not self.waiting
+
+    def _mark(self, seat):
+        return self.marks[seat] if seat < len(self.marks) else 0
+
+    def answered(self, participant):
+        return self._mark(participant.seat) != 0
+
+    def waiting_on(self, participant):
+        if self.answered(participant):
+            return False
+        return self.bots_required if participant.is_bot else participant.connected
+
+    def remaining(self):
+        return self.waiting
+
+    def responded(self):
+        return self._responded
+
+    def expect(self, participant):
+        # The caller has only just seated or reconnected them, so they aren't counted yet
+        if self.waiting_on(participant):
+            self.waiting += 1
+
+    def release(self, participant):
+        if self.waiting_on(participant):
+            self.waiting -= 1
+
+    def record(self, participant, answer):
+        seat = participant.seat
+        if self.waiting_on(participant):
+            self.waiting -= 1
+        if seat >= len(self.marks):
+            self.marks.extend(bytes(seat + 1 - len(self.marks)))  # seated after the question opened
+        self.marks[seat] = answer + 2
+        self._responded += 1
+        if answer != NO_ANSWER:
+            self.counts[answer] += 1
+
+    def vacate(self, participant):
+        """Clears a departing participant's mark so whoever takes the seat next starts fresh."""
+        if participant.seat < len(self.marks):
+            self.marks[participant.seat] = 0
+
+    def rejoined(self, participant, old_sid):
+        if self.is_open():
+            self.expect(participant)
+
+    def answers_by_sid(self):
+        occupants = self.board.occupants
+        return {occupants[seat].sid: mark - 2 for seat, mark in enumerate(self.marks)
+                if mark and seat < len(occupants) and occupants[seat] is not None}
+
+    def pending_sids(self):
+        return [p.sid for p in self.board.occupants if p is not None and self.waiting_on(p)]
+
+    def restore(self, answers, pending):
+        occupants = self.board.occupants
+        pending = set(pending)
+        self.marks = bytearray(len(occupants))
+        self.bots_required = any(p.is_bot for p in occupants if p is not None and p.sid in pending)
+        for p in occupants:
+            if p is not None and p.sid in answers:
+                self.marks[p.seat] = answers[p.sid] + 2
+                self._responded += 1
+                if answers[p.sid] != NO_ANSWER:
+                    self.counts[answers[p.sid]] += 1
+        self.waiting = sum(1 for p in occupants if p is not None and self.waiting_on(p))
+
+
+class Game:
+    """One room: settings, participants and the current round."""
+
+    __slots__ = (
+        'game_id', 'host_sid', 'game_mode', 'max_players', 'num_bots', 'bot_level', 'selected_categories',
+        'time_per_question', 'total_questions', 'questions', 'prepared', 'current_question_index',
+        'players', 'bots', 'seat_tokens', 'board', 'round', 'chat', 'timers', 'finished',
+    )
+
+    def __init__(self, game_id, host_sid, game_mode, max_players, num_bots, selected_categories):
+        self.game_id = game_id
+        self.host_sid = host_sid
+        self.game_mode = game_mode  # singleplayer, head_to_head, multiplayer, stadium
+        self.max_players = max_players
+        self.num_bots = num_bots
+        self.bot_level = 'medium'  # skill tier every bot in the room plays at
+        self.selected_categories = selected_categories
+        self.time_per_question = 15
+        self.total_questions = 10
+        self.questions = []
+        self.prepared = []  # PreparedQuestion per question: shuffled answers and encoded payloads
+        self.current_question_index = -1
+        self.players = {}  # sid -> Participant
+        self.bots = {}  # bot_id -> Participant
+        self.seat_tokens = {}  # seat token -> current sid of that human seat
+        self.board = SeatScores() if game_mode == 'stadium' else None  # compact scores for a big audience
+        self.round = None
+        self.chat = ChatLog()  # newest messages only, in a fixed-size ring
+        self.timers = {}  # name -> scheduler handle
+        self.finished = False  # game over or room closed: results are recorded, nothing left to resume
+
+    def add_player(self, sid, name):
+        player = Participant(sid, name)
+        self.players[sid] = player
+        self.seat_tokens[player.seat_token] = sid
+        if self.board is not None:
+            self.board.seat(player)
+        if self.round and self.round.is_open():
+            self.round.expect(player)  # joined mid-question, so they get to answer it too
+        return player
+
+    def add_bot(self, bot_id, name):
+        bot = Participant(bot_id, name, is_bot=True)
+        self.bots[bot_id] = bot
+        if self.board is not None:
+            self.board.seat(bot)
+        if self.round and self.round.is_open() and self._waits_for_bots():
+            self.round.expect(bot)
+        return bot
+
+    def remove_participant(self, sid):
+        """Removes a player or bot and stops waiting on their answer. Returns the Participant."""
+        participant = self.players.pop(sid, None) or self.bots.pop(sid, None)
+        if participant:
+            self.seat_tokens.pop(participant.seat_token, None)
+            if self.round:
+                self.round.release(participant)
+                self.round.vacate(participant)
+            if self.board is not None:
+                self.board.unseat(participant)
+        return participant
+
+    def disconnect_player(self, sid):
+        """Keeps a human's seat but stops waiting on their answers until they rejoin."""
+        player = self.players.get(sid)
+        if player and player.connected:
+            if self.round:
+                self.round.release(player)
+            if self.board is not None:
+                self.board.connected -= 1
+            player.connected = False
+        return player
+
+    def reseat(self, seat_token, new_sid):
+        """Moves the seat held by `seat_token` to a reconnected socket. Returns the Participant or None."""
+        old_sid = self.seat_tokens.get(seat_token)
+        player = self.players.pop(old_sid, None) if old_sid is not None else None
+        if not player:
+            return None
+        if self.board is not None and not player.connected:
+            self.board.connected += 1
+        player.sid = new_sid
+        player.connected = True
+        self.players[new_sid] = player
+        self.seat_tokens[seat_token] = new_sid
+        if self.host_sid == old_sid:
+            self.host_sid = new_sid
+        if self.round:
+            self.round.rejoined(player, old_sid)
+        return player
+
+    def _waits_for_bots(self):
+        # Head-to-head waits for everyone; multiplayer and stadium only wait for bots once no humans are connected
+        if self.game_mode == 'head_to_head':
+            return True
+        if self.board is not None:
+            return not self.board.connected
+        return self.game_mode == 'multiplayer' and not any(p.connected for p in self.players.values())
+
+    def required_responders(self):
+        """Sids whose answers close a question in this game mode."""
+        required = {sid for sid, p in self.players.items() if p.connected}
+        if self._waits_for_bots():
+            required.update(self.bots)
+        return required
+
+    def participant(self, sid):
+        return self.players.get(sid) or self.bots.get(sid)
+
+    def participants(self):
+        yield from self.players.values()
+        yield from self.bots.values()
+
+    def player_list(self):
+        return [p.to_dict() for p in self.participants()]
+
+    def add_points(self, participant, points):
+        participant.score += points
+        if self.board is not None:
+            self.board.add(participant, points)
+
+    def reset_scores(self):
+        for p in self.participants():
+            p.score = 0
+        if self.board is not None:
+            self.board.reset()
+
+    def final_scores(self):
+        return sorted(((p.name, p.score) for p in self.participants()), key=lambda item: item[1], reverse=True)
+
+    def start_round(self, index):
+        self.current_question_index = index
+        prepared = self.prepared[index]
+        if self.board is not None:
+            self.round = StadiumRound(index, prepared.correct_answer, prepared.correct_index, self.board,
+                                      self._waits_for_bots(), len(prepared.answers))
+        else:
+            self.round = Round(index, prepared.correct_answer, prepared.correct_index, self.required_responders(),
+                               len(prepared.answers))
+        return self.round
+
+    def has_answered(self, sid):
+        participant = self.participant(sid)
+        return participant is not None and self.round.answered(participant)
+
+    def record_answer(self, sid, answer):
+        """Stores an answer index for the current round. Returns True once nobody is left to answer."""
+        self.round.record(self.participant(sid), answer)
+        return self.round.all_answered()
+
+    def current_question(self):
+        if 0 <= self.current_question_index < len(self.questions):
+            return self.questions[self.current_question_index]
+        return None
+
+    def current_prepared(self):
+        if 0 <= self.current_question_index < len(self.prepared):
+            return self.prepared[self.current_question_index]
+        return None
@@ -0,0 +1,125 @@
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardService:
+    """Single-player high scores: a bounded top-K in memory, written through to the `leaderboard` table in batches.
+
+    Only the best `top_k` entries are ever held in memory, as a min-heap so a
+    new score is compared against the current K-th place in O(1) and placed
+    in O(log K). Every finished game is still queued for the table, but rows
+    go out in one executemany per flush instead of one write per game.
+    """
+
+    def __init__(self, db_pool, top_k=20, batch_size=50):
+        self.db_pool = db_pool
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self._heap = []  # (score, -seq, entry); the root is the entry that drops out next
+        self._seq = itertools.count()  # earlier entries win ties, like ORDER BY score DESC, id
+        self._pending = []  # rows not yet written to the table
+        self._top = None  # cached sorted top-K, rebuilt after a change
+        self._lock = threading.Lock()
+        self.version = 0  # bumped whenever the top-K changes
+        self.recorded = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def load(self):
+        """Creates the score index if needed and seeds the top-K from the table."""
+        with self.db_pool.connection() as conn:
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard(score DESC, id)')
+            conn.commit()
+            rows = conn.execute(
+                'SELECT player_name, score, date FROM leaderboard ORDER BY score DESC, id LIMIT ?',
+                (self.top_k,)).fetchall()
+        with self._lock:
+            self._heap = []
+            for name, score, date in rows:
+                self._push({'name': name, 'score': score, 'timestamp': self._to_timestamp(date)})
+            self._top = None
+            self.version += 1
+        return len(rows)
+
+    @staticmethod
+    def _to_timestamp(date):
+        try:
+            return datetime.fromisoformat(date).timestamp()
+        except (TypeError, ValueError):
+            return 0
+
+    def _push(self, entry):
+        # Caller holds the lock. Returns True if the entry made the top-K.
+        item = (entry['score'], -next(self._seq), entry)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, item)
+            return True
+        if item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+            return True
+        return False
+
+    def record(self, name, score, questions_answered=None, correct_answers=None):
+        """Queues a finished game for the table. Returns True if it changed the top-K."""
+        now = datetime.now()
+        accuracy = None
+        if questions_answered:
+            accuracy = round((correct_answers or 0) / questions_answered * 100, 1)
+        with self._lock:
+            self._pending.append((name, score, now.isoformat(), questions_answered, correct_answers, accuracy))
+            changed = self._push({'name': name, 'score': score, 'timestamp': now.timestamp()})
+            if changed:
+                self._top = None
+                self.version += 1
+            self.recorded += 1
+            should_flush = len(self._pending) >= self.batch_size
+        if should_flush:
+            self.flush()
+        return changed
+
+    def top(self):
+        """The top-K as [{name, score, timestamp}], best first."""
+        with self._lock:
+            if self._top is None:
+                self._top = [entry for _, _, entry in sorted(self._heap, reverse=True)]
+            return self._top
+
+    def flush(self):
+        """Writes queued rows in one transaction. Rows are kept for the next try if the write fails."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        try:
+            with self.db_pool.connection() as conn:
+                conn.executemany(
+                    'INSERT INTO leaderboard (player_name, score, date, questions_answered, correct_answers, accuracy) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', rows)
+                conn.commit()
+        except sqlite3.Error as e:
+            with self._lock:
+                self._pending[:0] = rows
+                self.flush_errors += 1
+            logger.error("Leaderboard flush of %d rows failed: %s", len(rows), e)
+            return 0
+        with self._lock:
+            self.flushed += len(rows)
+        return len(rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._heap),
+                'top_k': self.top_k,
+                'pending': len(self._pending),
+                'recorded': self.recorded,
+                'flushed': self.flushed,
+                'flush_errors': self.flush_errors,
+                'version': self.version,
+            }
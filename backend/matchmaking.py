@@ -0,0 +1,204 @@
+import bisect
+import itertools
+import threading
+import time
+
+DEFAULT_RATING = 1000
+RATING_SPREAD = 400  # a player who wins every game drifts towards DEFAULT_RATING + RATING_SPREAD
+RATING_PRIOR_GAMES = 10  # results count for little until a player has this many head-to-heads
+BOT_LEVEL_BAND = 50  # ratings this close to the default get a medium bot
+
+
+def rating_from_record(played, won, lost):
+    """Head-to-head strength from a win/loss record, pulled towards the default while games are few."""
+    return DEFAULT_RATING + round(RATING_SPREAD * (won - lost) / (played + RATING_PRIOR_GAMES))
+
+
+def bot_level_for(rating):
+    """Bot tier for a player who found no opponent: easy below the default rating band, hard above it."""
+    if rating < DEFAULT_RATING - BOT_LEVEL_BAND:
+        return 'easy'
+    if rating > DEFAULT_RATING + BOT_LEVEL_BAND:
+        return 'hard'
+    return 'medium'
+
+
+def bucket_key(categories):
+    """Players are only paired with others who picked the same categories."""
+    return tuple(sorted(set(categories or ['all'])))
+
+
+class Ticket:
+    """One player waiting for a quick match."""
+
+    __slots__ = ('sid', 'name', 'key', 'rating', 'since', 'seq', 'timer')
+
+    def __init__(self, sid, name, key, rating, since, seq):
+        self.sid = sid
+        self.name = name
+        self.key = key
+        self.rating = rating
+        self.since = since
+        self.seq = seq
+        self.timer = None  # bot fallback, armed by the caller
+
+
+class MatchQueue:
+    """In-memory quick-match queue for head-to-head.
+
+    Waiting players are bucketed by their category selection and kept
+    sorted by rating within a bucket, so an arrival finds its nearest
+    opponent with one binary search. Two players are paired when their
+    ratings are within `window` of each other; the window widens by
+    `widen_per_second` for as long as the longer-waiting of the two has
+    been queued, and sweep() re-checks neighbours as it does. Anyone
+    still unpaired is the caller's to hand a bot (see take()).
+    """
+
+    def __init__(self, window=100, widen_per_second=25, rate_window=60):
+        self.window = window
+        self.widen_per_second = widen_per_second
+        self.rate_window = rate_window
+        self._buckets = {}  # key -> sorted [(rating, seq, Ticket)]
+        self._tickets = {}  # sid -> Ticket
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._recent = [0] * rate_window  # pairings per second over the last rate_window seconds
+        self._recent_at = int(time.monotonic())
+        self.queued = 0
+        self.paired = 0
+        self.bot_matches = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+
+    def _allowed(self, a, b, now):
+        return abs(a.rating - b.rating) <= self.window + self.widen_per_second * (now - min(a.since, b.since))
+
+    def _roll(self, now):
+        # Caller holds the lock. Zeroes the per-second slots that have gone by since the last call.
+        second = int(now)
+        if second - self._recent_at >= self.rate_window:
+            self._recent = [0] * self.rate_window
+        else:
+            for s in range(self._recent_at + 1, second + 1):
+                self._recent[s % self.rate_window] = 0
+        self._recent_at = max(self._recent_at, second)
+
+    def _count_pairing(self, now):
+        # Caller holds the lock
+        self._roll(now)
+        self._recent[int(now) % self.rate_window] += 1
+
+    def _unlink(self, ticket):
+        # Caller holds the lock
+        entries = self._buckets[ticket.key]
+        del entries[bisect.bisect_left(entries, (ticket.rating, ticket.seq))]
+        if not entries:
+            del self._buckets[ticket.key]
+        del self._tickets[ticket.sid]
+
+    def _pair(self, a, b, now):
+        # Caller holds the lock; both tickets are already out of the queue
+        self.paired += 1
+        self.total_wait += (now - a.since) + (now - b.since)
+        self._count_pairing(now)
+        return (a, b) if a.since <= b.since else (b, a)
+
+    def add(self, sid, name, categories, rating, now=None):
+        """Queues a player, or pairs them straight away.
+
+        Returns (ticket, None) while they wait, or (ticket, opponent) with the
+        opponent's ticket already taken off the queue. Returns (None, None) if
+        the sid is already queued.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if sid in self._tickets:
+                return None, None
+            ticket = Ticket(sid, name, bucket_key(categories), rating, now, next(self._seq))
+            self.queued += 1
+            entries = self._buckets.setdefault(ticket.key, [])
+            i = bisect.bisect_left(entries, (ticket.rating, ticket.seq))
+            neighbours = [entries[j][2] for j in (i - 1, i) if 0 <= j < len(entries)]
+            neighbours = [t for t in neighbours if self._allowed(ticket, t, now)]
+            if neighbours:
+                opponent = min(neighbours, key=lambda t: (abs(t.rating - rating), t.since))
+                self._unlink(opponent)
+                self._pair(ticket, opponent, now)
+                return ticket, opponent
+            entries.insert(i, (ticket.rating, ticket.seq, ticket))
+            self._tickets[sid] = ticket
+            return ticket, None
+
+    def sweep(self, now=None):
+        """Pairs neighbours whose windows have widened enough. Returns [(ticket, ticket)], the longer-waiting player first."""
+        now = time.monotonic() if now is None else now
+        pairs = []
+        with self._lock:
+            for entries in list(self._buckets.values()):
+                i = 0
+                while i + 1 < len(entries):
+                    a, b = entries[i][2], entries[i + 1][2]
+                    if self._allowed(a, b, now):
+                        pairs.append((a, b))
+                        i += 2
+                    else:
+                        i += 1
+            for a, b in pairs:
+                self._unlink(a)
+                self._unlink(b)
+            pairs = [self._pair(a, b, now) for a, b in pairs]
+        return pairs
+
+    def remove(self, sid):
+        """Takes a player out of the queue (they cancelled or disconnected). Returns their ticket or None."""
+        with self._lock:
+            ticket = self._tickets.get(sid)
+            if ticket is None:
+                return None
+            self._unlink(ticket)
+            self.cancelled += 1
+            return ticket
+
+    def take(self, sid, now=None):
+        """Takes a player who waited too long out of the queue to face a bot. Returns their ticket or None."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            ticket = self._tickets.get(sid)
+            if ticket is None:
+                return None
+            self._unlink(ticket)
+            self.bot_matches += 1
+            self.total_wait += now - ticket.since
+            self._count_pairing(now)
+            return ticket
+
+    def clear(self):
+        """Empties the queue. Returns the tickets that were waiting."""
+        with self._lock:
+            tickets = list(self._tickets.values())
+            self._buckets.clear()
+            self._tickets.clear()
+            self.cancelled += len(tickets)
+            return tickets
+
+    def waiting(self):
+        return len(self._tickets)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            self._roll(now)
+            matched = 2 * self.paired + self.bot_matches
+            oldest = min((t.since for t in self._tickets.values()), default=None)
+            return {
+                'waiting': len(self._tickets),
+                'buckets': len(self._buckets),
+                'queued': self.queued,
+                'paired': self.paired,
+                'bot_matches': self.bot_matches,
+                'cancelled': self.cancelled,
+                'pairings_per_second': round(sum(self._recent) / self.rate_window, 3),
+                'avg_wait_s': round(self.total_wait / matched, 2) if matched else 0,
+                'longest_wait_s': round(now - oldest, 2) if oldest is not None else 0,
+            }
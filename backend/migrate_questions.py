@@ -0,0 +1,171 @@
+"""Merges the legacy `questions` table into `quiz_questions` and gives every question a difficulty.
+
+`questions` stores its choices as option1..option4 plus `answer`, with a
+`difficulty` column the app never read. This adds `difficulty` and
+`legacy_id` columns to quiz_questions, copies each legacy row across in
+quiz_questions' correct_answer/wrong1..3 layout (or just takes its
+difficulty, when quiz_questions already has the same question text), and
+indexes (category, difficulty) for the question bank's strata.
+
+Rows are copied in batches, each committed together with a checkpoint in
+`schema_migrations`, so an interrupted run picks up where it stopped and
+running it again once finished changes nothing. --rate-from-stats also
+grades questions nobody gave a difficulty from how often players get them
+right (the question_stats table the app keeps), and can be re-run as those
+numbers grow. --drop-legacy removes `questions` once the copy is complete.
+
+Run from the repo root:  python backend/migrate_questions.py [--db quiz_questions.db] [--rate-from-stats] [--drop-legacy]
+"""
+import argparse
+import os
+import sqlite3
+from datetime import datetime
+
+from question_bank import DEFAULT_DIFFICULTY, DIFFICULTIES
+
+MIGRATION = 'merge_legacy_questions'
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'quiz_questions.db')
+# --rate-from-stats: questions with at least this many answers are graded by their correct rate
+MIN_ATTEMPTS = 20
+EASY_RATE = 0.75  # at least this share right -> easy
+HARD_RATE = 0.45  # at most this share right -> hard
+
+
+def normalize(text):
+    return ' '.join(str(text).split()).casefold()
+
+
+def ensure_schema(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(quiz_questions)')}
+    if 'difficulty' not in columns:
+        conn.execute(f"ALTER TABLE quiz_questions ADD COLUMN difficulty TEXT NOT NULL DEFAULT '{DEFAULT_DIFFICULTY}'")
+    if 'legacy_id' not in columns:
+        conn.execute('ALTER TABLE quiz_questions ADD COLUMN legacy_id INTEGER')  # questions.id it came from
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_quiz_questions_legacy_id ON quiz_questions(legacy_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_quiz_questions_category_difficulty '
+                 'ON quiz_questions(category, difficulty, id)')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            finished TEXT
+        )""")
+    conn.execute('INSERT OR IGNORE INTO schema_migrations (name) VALUES (?)', (MIGRATION,))
+    conn.commit()
+
+
+def convert(row):
+    """A legacy row as (question, correct, wrongs, category, difficulty), or None if its answer can't be told apart."""
+    options = [row['option1'], row['option2'], row['option3'], row['option4']]
+    answer = str(row['answer']).strip()
+    matches = [i for i, option in enumerate(options) if normalize(option) == normalize(answer)]
+    if len(matches) == 1:
+        correct = matches[0]
+    elif answer.isdigit() and 1 <= int(answer) <= 4:  # some rows store the option's number
+        correct = int(answer) - 1
+    elif answer.lower().startswith('option') and answer[6:].isdigit() and 1 <= int(answer[6:]) <= 4:
+        correct = int(answer[6:]) - 1
+    else:
+        return None
+    wrongs = [option for i, option in enumerate(options) if i != correct]
+    if len({normalize(option) for option in options}) != 4:
+        return None  # a repeated option would show up as two identical buttons
+    difficulty = str(row['difficulty'] or '').strip().lower()
+    if difficulty not in DIFFICULTIES:
+        difficulty = DEFAULT_DIFFICULTY
+    return row['question'], options[correct], wrongs, row['category'], difficulty
+
+
+def merge(conn, batch_size):
+    """Copies legacy rows in checkpointed batches. Returns counts of what happened to them."""
+    counts = {'inserted': 0, 'matched': 0, 'skipped': 0}
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions'").fetchone():
+        return counts
+    last_id, finished = conn.execute('SELECT last_id, finished FROM schema_migrations WHERE name = ?',
+                                     (MIGRATION,)).fetchone()
+    if finished:
+        return counts
+    existing = {normalize(question): qid for qid, question in conn.execute('SELECT id, question FROM quiz_questions')}
+    while True:
+        rows = conn.execute('SELECT * FROM questions WHERE id > ? ORDER BY id LIMIT ?', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            converted = convert(row)
+            if converted is None:
+                counts['skipped'] += 1
+                continue
+            question, correct, wrongs, category, difficulty = converted
+            match = existing.get(normalize(question))
+            if match is not None:
+                # Same question in both tables: keep quiz_questions' copy, take the difficulty it lacked
+                conn.execute('UPDATE quiz_questions SET difficulty = ?, legacy_id = ? WHERE id = ? AND legacy_id IS NULL',
+                             (difficulty, row['id'], match))
+                counts['matched'] += 1
+                continue
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO quiz_questions (question, correct_answer, wrong1, wrong2, wrong3, category, '
+                'difficulty, legacy_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (question, correct, *wrongs, category, difficulty, row['id']))
+            if cursor.rowcount:
+                existing[normalize(question)] = cursor.lastrowid
+                counts['inserted'] += 1
+        last_id = rows[-1]['id']
+        conn.execute('UPDATE schema_migrations SET last_id = ? WHERE name = ?', (last_id, MIGRATION))
+        conn.commit()  # the batch and its checkpoint land together
+        print(f"  copied up to questions.id {last_id}")
+    conn.execute('UPDATE schema_migrations SET finished = ? WHERE name = ?', (datetime.now().isoformat(), MIGRATION))
+    conn.commit()
+    return counts
+
+
+def rate_from_stats(conn):
+    """Grades questions without a legacy difficulty by their measured correct rate. Returns how many changed."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'question_stats'").fetchone():
+        return 0
+    cursor = conn.execute("""
+        UPDATE quiz_questions SET difficulty = (
+            SELECT CASE WHEN 1.0 * s.correct / s.attempts >= ? THEN 'easy'
+                        WHEN 1.0 * s.correct / s.attempts <= ? THEN 'hard'
+                        ELSE 'medium' END
+            FROM question_stats s WHERE s.question_id = quiz_questions.id)
+        WHERE legacy_id IS NULL
+          AND id IN (SELECT question_id FROM question_stats WHERE attempts >= ?)""",
+        (EASY_RATE, HARD_RATE, MIN_ATTEMPTS))
+    conn.commit()
+    return cursor.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--rate-from-stats', action='store_true', help='grade ungraded questions by how often players get them right')
+    parser.add_argument('--drop-legacy', action='store_true', help='drop the questions table once everything is copied')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    conn.row_factory = sqlite3.Row
+    try:
+        print(f"Migrating {os.path.abspath(args.db)}")
+        ensure_schema(conn)
+        counts = merge(conn, args.batch_size)
+        print(f"Legacy questions: {counts['inserted']} copied, {counts['matched']} already present, "
+              f"{counts['skipped']} skipped (answer not one of the four options, or repeated options)")
+        if args.rate_from_stats:
+            print(f"Graded {rate_from_stats(conn)} question(s) from player answers.")
+        if args.drop_legacy:
+            finished = conn.execute('SELECT finished FROM schema_migrations WHERE name = ?', (MIGRATION,)).fetchone()[0]
+            if finished:
+                conn.execute('DROP TABLE IF EXISTS questions')
+                conn.commit()
+                print("Dropped the questions table.")
+        for difficulty, count in conn.execute(
+                'SELECT difficulty, COUNT(*) FROM quiz_questions GROUP BY difficulty ORDER BY difficulty'):
+            print(f"  {difficulty}: {count}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
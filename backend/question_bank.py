@@ -0,0 +1,233 @@
+import bisect
+import hashlib
+import logging
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAX_REJECTION_DRAWS = 4  # random draws per wanted question before sampling stops guessing and scans
+DIFFICULTIES = ('easy', 'medium', 'hard')  # the order a game plays them in
+DEFAULT_DIFFICULTY = 'medium'  # for rows without one, e.g. a database that hasn't been migrated
+DIFFICULTY_CURVE = (0.3, 0.4, 0.3)  # share of a game's questions at each difficulty
+_LEVELS = {name: level for level, name in enumerate(DIFFICULTIES)}
+
+
+def _apportion(total, weights, caps):
+    """Splits `total` into whole parts in proportion to `weights` (largest remainder), none above its cap."""
+    parts = [0] * len(weights)
+    open_ = [i for i, w in enumerate(weights) if w > 0]
+    remaining = total
+    # Parts whose share reaches their cap get the cap, and the rest is shared out again among the others
+    while open_:
+        weight = sum(weights[i] for i in open_)
+        capped = [i for i in open_ if remaining * weights[i] / weight >= caps[i]]
+        if not capped:
+            break
+        for i in capped:
+            parts[i] = caps[i]
+            remaining -= caps[i]
+        open_ = [i for i in open_ if i not in capped]
+    if open_ and remaining > 0:
+        # Floor every share and hand the remainder to the largest fractions; a share is below its cap, so
+        # rounding it up can't pass the cap
+        weight = sum(weights[i] for i in open_)
+        shares = {i: remaining * weights[i] / weight for i in open_}
+        for i in open_:
+            parts[i] = int(shares[i])
+        left = remaining - sum(parts[i] for i in open_)
+        for i in sorted(open_, key=lambda i: shares[i] - parts[i], reverse=True)[:left]:
+            parts[i] += 1
+    return parts
+
+
+def _pick(pools, count, exclude=None, taken=None):
+    """Draws up to `count` distinct ids from the pools, never one in `taken`.
+
+    Returns (fresh, seen): the ids not `in exclude`, and the excluded ones
+    it came across, for the caller to fall back on.
+    """
+    # Treat the pools as one virtual list without concatenating them
+    offsets = []
+    total = 0
+    for pool in pools:
+        offsets.append(total)
+        total += len(pool)
+    if total == 0 or count <= 0:
+        return [], []
+
+    def at(pos):
+        pool_index = bisect.bisect_right(offsets, pos) - 1
+        return pools[pool_index][pos - offsets[pool_index]]
+
+    if exclude is None and not taken:
+        return [at(pos) for pos in random.sample(range(total), min(count, total))], []
+
+    # Draw at random and set seen ids aside, which takes about `count` draws while most of the
+    # pool is unseen. If that's not enough, the ids not drawn yet are split in one pass instead.
+    fresh, seen, drawn = [], [], set()
+    while len(fresh) < count and len(drawn) < min(total, MAX_REJECTION_DRAWS * count):
+        pos = random.randrange(total)
+        if pos not in drawn:
+            drawn.add(pos)
+            qid = at(pos)
+            if taken and qid in taken:
+                continue
+            (seen if exclude is not None and qid in exclude else fresh).append(qid)
+    if len(fresh) < count and len(drawn) < total:
+        skip = set(fresh).union(seen)
+        if taken:
+            skip |= taken
+        rest_fresh, rest_seen = [], []
+        for pool in pools:
+            for qid in pool:
+                if qid not in skip:
+                    (rest_seen if exclude is not None and qid in exclude else rest_fresh).append(qid)
+        fresh += random.sample(rest_fresh, min(count - len(fresh), len(rest_fresh)))
+        seen += random.sample(rest_seen, max(0, min(count - len(fresh) - len(seen), len(rest_seen))))
+    return fresh, seen
+
+
+class QuestionBank:
+    """In-memory copy of the quiz_questions table, indexed by category.
+
+    The table is read once at startup (and again on reload()). Each category
+    keeps a compact list of question ids, and is split again by difficulty
+    into strata, so sampling N questions is O(N) and never touches the
+    database.
+    """
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+        self._lock = threading.Lock()
+        self.version = 0  # reloads in this process
+        self.digest = ''  # hash of the loaded rows, the same in every process that loads the same table
+        # (rows, by_category, all_ids, strata) swapped as a single reference:
+        #   rows: question id -> row dict (same keys as the table)
+        #   by_category: category -> list of question ids
+        #   strata: category -> one list of question ids per entry of DIFFICULTIES
+        self._snapshot = ({}, {}, [], {})
+
+    def load(self):
+        """Reads every question from the database and swaps in fresh indexes."""
+        with self.db_pool.connection() as conn:
+            rows = conn.execute('SELECT * FROM quiz_questions ORDER BY id').fetchall()
+
+        new_rows = {}
+        new_by_category = {}
+        new_strata = {}
+        h = hashlib.sha256()
+        for row in rows:
+            q = dict(row)
+            if q.get('difficulty') not in _LEVELS:
+                q['difficulty'] = DEFAULT_DIFFICULTY
+            h.update(repr(tuple(q.items())).encode('utf-8'))
+            new_rows[q['id']] = q
+            new_by_category.setdefault(q['category'], []).append(q['id'])
+            strata = new_strata.get(q['category'])
+            if strata is None:
+                strata = new_strata[q['category']] = tuple([] for _ in DIFFICULTIES)
+            strata[_LEVELS[q['difficulty']]].append(q['id'])
+
+        # Swap everything in one go so readers never see a half-built bank
+        with self._lock:
+            self._snapshot = (new_rows, new_by_category, list(new_rows.keys()), new_strata)
+            self.digest = h.hexdigest()[:16]
+            self.version += 1
+        logger.info("Question bank loaded %d questions in %d categories (version %d).",
+                    len(new_rows), len(new_by_category), self.version)
+        return len(new_rows)
+
+    def reload(self):
+        """Re-reads the database so edits to the DB file show up without a restart."""
+        return self.load()
+
+    def categories(self):
+        return list(self._snapshot[1].keys())
+
+    def __len__(self):
+        return len(self._snapshot[0])
+
+    def get(self, question_id):
+        """Returns a copy of the question row, or None if the id is unknown."""
+        row = self._snapshot[0].get(question_id)
+        return dict(row) if row else None
+
+    def _ids_for_category(self, snapshot, category):
+        _, by_category, all_ids, _ = snapshot
+        if not category or category == 'all':
+            return all_ids
+        return by_category.get(category, [])
+
+    def page(self, category, after_id=None, limit=50):
+        """Returns (rows, next_cursor) for questions with id > after_id, in id order."""
+        snapshot = self._snapshot
+        ids = self._ids_for_category(snapshot, category)
+        # ids are kept sorted, so the cursor is a binary search rather than a scan
+        start = bisect.bisect_right(ids, after_id) if after_id is not None else 0
+        chunk = ids[start:start + limit]
+        rows = snapshot[0]
+        next_cursor = chunk[-1] if start + limit < len(ids) and chunk else None
+        return [dict(rows[qid]) for qid in chunk], next_cursor
+
+    def iter_rows(self, category=None):
+        """Yields question rows one at a time, so callers can stream them."""
+        snapshot = self._snapshot
+        rows = snapshot[0]
+        for qid in self._ids_for_category(snapshot, category):
+            yield rows[qid]
+
+    def game_ids(self, categories, count, snapshot=None, exclude=None):
+        """Picks a game's question ids by category quota and difficulty curve, easiest first.
+
+        Each category gets a share of `count` in proportion to its size, and
+        each share is split across the difficulties by DIFFICULTY_CURVE, so
+        every pick is a random.sample from one precomputed stratum. Where
+        `exclude` leaves a stratum short, the category's other difficulties
+        make up the difference before any excluded question is used.
+        """
+        snapshot = snapshot or self._snapshot
+        rows, strata = snapshot[0], snapshot[3]
+        if not categories or 'all' in categories:
+            chosen = list(strata)
+        else:
+            chosen = [c for c in dict.fromkeys(categories) if c in strata]
+        sizes = [sum(len(cell) for cell in strata[c]) for c in chosen]
+        by_level = tuple([] for _ in DIFFICULTIES)
+        for category, quota in zip(chosen, _apportion(count, sizes, sizes)):
+            if not quota:
+                continue
+            cells = strata[category]
+            wants = _apportion(quota, DIFFICULTY_CURVE, [len(cell) for cell in cells])
+            if exclude is None:
+                # Each want is capped at its stratum's size, so nothing can come up short
+                for level, cell, want in zip(by_level, cells, wants):
+                    level += random.sample(cell, want)
+                continue
+            taken, spare = set(), []
+            for cell, want in zip(cells, wants):
+                fresh, seen = _pick([cell], want, exclude)
+                taken.update(fresh)
+                spare += seen
+            short = quota - len(taken)
+            if short:
+                fresh, seen = _pick(cells, short, exclude, taken)
+                taken.update(fresh)
+                spare += seen
+                for qid in spare:  # only now fall back on excluded questions
+                    if len(taken) == quota:
+                        break
+                    taken.add(qid)
+            for qid in taken:
+                by_level[_LEVELS[rows[qid]['difficulty']]].append(qid)
+        ids = []
+        for level in by_level:
+            random.shuffle(level)  # categories mixed within each difficulty
+            ids += level
+        return ids
+
+    def sample_game(self, categories, count, exclude=None):
+        """Same as game_ids() but returns question dicts ready to go into a game."""
+        snapshot = self._snapshot
+        rows = snapshot[0]
+        return [dict(rows[qid]) for qid in self.game_ids(categories, count, snapshot, exclude)]
@@ -0,0 +1,93 @@
+import json
+import random
+
+
+class PreEncoded:
+    """An event argument serialised ahead of time; PacketJSON splices it into the packet as-is."""
+
+    __slots__ = ('data', 'json')
+
+    def __init__(self, data):
+        self.data = data
+        self.json = json.dumps(data, separators=(',', ':'))
+
+
+class PacketJSON:
+    """json module for Socket.IO packets that leaves PreEncoded arguments alone instead of re-encoding them."""
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if isinstance(obj, list) and any(isinstance(item, PreEncoded) for item in obj):
+            return '[' + ','.join(item.json if isinstance(item, PreEncoded) else json.dumps(item, **kwargs)
+                                  for item in obj) + ']'
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return json.loads(s, **kwargs)
+
+
+class PreparedQuestion:
+    """One question of a game as clients see it: answers already shuffled and payloads already encoded.
+
+    `order[i]` is the position in (correct, wrong1, wrong2, wrong3) of the
+    answer shown i-th, so an answer is checked by comparing indexes and the
+    same shuffle can be rebuilt from `order` alone.
+    """
+
+    __slots__ = ('question_id', 'order', 'answers', 'correct_index', 'correct_answer', 'wrong_indexes',
+                 'index_of', 'payload', 'fifty_fifty')
+
+    def answer_index(self, text):
+        """Index of an answer given as text, or None if it isn't one of this question's answers."""
+        return self.index_of.get(text)
+
+
+def prepare_questions(questions, time_per_question, orders=None, rng=random, first_number=1, total=None):
+    """Shuffles and encodes every question of a game up front.
+
+    orders, if given, replays earlier shuffles (see PreparedQuestion.order)
+    instead of drawing new ones. first_number and total set the
+    question_number/total_questions the payloads show, for re-preparing the
+    tail of a game that is already running.
+    """
+    total = len(questions) if total is None else total
+    prepared = []
+    for i, question in enumerate(questions):
+        source = (question['correct_answer'], question['wrong1'], question['wrong2'], question['wrong3'])
+        if orders is not None:
+            order = tuple(orders[i])
+        else:
+            order = [0, 1, 2, 3]
+            rng.shuffle(order)
+            order = tuple(order)
+        p = PreparedQuestion()
+        p.question_id = question['id']
+        p.order = order
+        p.answers = [source[k] for k in order]
+        p.correct_index = order.index(0)
+        p.correct_answer = source[0]
+        p.wrong_indexes = tuple(i for i, k in enumerate(order) if k != 0)
+        # Text lookup for clients that send the answer text; the correct answer wins if the data repeats it
+        p.index_of = {text: i for i, text in reversed(list(enumerate(p.answers)))}
+        p.index_of[p.correct_answer] = p.correct_index
+        p.payload = PreEncoded({
+            'id': question['id'],
+            'question': question['question'],
+            'answers': p.answers,
+            'category': question['category'],
+            'question_number': first_number + i,
+            'total_questions': total,
+            'time_per_question': time_per_question,
+        })
+        # 50:50 keeps the correct answer and one wrong one; which wrong answers go is decided here
+        wrong_texts = list(dict.fromkeys(source[1:]))
+        if p.correct_answer in wrong_texts:
+            wrong_texts.remove(p.correct_answer)
+        if len(wrong_texts) >= 2:
+            kept = rng.choice(wrong_texts)
+            p.fifty_fifty = PreEncoded({'disabled_answers': [text for text in wrong_texts if text != kept][:2]})
+        else:
+            p.fifty_fifty = None
+        prepared.append(p)
+    return prepared
@@ -0,0 +1,117 @@
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+PRIOR_CORRECT_RATE = 0.6  # assumed for a question nobody has answered yet
+PRIOR_TIME_FRACTION = 0.5  # share of the time limit a typical answer takes
+PRIOR_WEIGHT = 5  # answers' worth of weight the prior carries, so a couple of results don't swing it
+
+
+class QuestionStats:
+    """How hard each question really is, learnt from human answers.
+
+    Counters live in a dict keyed by question id and are bumped in O(1) per
+    answer. Changes since the last flush are kept as deltas and written in
+    one upsert batch, so the answer path never touches SQLite.
+    """
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+        self._totals = {}  # question_id -> [attempts, correct, answered, time_fraction_sum]
+        self._deltas = {}  # same layout, not yet written
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def load(self):
+        with self.db_pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS question_stats (
+                    question_id INTEGER PRIMARY KEY,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    correct INTEGER NOT NULL DEFAULT 0,
+                    answered INTEGER NOT NULL DEFAULT 0,
+                    time_fraction_sum REAL NOT NULL DEFAULT 0
+                )""")
+            conn.commit()
+            rows = conn.execute(
+                'SELECT question_id, attempts, correct, answered, time_fraction_sum FROM question_stats').fetchall()
+        with self._lock:
+            self._totals = {row[0]: list(row[1:]) for row in rows}
+            # Anything recorded before the load is still owed to the table
+            for question_id, delta in self._deltas.items():
+                self._add(self._totals, question_id, delta)
+        return len(rows)
+
+    @staticmethod
+    def _add(table, question_id, values):
+        entry = table.get(question_id)
+        if entry is None:
+            table[question_id] = list(values)
+        else:
+            for i, value in enumerate(values):
+                entry[i] += value
+
+    def record(self, question_id, correct, time_fraction=None):
+        """Counts one human answer. time_fraction is the share of the time limit used, or None for a timeout."""
+        values = (1, 1 if correct else 0, 0 if time_fraction is None else 1, time_fraction or 0.0)
+        with self._lock:
+            self._add(self._totals, question_id, values)
+            self._add(self._deltas, question_id, values)
+            self.recorded += 1
+
+    def correct_rate(self, question_id):
+        """Smoothed share of humans who get this question right."""
+        entry = self._totals.get(question_id)
+        if not entry:
+            return PRIOR_CORRECT_RATE
+        return (entry[1] + PRIOR_CORRECT_RATE * PRIOR_WEIGHT) / (entry[0] + PRIOR_WEIGHT)
+
+    def time_fraction(self, question_id):
+        """Smoothed share of the time limit humans take to answer this question."""
+        entry = self._totals.get(question_id)
+        if not entry:
+            return PRIOR_TIME_FRACTION
+        return (entry[3] + PRIOR_TIME_FRACTION * PRIOR_WEIGHT) / (entry[2] + PRIOR_WEIGHT)
+
+    def flush(self):
+        """Adds the pending deltas to the table in one transaction. Kept for the next try if it fails."""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        if not deltas:
+            return 0
+        rows = [(question_id, *values) for question_id, values in deltas.items()]
+        try:
+            with self.db_pool.connection() as conn:
+                conn.executemany("""
+                    INSERT INTO question_stats (question_id, attempts, correct, answered, time_fraction_sum)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(question_id) DO UPDATE SET
+                        attempts = attempts + excluded.attempts,
+                        correct = correct + excluded.correct,
+                        answered = answered + excluded.answered,
+                        time_fraction_sum = time_fraction_sum + excluded.time_fraction_sum""", rows)
+                conn.commit()
+        except sqlite3.Error as e:
+            with self._lock:
+                for question_id, values in deltas.items():
+                    self._add(self._deltas, question_id, values)
+                self.flush_errors += 1
+            logger.error("Question stats flush of %d rows failed: %s", len(rows), e)
+            return 0
+        with self._lock:
+            self.flushed += len(rows)
+        return len(rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'questions': len(self._totals),
+                'pending': len(self._deltas),
+                'recorded': self.recorded,
+                'flushed': self.flushed,
+                'flush_errors': self.flush_errors,
+            }
@@ -0,0 +1,243 @@
+import logging
+import marshal
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from chat import ChatLog
+from game_state import Game, Participant
+from question_payloads import prepare_questions
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the tuple layout below changes; rows in any other format are skipped on restore.
+# marshal's format can change between Python versions, so the interpreter version is part of it.
+FORMAT_VERSION = (3, sys.version_info[0], sys.version_info[1])
+CHAT_TAIL = 20  # chat messages kept per room, so a snapshot's size doesn't grow with the conversation
+
+
+def encode_game(game, chat_tail=CHAT_TAIL):
+    """Packs a room into a compact blob: a marshalled tuple of plain values, zlib-compressed.
+
+    Questions are stored by id and looked up in the question bank on restore, with
+    each one's answer order so the shuffle clients were shown can be rebuilt.
+    """
+    round_state = None
+    if game.round is not None:
+        r = game.round
+        round_state = (r.index, r.start_time, r.correct_answer, r.correct_index, r.answers_by_sid(), r.pending_sids(),
+                       r.proceeded)
+    state = (
+        FORMAT_VERSION,
+        game.game_id, game.host_sid, game.game_mode, game.max_players, game.num_bots, game.bot_level,
+        game.selected_categories, game.time_per_question, game.total_questions,
+        [q['id'] for q in game.questions], [p.order for p in game.prepared], game.current_question_index,
+        [(p.sid, p.name, p.score, p.is_bot, p.lifelines_used, p.feelin_good_active, p.connected, p.seat_token)
+         for p in game.participants()],
+        round_state,
+        game.chat.tail(chat_tail),
+    )
+    return zlib.compress(marshal.dumps(state), 1)
+
+
+def decode_game(blob, get_question):
+    """Rebuilds a Game from encode_game() output. Returns None if the blob is from another format
+    or one of its questions is no longer in the bank."""
+    state = marshal.loads(zlib.decompress(blob))
+    if state[0] != FORMAT_VERSION:
+        return None
+    (_, game_id, host_sid, game_mode, max_players, num_bots, bot_level, categories, time_per_question,
+     total_questions, question_ids, orders, current_index, participants, round_state, chat) = state
+
+    questions = [get_question(qid) for qid in question_ids]
+    if any(q is None for q in questions):
+        return None
+    game = Game(game_id, host_sid, game_mode, max_players, num_bots, categories)
+    game.bot_level = bot_level
+    game.time_per_question = time_per_question
+    game.total_questions = total_questions
+    game.questions = questions
+    if orders:
+        game.prepared = prepare_questions(questions, time_per_question, orders=orders)
+    game.current_question_index = current_index
+    for sid, name, score, is_bot, lifelines_used, feelin_good_active, connected, seat_token in participants:
+        p = Participant(sid, name, is_bot)
+        p.score = score
+        p.lifelines_used = lifelines_used
+        p.feelin_good_active = feelin_good_active
+        p.connected = connected
+        p.seat_token = seat_token
+        if is_bot:
+            game.bots[sid] = p
+        else:
+            game.players[sid] = p
+            game.seat_tokens[seat_token] = sid
+        if game.board is not None:
+            game.board.seat(p)
+    if round_state is not None:
+        index, start_time, correct_answer, correct_index, answers, pending, proceeded = round_state
+        r = game.start_round(index)
+        r.start_time = start_time
+        r.restore(answers, pending)
+        r.proceeded = proceeded
+        game.current_question_index = current_index
+    game.chat = ChatLog(messages=chat)
+    return game
+
+
+class RoomSnapshotter:
+    """Keeps a copy of every live room in a local SQLite file so a restart can pick the games back up.
+
+    Rooms are marked dirty as they change and written together once the
+    interval is up, one row per room, so a burst of answers in a room costs
+    one encode and one write, on the background `flusher` so the game
+    scheduler never waits on the disk. Finished or closed rooms are deleted
+    in the same transaction and never marked again. Encode time and blob size are tracked per room.
+    With no path, snapshots are off and mark()/discard() do nothing.
+    """
+
+    def __init__(self, path, flusher, worker_id='0', interval=1.0, chat_tail=CHAT_TAIL):
+        self.path = path
+        self.flusher = flusher  # FlushWorker
+        self.worker_id = worker_id
+        self.interval = interval
+        self.chat_tail = chat_tail
+        self._dirty = {}  # game_id -> Game, to be written at the next flush
+        self._deleted = set()  # game_ids to remove at the next flush
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()  # one writer at a time, so an older encode never lands after a newer one
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS room_snapshots (
+                    game_id TEXT PRIMARY KEY,
+                    worker_id TEXT NOT NULL,
+                    saved_at REAL NOT NULL,
+                    state BLOB NOT NULL
+                )""")
+        self.writes = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.bytes_written = 0
+        self.max_bytes = 0
+        self.encode_seconds = 0.0
+        self.restored = 0
+
+    def mark(self, game):
+        """Notes that a room changed; it's written when the interval is up. Finished rooms are ignored."""
+        if self._conn is None or game.finished:
+            return
+        with self._lock:
+            self._dirty[game.game_id] = game
+            self._deleted.discard(game.game_id)
+        self.flusher.request('room_snapshots', self.flush, self.interval)
+
+    def discard(self, game_id):
+        """Forgets a room that is over, so it isn't brought back on restart."""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._dirty.pop(game_id, None)
+            self._deleted.add(game_id)
+        self.flusher.request('room_snapshots', self.flush, self.interval)
+
+    def flush(self):
+        """Writes every dirty room and drops deleted ones in one transaction. Returns rooms written."""
+        with self._flushing:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            deleted, self._deleted = self._deleted, set()
+        if not dirty and not deleted:
+            return 0
+        started = time.perf_counter()
+        now = time.time()
+        rows = []
+        for game_id, game in dirty.items():
+            if game.finished:
+                deleted.add(game_id)  # ended after it was marked
+                continue
+            try:
+                rows.append((game_id, self.worker_id, now, encode_game(game, self.chat_tail)))
+            except RuntimeError:
+                self.mark(game)  # changed while being read on another thread; catch it next time
+        encode_seconds = time.perf_counter() - started
+        try:
+            with self._lock:
+                self._conn.execute('BEGIN')
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO room_snapshots (game_id, worker_id, saved_at, state) VALUES (?, ?, ?, ?)', rows)
+                self._conn.executemany('DELETE FROM room_snapshots WHERE game_id = ?', [(g,) for g in deleted])
+                self._conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            with self._lock:
+                if self._conn.in_transaction:
+                    self._conn.execute('ROLLBACK')
+                # Keep them for the next try, unless they changed again in the meantime
+                for game_id, game in dirty.items():
+                    if game_id not in self._deleted:
+                        self._dirty.setdefault(game_id, game)
+                self._deleted.update(g for g in deleted if g not in self._dirty)
+                self.flush_errors += 1
+            self.flusher.request('room_snapshots', self.flush, self.interval)
+            logger.error("Room snapshot flush of %d rooms failed: %s", len(rows), e)
+            return 0
+        with self._lock:
+            self.writes += len(rows)
+            self.flushes += 1
+            self.encode_seconds += encode_seconds
+            for row in rows:
+                self.bytes_written += len(row[3])
+                self.max_bytes = max(self.max_bytes, len(row[3]))
+        return len(rows)
+
+    def load(self, get_question, max_age=None):
+        """Returns the Games this worker had saved. Rows that can't be restored are deleted.
+
+        max_age (seconds) skips snapshots too old to be worth resuming.
+        """
+        if self._conn is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT game_id, saved_at, state FROM room_snapshots WHERE worker_id = ?', (self.worker_id,)).fetchall()
+        games = []
+        stale = []
+        now = time.time()
+        for game_id, saved_at, blob in rows:
+            game = None
+            if max_age is None or now - saved_at <= max_age:
+                try:
+                    game = decode_game(blob, get_question)
+                except (ValueError, EOFError, TypeError, zlib.error) as e:
+                    logger.warning("Room snapshot for game %s is unreadable: %s", game_id, e)
+            if game is None:
+                stale.append((game_id,))
+            else:
+                games.append(game)
+        if stale:
+            with self._lock:
+                self._conn.executemany('DELETE FROM room_snapshots WHERE game_id = ?', stale)
+        self.restored += len(games)
+        return games
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self._conn is not None,
+                'dirty': len(self._dirty),
+                'writes': self.writes,
+                'flushes': self.flushes,
+                'flush_errors': self.flush_errors,
+                'avg_bytes': round(self.bytes_written / self.writes) if self.writes else 0,
+                'max_bytes': self.max_bytes,
+                'avg_encode_us': round(self.encode_seconds / self.writes * 1e6, 1) if self.writes else 0,
+                'restored': self.restored,
+            }
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class InProcessRoomStore:
+    """Single-worker store: every room is local and nothing is ever forwarded.
+
+    `rooms` is the dict of live Game objects this worker owns. The shared
+    stores below keep the same dict for local rooms and add a directory of
+    which worker owns every other room.
+    """
+
+    shared = False
+
+    def __init__(self, worker_id='0'):
+        self.worker_id = worker_id
+        self.rooms = {}  # game_id -> Game, owned by this worker
+
+    def register(self, game):
+        self.rooms[game.game_id] = game
+
+    def unregister(self, game_id):
+        self.rooms.pop(game_id, None)
+
+    def owner(self, game_id):
+        return self.worker_id if game_id in self.rooms else None
+
+    def forward(self, owner, event, sid, data):
+        raise RuntimeError('InProcessRoomStore has no other workers to forward to')
+
+    def take_events(self):
+        return []
+
+    def stats(self):
+        return {'backend': 'memory', 'worker_id': self.worker_id, 'local_rooms': len(self.rooms)}
+
+
+class SQLiteRoomStore(InProcessRoomStore):
+    """Room directory and cross-worker mailbox in a SQLite file shared by all workers.
+
+    A room's live state stays on the worker that owns it, so its timers
+    always fire in one place. Other workers look the owner up here and
+    drop the client's event into the owner's mailbox. Good for several
+    workers on one host and for tests; across hosts, swap in a store with
+    the same methods backed by Redis.
+    """
+
+    shared = True
+
+    def __init__(self, path, worker_id='0'):
+        super().__init__(worker_id)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS room_directory (
+                game_id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                game_mode TEXT,
+                created_at REAL
+            )""")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS room_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                owner TEXT NOT NULL,
+                event TEXT NOT NULL,
+                sid TEXT NOT NULL,
+                payload TEXT NOT NULL
+            )""")
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_room_events_owner ON room_events(owner, id)')
+        self.forwarded = 0
+        self.received = 0
+
+    def register(self, game):
+        super().register(game)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO room_directory (game_id, owner, game_mode, created_at) VALUES (?, ?, ?, ?)',
+                (game.game_id, self.worker_id, game.game_mode, time.time()))
+
+    def unregister(self, game_id):
+        super().unregister(game_id)
+        with self._lock:
+            self._conn.execute('DELETE FROM room_directory WHERE game_id = ? AND owner = ?', (game_id, self.worker_id))
+
+    def owner(self, game_id):
+        if game_id in self.rooms:
+            return self.worker_id
+        with self._lock:
+            row = self._conn.execute('SELECT owner FROM room_directory WHERE game_id = ?', (game_id,)).fetchone()
+        return row[0] if row else None
+
+    def forward(self, owner, event, sid, data):
+        with self._lock:
+            self._conn.execute('INSERT INTO room_events (owner, event, sid, payload) VALUES (?, ?, ?, ?)',
+                               (owner, event, sid, json.dumps(data)))
+        self.forwarded += 1
+
+    def take_events(self):
+        """Pops every event waiting in this worker's mailbox, oldest first."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    'SELECT id, event, sid, payload FROM room_events WHERE owner = ? ORDER BY id',
+                    (self.worker_id,)).fetchall()
+                if rows:
+                    self._conn.execute('DELETE FROM room_events WHERE owner = ? AND id <= ?', (self.worker_id, rows[-1][0]))
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+        self.received += len(rows)
+        return [(event, sid, json.loads(payload)) for _, event, sid, payload in rows]
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({'backend': 'sqlite', 'forwarded': self.forwarded, 'received': self.received})
+        return stats
+
+
+def create_room_store(url, worker_id='0'):
+    """Builds a store from a ROOM_STORE setting: 'memory' (default) or 'sqlite:///path/to/rooms.db'."""
+    if not url or url == 'memory':
+        return InProcessRoomStore(worker_id)
+    if url.startswith('sqlite:///'):
+        return SQLiteRoomStore(url[len('sqlite:///'):], worker_id)
+    raise ValueError(f"Unsupported ROOM_STORE: {url}")
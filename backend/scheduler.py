@@ -0,0 +1,129 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A single scheduled callback. Cancelling just marks it; the loop skips it."""
+
+    __slots__ = ('deadline', 'callback', 'args', 'room', 'cancelled')
+
+    def __init__(self, deadline, callback, args, room):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.room = room
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class GameScheduler:
+    """One background loop driving every room's deadlines from a single heap.
+
+    Bot answers, question expiry and the pause between questions are all
+    entries in the same heap, so the number of live green threads stays at
+    one no matter how many rooms are running.
+    """
+
+    def __init__(self, socketio, tick=0.05):
+        self.socketio = socketio
+        self.tick = tick  # longest the loop sleeps, so newly added deadlines are picked up quickly
+        self._heap = []
+        self._by_room = {}  # room -> set of live handles, for cancel_room()
+        self._counter = itertools.count()  # tie-breaker so handles are never compared
+        self._lock = threading.Lock()
+        self._started = False
+        self._stopped = False
+        self.fired = 0
+        self.errors = 0
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.socketio.start_background_task(self._run)
+
+    def stop(self):
+        self._stopped = True
+
+    def call_later(self, delay, callback, *args, room=None):
+        """Runs callback(*args) after `delay` seconds. Returns a cancellable handle."""
+        handle = TimerHandle(time.monotonic() + max(0, delay), callback, args, room)
+        with self._lock:
+            heapq.heappush(self._heap, (handle.deadline, next(self._counter), handle))
+            if room is not None:
+                self._by_room.setdefault(room, set()).add(handle)
+        if not self._started:
+            self.start()
+        return handle
+
+    def cancel(self, handle):
+        if handle is None:
+            return
+        handle.cancel()
+        with self._lock:
+            self._forget(handle)
+
+    def cancel_room(self, room):
+        """Cancels every pending deadline that belongs to a room (e.g. when it ends)."""
+        with self._lock:
+            handles = self._by_room.pop(room, ())
+        for handle in handles:
+            handle.cancel()
+
+    def _forget(self, handle):
+        room_handles = self._by_room.get(handle.room)
+        if room_handles is not None:
+            room_handles.discard(handle)
+            if not room_handles:
+                del self._by_room[handle.room]
+
+    def _pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                handle = heapq.heappop(self._heap)[2]
+                if handle.cancelled:
+                    continue
+                self._forget(handle)
+                due.append(handle)
+            # Drop cancelled entries at the top so they don't hold up the sleep calculation
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            next_deadline = self._heap[0][0] if self._heap else None
+        return due, next_deadline
+
+    def _run(self):
+        while not self._stopped:
+            due, next_deadline = self._pop_due(time.monotonic())
+            for handle in due:
+                if handle.cancelled:  # cancelled by an earlier callback in this batch
+                    continue
+                try:
+                    handle.callback(*handle.args)
+                    self.fired += 1
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Scheduled task %s for room %s failed",
+                                     getattr(handle.callback, '__name__', handle.callback), handle.room)
+            if next_deadline is None:
+                delay = self.tick
+            else:
+                delay = min(self.tick, max(0, next_deadline - time.monotonic()))
+            self.socketio.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._heap),
+                'rooms': len(self._by_room),
+                'fired': self.fired,
+                'errors': self.errors,
+            }
@@ -0,0 +1,105 @@
+import threading
+
+
+class _RoomFeed:
+    __slots__ = ('seq', 'sent', 'timer')
+
+    def __init__(self):
+        self.seq = 0
+        self.sent = {}  # sid -> score the room's clients were last told
+        self.timer = None  # pending flush, if a change is waiting for the window to close
+
+
+class ScoreboardCoalescer:
+    """Per-room scoreboard broadcasts as numbered deltas instead of full player lists.
+
+    Changes are marked as they happen and flushed together once the window
+    closes, so a burst of answers or roster changes goes out as a single
+    `scoreboard_delta`. A delta carries absolute scores for the sids that
+    changed, which makes re-applying one harmless. Clients that see a gap
+    in `seq` ask for a full snapshot instead.
+    """
+
+    def __init__(self, socketio, scheduler, window=0.25):
+        self.socketio = socketio
+        self.scheduler = scheduler
+        self.window = window
+        self._rooms = {}  # room -> _RoomFeed, only for games that have started
+        self._lock = threading.Lock()
+        self.deltas = 0
+        self.snapshots = 0
+        self.entries_sent = 0
+
+    def reset(self, game):
+        """Starts a fresh feed for a game (e.g. on start) and returns its snapshot."""
+        feed = _RoomFeed()
+        with self._lock:
+            old = self._rooms.get(game.game_id)
+            if old:
+                self.scheduler.cancel(old.timer)
+            self._rooms[game.game_id] = feed
+            feed.sent = {p.sid: p.score for p in game.participants()}
+        return {'seq': feed.seq, 'players': game.player_list()}
+
+    def snapshot(self, game):
+        """Full list for one client, stamped with the seq it lines up with."""
+        feed = self._rooms.get(game.game_id)
+        self.snapshots += 1
+        return {'seq': feed.seq if feed else 0, 'players': game.player_list()}
+
+    def mark(self, game):
+        """Notes that scores or the roster changed; they go out when the window closes."""
+        with self._lock:
+            feed = self._rooms.get(game.game_id)
+            if feed is None or feed.timer is not None:
+                return
+            feed.timer = self.scheduler.call_later(self.window, self.flush, game, room=game.game_id)
+
+    def flush(self, game):
+        """Emits everything that changed since the last delta, right now. Returns the payload or None."""
+        with self._lock:
+            feed = self._rooms.get(game.game_id)
+            if feed is None:
+                return None
+            self.scheduler.cancel(feed.timer)
+            feed.timer = None
+
+            joined = []
+            scores = {}
+            current = {}
+            for p in game.participants():
+                current[p.sid] = p.score
+                if p.sid not in feed.sent:
+                    joined.append(p.to_dict())
+                elif feed.sent[p.sid] != p.score:
+                    scores[p.sid] = p.score
+            left = [sid for sid in feed.sent if sid not in current]
+            if not (joined or scores or left):
+                return None
+
+            feed.seq += 1
+            feed.sent = current
+            payload = {'seq': feed.seq, 'scores': scores}
+            if joined:
+                payload['joined'] = joined
+            if left:
+                payload['left'] = left
+            self.deltas += 1
+            self.entries_sent += len(scores) + len(joined) + len(left)
+        self.socketio.emit('scoreboard_delta', payload, room=game.game_id)
+        return payload
+
+    def discard(self, room):
+        with self._lock:
+            feed = self._rooms.pop(room, None)
+        if feed:
+            self.scheduler.cancel(feed.timer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rooms': len(self._rooms),
+                'deltas': self.deltas,
+                'snapshots': self.snapshots,
+                'entries_sent': self.entries_sent,
+            }
@@ -0,0 +1,170 @@
+import logging
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+ROTATE_FRACTION = 0.5  # the newer generation starts over once it covers this share of the bank
+
+
+class SeenSet:
+    """Which questions one player has been given recently, as two bitmaps over question ids.
+
+    Question ids are small dense integers, so a bitmap costs a bit per
+    question: about 50 bytes for a 400-question bank. `current` fills up
+    as games are played; once it covers `ROTATE_FRACTION` of the bank it
+    becomes `previous` and a fresh one starts, so the oldest history ages
+    out and the player can never run out of unseen questions entirely.
+    """
+
+    __slots__ = ('current', 'previous', 'count')
+
+    def __init__(self, current=b'', previous=b''):
+        self.current = bytearray(current)
+        self.previous = bytearray(previous)
+        self.count = sum(bin(byte).count('1') for byte in self.current)  # ids set in current
+
+    @staticmethod
+    def _has(bits, question_id):
+        byte = question_id >> 3
+        return byte < len(bits) and bits[byte] >> (question_id & 7) & 1
+
+    def __contains__(self, question_id):
+        # Called for every candidate while sampling, so _has() is inlined here
+        byte, bit = question_id >> 3, 1 << (question_id & 7)
+        current, previous = self.current, self.previous
+        return bool(byte < len(current) and current[byte] & bit or byte < len(previous) and previous[byte] & bit)
+
+    def add(self, question_ids, bank_size):
+        for question_id in question_ids:
+            if self._has(self.current, question_id):
+                continue
+            byte = question_id >> 3
+            if byte >= len(self.current):
+                self.current.extend(bytes(byte + 1 - len(self.current)))
+            self.current[byte] |= 1 << (question_id & 7)
+            self.count += 1
+        if self.count >= bank_size * ROTATE_FRACTION:
+            self.previous, self.current, self.count = self.current, bytearray(), 0
+
+    def nbytes(self):
+        return sys.getsizeof(self.current) + sys.getsizeof(self.previous) + sys.getsizeof(self)
+
+
+class SeenAny:
+    """Membership in any of several players' seen sets, for rooms with more than one human."""
+
+    __slots__ = ('sets',)
+
+    def __init__(self, sets):
+        self.sets = sets
+
+    def __contains__(self, question_id):
+        return any(question_id in s for s in self.sets)
+
+
+class SeenQuestions:
+    """Per-player seen sets for no-repeat question selection.
+
+    The sets of the `max_players` most recently active names are kept in
+    memory (least recently used ones are dropped) and loaded in one query
+    at startup, so sampling a game never waits on SQLite. Changed sets are
+    written back in batches by flush().
+    """
+
+    def __init__(self, db_pool, max_players=50000):
+        self.db_pool = db_pool
+        self.max_players = max_players
+        self._sets = OrderedDict()  # player_name -> SeenSet, least recently used first
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def load(self):
+        with self.db_pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS player_seen_questions (
+                    player_name TEXT PRIMARY KEY,
+                    seen BLOB NOT NULL,
+                    previous BLOB NOT NULL,
+                    updated TEXT NOT NULL
+                )""")
+            conn.commit()
+            rows = conn.execute('SELECT player_name, seen, previous FROM player_seen_questions '
+                                'ORDER BY updated DESC LIMIT ?', (self.max_players,)).fetchall()
+        with self._lock:
+            for name, seen, previous in rows:  # newest first, each pushed to the least recently used end
+                if name not in self._sets:  # anything recorded before the load is newer
+                    self._sets[name] = SeenSet(seen, previous)
+                    self._sets.move_to_end(name, last=False)
+        return len(rows)
+
+    def exclusion(self, player_names):
+        """What sampling should steer clear of for these players, or None if none of them has history."""
+        with self._lock:
+            sets = [self._sets[name] for name in player_names if name in self._sets]
+        if not sets:
+            return None
+        return sets[0] if len(sets) == 1 else SeenAny(sets)
+
+    def record(self, player_names, question_ids, bank_size):
+        """Marks questions as given to each of these players."""
+        with self._lock:
+            for name in player_names:
+                seen = self._sets.get(name)
+                if seen is None:
+                    seen = self._sets[name] = SeenSet()
+                else:
+                    self._sets.move_to_end(name)
+                seen.add(question_ids, bank_size)
+                self._dirty.add(name)
+            while len(self._sets) > self.max_players:
+                name, _ = self._sets.popitem(last=False)
+                self._dirty.discard(name)  # only the table remembers it now, as of its last flush
+            self.recorded += 1
+
+    def flush(self):
+        """Writes the changed sets in one transaction. Kept for the next try if it fails."""
+        now = datetime.now().isoformat()
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            rows = [(name, bytes(self._sets[name].current), bytes(self._sets[name].previous), now)
+                    for name in dirty if name in self._sets]
+        if not rows:
+            return 0
+        try:
+            with self.db_pool.connection() as conn:
+                conn.executemany("""
+                    INSERT INTO player_seen_questions (player_name, seen, previous, updated) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(player_name) DO UPDATE SET
+                        seen = excluded.seen, previous = excluded.previous, updated = excluded.updated""", rows)
+                conn.commit()
+        except sqlite3.Error as e:
+            with self._lock:
+                self._dirty |= dirty
+                self.flush_errors += 1
+            logger.error("Seen questions flush of %d rows failed: %s", len(rows), e)
+            return 0
+        with self._lock:
+            self.flushed += len(rows)
+        return len(rows)
+
+    def stats(self):
+        with self._lock:
+            sets = list(self._sets.values())
+            pending = len(self._dirty)
+        total = sum(s.nbytes() for s in sets)
+        return {
+            'players': len(sets),
+            'max_players': self.max_players,
+            'avg_bytes_per_player': round(total / len(sets)) if sets else 0,
+            'pending': pending,
+            'recorded': self.recorded,
+            'flushed': self.flushed,
+            'flush_errors': self.flush_errors,
+        }
@@ -0,0 +1,86 @@
+import threading
+import time
+
+STADIUM = 'stadium'
+STADIUM_TOP_N = 10  # players named on a stadium scoreboard
+STADIUM_SCORE_BINS = 100  # most buckets in the score histogram clients rank themselves against
+
+
+class StadiumBroadcaster:
+    """Room-wide updates for stadium games, sized for thousands of players in one room.
+
+    Nothing a stadium room broadcasts grows with the audience. Scoreboards
+    are standings: the top N plus a histogram of everyone's scores in at
+    most `bins` buckets, from which each client works out its own rank
+    (exactly while scores fit one per bucket, to within its bucket after
+    that). Both are read from the room's SeatScores, which keeps players
+    bucketed by score as points come in, so building them doesn't walk the
+    audience either. Joins and leaves are folded into one head-count update
+    per window instead of a roster broadcast per change.
+    """
+
+    def __init__(self, socketio, scheduler, top_n=STADIUM_TOP_N, bins=STADIUM_SCORE_BINS, window=1.0):
+        self.socketio = socketio
+        self.scheduler = scheduler
+        self.top_n = top_n
+        self.bins = bins
+        self.window = window
+        self._audience_timers = {}  # room -> pending audience_update
+        self._lock = threading.Lock()
+        self.standings_built = 0
+        self.standings_seconds = 0.0
+        self.audience_updates = 0
+
+    def top(self, game):
+        """The top N participants as player_list() entries, highest score first."""
+        return [p.to_dict() for p in game.board.top(self.top_n)]
+
+    def standings(self, game):
+        """Top N, plus how many participants scored in each `bin_width`-point bucket from 0 up."""
+        started = time.perf_counter()
+        width, bins = game.board.histogram(self.bins)
+        payload = {
+            'top': self.top(game),
+            'bin_width': width,
+            'bins': bins,
+            'audience': len(game.players),
+        }
+        self.standings_seconds += time.perf_counter() - started
+        self.standings_built += 1
+        return payload
+
+    @staticmethod
+    def answer_counts(game):
+        """How many answered each option of the current question, and how many didn't answer."""
+        counts = game.round.counts
+        return {'answers': list(counts), 'no_answer': game.round.responded() - sum(counts)}
+
+    def mark_audience(self, game):
+        """Notes that the head count changed; one audience_update goes out when the window closes."""
+        with self._lock:
+            if game.game_id in self._audience_timers:
+                return
+            self._audience_timers[game.game_id] = self.scheduler.call_later(
+                self.window, self._send_audience, game, room=game.game_id)
+
+    def _send_audience(self, game):
+        with self._lock:
+            self._audience_timers.pop(game.game_id, None)
+            self.audience_updates += 1
+        self.socketio.emit('audience_update', {'game_id': game.game_id, 'audience': len(game.players),
+                                               'max_players': game.max_players}, room=game.game_id)
+
+    def discard(self, room):
+        with self._lock:
+            timer = self._audience_timers.pop(room, None)
+        self.scheduler.cancel(timer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'standings_built': self.standings_built,
+                'avg_standings_ms': round(self.standings_seconds / self.standings_built * 1000, 3)
+                if self.standings_built else 0,
+                'audience_updates': self.audience_updates,
+                'pending_audience_updates': len(self._audience_timers),
+            }
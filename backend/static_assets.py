@@ -0,0 +1,211 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+
+from flask import current_app, request, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip variants are built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = ('.html', '.js', '.css', '.svg', '.json', '.txt')  # kept in memory with compressed variants
+IMMUTABLE = 31536000  # a year; fingerprinted URLs change whenever the content does
+FINGERPRINT_LENGTH = 12
+_REFERENCE = re.compile(r'''((?:src|href)=["'])([^"':?#]+)(["'])''')  # relative src/href in HTML
+
+
+class Asset:
+    """One file under the frontend directory.
+
+    Compressible files are held in memory as `variants` (encoding -> body,
+    '' for the original); everything else stays on disk and is sent with
+    send_file so ranges and sendfile are handled by the server.
+    """
+
+    __slots__ = ('path', 'name', 'url', 'digest', 'mimetype', 'mtime', 'variants')
+
+    def __init__(self, path, name, digest, mimetype, mtime, variants=None):
+        self.path = path
+        self.name = name
+        self.digest = digest
+        self.url = fingerprinted(name, digest)
+        self.mimetype = mimetype
+        self.mtime = mtime
+        self.variants = variants
+
+
+def fingerprinted(name, digest):
+    """'static/sounds/x.mp3' -> 'static/sounds/x.<digest>.mp3'."""
+    root, ext = os.path.splitext(name)
+    return f'{root}.{digest}{ext}'
+
+
+def _digest(data=None, path=None):
+    h = hashlib.sha256()
+    if data is not None:
+        h.update(data)
+    else:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                h.update(chunk)
+    return h.hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def _compress(body):
+    variants = {'': body}
+    gz = gzip.compress(body, 9, mtime=0)
+    if len(gz) < len(body):
+        variants['gzip'] = gz
+    if brotli is not None:
+        br = brotli.compress(body, quality=11)
+        if len(br) < len(body):
+            variants['br'] = br
+    return variants
+
+
+class StaticAssets:
+    """Serves the frontend with content-hashed URLs and precompressed text files.
+
+    build() hashes every file, rewrites index.html to point at the
+    fingerprinted names of the files it references, and builds gzip (and
+    brotli, if installed) bodies of the text files once. Fingerprinted URLs
+    are cached as immutable; plain names still work but are revalidated
+    after `max_age`, and index.html is always revalidated so a deploy
+    reaches clients on their next load. With `watch`, text files are
+    re-read when they change on disk, for editing the frontend locally.
+    """
+
+    def __init__(self, root, index='index.html', max_age=3600, watch=False):
+        self.root = os.path.abspath(root)
+        self.index = index
+        self.max_age = max_age
+        self.watch = watch
+        self._assets = {}  # name -> Asset
+        self._urls = {}  # fingerprinted url -> Asset
+        self._lock = threading.Lock()
+        self.build_seconds = 0.0
+        self.served = 0
+        self.compressed = 0
+        self.not_modified = 0
+
+    def build(self):
+        """(Re)scans the directory. Returns the number of assets."""
+        started = time.perf_counter()
+        assets = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if name == self.index:
+                    continue  # built last, once the names it points at are known
+                assets[name] = self._load(path, name)
+        index_path = os.path.join(self.root, self.index)
+        if os.path.isfile(index_path):
+            assets[self.index] = self._load(index_path, self.index, assets)
+        with self._lock:
+            self._assets = assets
+            self._urls = {asset.url: asset for asset in assets.values()}
+            self.build_seconds = time.perf_counter() - started
+        logger.info("Built %d static assets in %.0fms (brotli %s)", len(assets), self.build_seconds * 1000,
+                    'on' if brotli is not None else 'off')
+        return len(assets)
+
+    def _load(self, path, name, assets=None):
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        mtime = os.path.getmtime(path)
+        if not name.endswith(COMPRESSIBLE):
+            return Asset(path, name, _digest(path=path), mimetype, mtime)
+        with open(path, 'rb') as f:
+            body = f.read()
+        if assets is not None:
+            body = self._rewrite(body, name, assets)
+        return Asset(path, name, _digest(body), mimetype, mtime, _compress(body))
+
+    def _rewrite(self, body, name, assets):
+        # Points src/href at fingerprinted names; anything that isn't a local asset is left alone
+        base = os.path.dirname(name)
+        def replace(match):
+            target = assets.get(os.path.normpath(os.path.join(base, match.group(2))).replace(os.sep, '/'))
+            if target is None:
+                return match.group(0)
+            return match.group(1) + os.path.relpath(target.url, base or '.').replace(os.sep, '/') + match.group(3)
+        return _REFERENCE.sub(replace, body.decode('utf-8')).encode('utf-8')
+
+    def _lookup(self, name):
+        with self._lock:
+            asset = self._urls.get(name)
+            if asset is not None:
+                return asset, True
+            asset = self._assets.get(name)
+        if asset is not None and self.watch and asset.variants is not None:
+            try:
+                changed = os.path.getmtime(asset.path) != asset.mtime
+            except OSError:
+                changed = True
+            if changed:
+                self.build()
+                asset = self._assets.get(name)
+        return asset, False
+
+    def response(self, name):
+        """Response for a request path, or None if no asset matches it."""
+        asset, immutable = self._lookup(name)
+        if asset is None:
+            return None
+        max_age = IMMUTABLE if immutable else 0 if asset.name == self.index else self.max_age
+        if asset.variants is None:
+            # Ranges, If-None-Match and (under a server that has wsgi.file_wrapper) sendfile come from send_file
+            response = send_file(asset.path, mimetype=asset.mimetype, etag=asset.digest, max_age=max_age,
+                                 conditional=True)
+        else:
+            encoding = ''
+            for candidate in ('br', 'gzip'):
+                if candidate in asset.variants and request.accept_encodings[candidate]:
+                    encoding = candidate
+                    break
+            body = asset.variants[encoding]
+            response = current_app.response_class(body, mimetype=asset.mimetype)
+            response.set_etag(f'{asset.digest}-{encoding}' if encoding else asset.digest)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.make_conditional(request, accept_ranges=not encoding, complete_length=len(body))
+            if encoding:
+                self.compressed += 1
+        if immutable:
+            response.cache_control.immutable = True
+        elif max_age == 0:
+            response.cache_control.no_cache = True
+        if response.status_code == 304:
+            self.not_modified += 1
+        self.served += 1
+        return response
+
+    def stats(self):
+        with self._lock:
+            assets = list(self._assets.values())
+        text = [a for a in assets if a.variants is not None]
+        return {
+            'assets': len(assets),
+            'text_assets': len(text),
+            'text_bytes': sum(len(a.variants['']) for a in text),
+            'gzip_bytes': sum(len(a.variants.get('gzip', a.variants[''])) for a in text),
+            'brotli_bytes': sum(len(a.variants['br']) for a in text if 'br' in a.variants) if brotli else None,
+            'build_ms': round(self.build_seconds * 1000, 1),
+            'served': self.served,
+            'compressed': self.compressed,
+            'not_modified': self.not_modified,
+        }
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend's modules import each other flat, the way app.py is run
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
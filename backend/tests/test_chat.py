@@ -0,0 +1,40 @@
+from chat import ChatLog, TokenBucket
+
+
+def filled(count, maxlen=10):
+    log = ChatLog(maxlen=maxlen)
+    for i in range(count):
+        log.append({'message': f'm{i}'})
+    return log
+
+
+def test_ring_keeps_the_newest_messages():
+    log = filled(15)
+    assert len(log) == 10
+    assert [m['id'] for m in log] == list(range(5, 15))
+    assert [m['message'] for m in log.tail(2)] == ['m13', 'm14']
+
+
+def test_page_walks_back_through_history():
+    log = filled(15)
+    page, has_more = log.page(limit=4)
+    assert [m['id'] for m in page] == [11, 12, 13, 14] and has_more
+    page, has_more = log.page(before=11, limit=4)
+    assert [m['id'] for m in page] == [7, 8, 9, 10] and has_more
+    page, has_more = log.page(before=7, limit=4)
+    assert [m['id'] for m in page] == [5, 6] and not has_more
+    assert log.page(before=5, limit=4) == ([], False)
+    assert ChatLog().page() == ([], False)
+
+
+def test_ids_continue_after_a_restore():
+    log = filled(3)
+    restored = ChatLog(messages=log.tail(2))
+    assert restored.append({'message': 'next'})['id'] == 3
+
+
+def test_token_bucket_throttles_a_burst():
+    bucket = TokenBucket(rate=0.001, capacity=2)
+    assert bucket.take() and bucket.take()
+    assert not bucket.take()
+    assert bucket.retry_after() > 0
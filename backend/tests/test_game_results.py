@@ -0,0 +1,54 @@
+import pytest
+
+from db_pool import ConnectionPool
+from game_results import GameResultsWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = GameResultsWriter(ConnectionPool(str(tmp_path / 'quiz.db')), flush_interval=60)
+    writer.load()
+    yield writer
+    writer.close()
+
+
+def player_stats(writer, name):
+    with writer.db_pool.connection() as conn:
+        return tuple(conn.execute('SELECT games_played, total_score, questions_answered, correct_answers, best_score, '
+                                  'total_time FROM player_stats WHERE player_name = ?', (name,)).fetchone())
+
+
+def test_results_are_merged_per_player(writer):
+    writer.record_answer('Ann', True, 4.2)
+    writer.record_answer('Ann', False, 3.1)
+    writer.record_game('singleplayer', [('Ann', 300)])
+    writer.record_game('singleplayer', [('Ann', 500)])
+    assert writer.stats()['pending'] == 1
+    assert writer.flush() == 1
+    writer.record_game('singleplayer', [('Ann', 100)])
+    writer.flush()
+    assert player_stats(writer, 'Ann') == (3, 900, 2, 1, 500, 7)
+
+
+def test_head_to_head_counts_pending_results(writer):
+    writer.record_game('head_to_head', [('Ann', 300)], [('Bot 1', 200)])
+    assert writer.head_to_head_record('Ann') == (1, 1, 0)
+    writer.flush()
+    writer.record_game('head_to_head', [('Ann', 100), ('Bob', 100)])
+    assert writer.head_to_head_record('Ann') == (2, 1, 0)
+    writer.flush()
+    assert writer.head_to_head_record('Bob') == (1, 0, 0)
+    with writer.db_pool.connection() as conn:
+        winners = [row[0] for row in conn.execute('SELECT winner_name FROM head_to_head_records ORDER BY id')]
+    assert winners == ['Ann', None]
+
+
+def test_full_queue_drops_new_players_but_merges_known_ones(writer):
+    writer.max_pending = 4
+    for name in ('A', 'B', 'C', 'D'):
+        assert writer.record_answer(name, True, 1)
+    assert not writer.record_answer('E', True, 1)
+    assert writer.record_answer('A', True, 1)
+    assert writer.stats()['dropped'] == 1
+    writer.flush()
+    assert writer.record_answer('E', True, 1)
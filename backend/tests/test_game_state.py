@@ -0,0 +1,76 @@
+from game_state import NO_ANSWER, Game
+from question_payloads import prepare_questions
+
+
+def stadium(humans=3, bots=2):
+    game = Game('5000', 'h0', 'stadium', 10000, bots, ['all'])
+    game.questions = [{'id': 1, 'question': 'Q?', 'correct_answer': 'a', 'wrong1': 'b', 'wrong2': 'c', 'wrong3': 'd',
+                       'category': 'general'}]
+    game.prepared = prepare_questions(game.questions, game.time_per_question)
+    for i in range(humans):
+        game.add_player(f'h{i}', f'Human {i}')
+    for i in range(bots):
+        game.add_bot(f'bot_{i}', f'Bot {i}')
+    return game
+
+
+def test_seat_scores_top_and_histogram():
+    game = stadium(humans=4, bots=0)
+    for sid, points in (('h0', 50), ('h1', 250), ('h2', 120), ('h3', 50)):
+        game.add_points(game.players[sid], points)
+    assert [p.name for p in game.board.top(2)] == ['Human 1', 'Human 2']
+    assert game.board.histogram(3) == (84, [2, 1, 1])
+
+    game.remove_participant('h1')
+    assert [p.name for p in game.board.top(1)] == ['Human 2']
+    assert len(game.board) == 3
+
+    game.reset_scores()
+    assert game.board.histogram(5) == (1, [3])
+
+
+def test_seat_is_reused_with_a_fresh_score():
+    game = stadium(humans=2, bots=0)
+    board = game.board
+    game.add_points(game.players['h0'], 30)
+    seat = game.players['h0'].seat
+    game.remove_participant('h0')
+    newcomer = game.add_player('h9', 'Late')
+    assert newcomer.seat == seat
+    assert board.scores[seat] == 0
+    assert {p.name for p in board.top(5)} == {'Human 1', 'Late'}
+
+
+def test_stadium_round_waits_on_connected_humans_only():
+    game = stadium()
+    r = game.start_round(0)
+    assert r.remaining() == 3
+    assert not game.record_answer('h0', r.correct_index)
+    game.disconnect_player('h1')
+    assert r.remaining() == 1
+    assert game.record_answer('h2', NO_ANSWER)
+    assert r.responded() == 2
+    assert r.answers_by_sid() == {'h0': r.correct_index, 'h2': NO_ANSWER}
+    assert game.has_answered('h0') and not game.has_answered('h1')
+
+
+def test_stadium_round_rejoin_and_late_join():
+    game = stadium()
+    seat_token = game.players['h1'].seat_token
+    r = game.start_round(0)
+    game.disconnect_player('h1')
+    game.reseat(seat_token, 'h1b')
+    assert r.remaining() == 3 and r.waiting_on(game.players['h1b'])
+    game.add_player('h3', 'Late')
+    assert r.remaining() == 4
+    assert sorted(r.pending_sids()) == ['h0', 'h1b', 'h2', 'h3']
+
+
+def test_stadium_round_falls_back_to_bots_when_nobody_is_connected():
+    game = stadium(humans=1, bots=2)
+    game.disconnect_player('h0')
+    r = game.start_round(0)
+    assert r.remaining() == 2
+    game.record_answer('bot_0', 1)
+    assert game.record_answer('bot_1', 2)
+    assert r.counts[1] == r.counts[2] == 1
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from migrate_questions import MIGRATION, convert, ensure_schema, merge
+
+
+def legacy(question, options, answer, difficulty='hard', category='science', id=1):
+    return dict(id=id, question=question, option1=options[0], option2=options[1], option3=options[2],
+                option4=options[3], answer=answer, difficulty=difficulty, category=category)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'quiz.db'))
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE quiz_questions (id INTEGER PRIMARY KEY, question TEXT, correct_answer TEXT, '
+                 'wrong1 TEXT, wrong2 TEXT, wrong3 TEXT, category TEXT)')
+    conn.execute("INSERT INTO quiz_questions (question, correct_answer, wrong1, wrong2, wrong3, category) "
+                 "VALUES ('What is H2O?', 'Water', 'Salt', 'Air', 'Gold', 'science')")
+    conn.execute('CREATE TABLE questions (id INTEGER PRIMARY KEY, question TEXT, option1 TEXT, option2 TEXT, '
+                 'option3 TEXT, option4 TEXT, answer TEXT, difficulty TEXT, category TEXT)')
+    conn.executemany('INSERT INTO questions VALUES (:id, :question, :option1, :option2, :option3, :option4, '
+                     ':answer, :difficulty, :category)', [
+                         legacy('what is  h2o?', ('Salt', 'Water', 'Air', 'Gold'), 'water', 'easy', id=1),
+                         legacy('Largest planet?', ('Mars', 'Venus', 'Jupiter', 'Earth'), '3', id=2),
+                         legacy('Broken?', ('A', 'B', 'C', 'D'), 'E', id=3),
+                     ])
+    conn.commit()
+    ensure_schema(conn)
+    yield conn
+    conn.close()
+
+
+def test_convert_finds_the_answer():
+    options = ('Mars', 'Venus', 'Jupiter', 'Earth')
+    expected = ('Q', 'Jupiter', ['Mars', 'Venus', 'Earth'], 'science', 'hard')
+    assert convert(legacy('Q', options, ' jupiter ')) == expected
+    assert convert(legacy('Q', options, '3')) == expected
+    assert convert(legacy('Q', options, 'option3')) == expected
+
+
+def test_convert_rejects_unusable_rows():
+    assert convert(legacy('Q', ('A', 'B', 'C', 'D'), 'E')) is None
+    assert convert(legacy('Q', ('A', 'a', 'C', 'D'), 'C')) is None  # two identical buttons
+    assert convert(legacy('Q', ('A', 'B', 'C', 'D'), 'A', difficulty='Impossible'))[4] == 'medium'
+
+
+def test_merge_copies_and_matches(conn):
+    assert merge(conn, batch_size=2) == {'inserted': 1, 'matched': 1, 'skipped': 1}
+    rows = {row['question']: row for row in conn.execute('SELECT * FROM quiz_questions')}
+    assert rows['What is H2O?']['difficulty'] == 'easy'  # took the legacy difficulty, kept its own copy
+    assert rows['What is H2O?']['legacy_id'] == 1
+    planet = rows['Largest planet?']
+    assert (planet['correct_answer'], planet['difficulty'], planet['legacy_id']) == ('Jupiter', 'hard', 2)
+    assert conn.execute('SELECT finished FROM schema_migrations WHERE name = ?', (MIGRATION,)).fetchone()[0]
+
+
+def test_merge_resumes_from_its_checkpoint_and_runs_once(conn):
+    conn.execute('UPDATE schema_migrations SET last_id = 1 WHERE name = ?', (MIGRATION,))
+    conn.commit()
+    assert merge(conn, batch_size=10) == {'inserted': 1, 'matched': 0, 'skipped': 1}
+    assert merge(conn, batch_size=10) == {'inserted': 0, 'matched': 0, 'skipped': 0}
+    assert conn.execute('SELECT COUNT(*) FROM quiz_questions').fetchone()[0] == 2
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+from db_pool import ConnectionPool
+from question_bank import DIFFICULTIES, QuestionBank, _apportion
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = str(tmp_path / 'quiz.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE quiz_questions (id INTEGER PRIMARY KEY, question TEXT, correct_answer TEXT, '
+                 'wrong1 TEXT, wrong2 TEXT, wrong3 TEXT, category TEXT, difficulty TEXT)')
+    rows = []
+    for category, per_level in (('science', 10), ('history', 5)):
+        for difficulty in DIFFICULTIES:
+            for i in range(per_level):
+                rows.append((f'{category} {difficulty} {i}', 'a', 'b', 'c', 'd', category, difficulty))
+    conn.executemany('INSERT INTO quiz_questions (question, correct_answer, wrong1, wrong2, wrong3, category, '
+                     'difficulty) VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+    bank = QuestionBank(ConnectionPool(path))
+    bank.load()
+    return bank
+
+
+def test_apportion_largest_remainder():
+    assert _apportion(10, (0.3, 0.4, 0.3), (100, 100, 100)) == [3, 4, 3]
+    assert sum(_apportion(7, (0.3, 0.4, 0.3), (100, 100, 100))) == 7
+
+
+def test_apportion_respects_caps():
+    assert _apportion(10, (0.3, 0.4, 0.3), (1, 100, 100)) == [1, 5, 4]
+    assert _apportion(10, (1, 1), (2, 3)) == [2, 3]  # not enough to go round
+    assert _apportion(5, (0, 1), (10, 10)) == [0, 5]
+
+
+def test_game_ids_follow_the_difficulty_curve(bank):
+    ids = bank.game_ids(['all'], 10)
+    assert len(ids) == len(set(ids)) == 10
+    levels = [DIFFICULTIES.index(bank.get(qid)['difficulty']) for qid in ids]
+    assert levels == sorted(levels)  # easiest first
+    assert [levels.count(level) for level in range(3)] == [3, 4, 3]
+
+
+def test_game_ids_split_categories_by_size(bank):
+    ids = bank.game_ids(['science', 'history'], 9)
+    categories = [bank.get(qid)['category'] for qid in ids]
+    assert categories.count('science') == 6
+    assert categories.count('history') == 3
+    assert all(bank.get(qid)['category'] == 'history' for qid in bank.game_ids(['history'], 6))
+
+
+def test_game_ids_avoid_excluded_questions(bank):
+    history = [qid for qid in range(1, 200) if bank.get(qid) and bank.get(qid)['category'] == 'history']
+    easy = [qid for qid in history if bank.get(qid)['difficulty'] == 'easy']
+    ids = bank.game_ids(['history'], 6, exclude=set(easy))
+    assert len(ids) == 6
+    assert not set(ids) & set(easy)  # the other difficulties make up for the easy ones
+
+    # With nearly everything excluded, excluded questions fill the game rather than leaving it short
+    ids = bank.game_ids(['history'], 6, exclude=set(history[:-2]))
+    assert len(ids) == len(set(ids)) == 6
+    assert set(history[-2:]) <= set(ids)
+
+
+def test_sample_game_returns_rows(bank):
+    questions = bank.sample_game(['science'], 4)
+    assert len(questions) == 4
+    assert all(q['category'] == 'science' and q['correct_answer'] == 'a' for q in questions)
@@ -0,0 +1,119 @@
+from game_state import Game, NO_ANSWER
+from question_payloads import prepare_questions
+from room_snapshots import RoomSnapshotter, decode_game, encode_game
+
+QUESTIONS = {
+    qid: {'id': qid, 'question': f'Question {qid}?', 'correct_answer': f'right {qid}', 'wrong1': f'wrong {qid}a',
+          'wrong2': f'wrong {qid}b', 'wrong3': f'wrong {qid}c', 'category': 'general'}
+    for qid in (11, 12, 13)
+}
+
+
+class Flusher:
+    """Stands in for FlushWorker; the tests call flush() themselves."""
+
+    def __init__(self):
+        self.requests = []
+
+    def request(self, name, flush, delay):
+        self.requests.append(name)
+
+
+def make_game(game_mode='multiplayer', game_id='1234'):
+    game = Game(game_id, 'host', game_mode, 8, 1, ['all'])
+    game.questions = list(QUESTIONS.values())
+    game.total_questions = len(game.questions)
+    game.prepared = prepare_questions(game.questions, game.time_per_question)
+    host = game.add_player('host', 'Ann')
+    guest = game.add_player('guest', 'Bob')
+    bot = game.add_bot('bot_1', 'Bot 1')
+    game.add_points(host, 120)
+    game.add_points(bot, 40)
+    game.chat.append({'name': 'Ann', 'message': 'hi'})
+    game.start_round(1)
+    game.record_answer('host', game.prepared[1].correct_index)
+    game.record_answer('bot_1', NO_ANSWER)
+    game.disconnect_player('guest')
+    return game, host, guest
+
+
+def test_encode_decode_round_trip():
+    game, host, guest = make_game()
+    restored = decode_game(encode_game(game), QUESTIONS.get)
+
+    assert restored.game_id == game.game_id
+    assert [q['id'] for q in restored.questions] == [11, 12, 13]
+    assert [p.order for p in restored.prepared] == [p.order for p in game.prepared]
+    assert restored.final_scores() == game.final_scores()
+    assert restored.players['guest'].connected is False
+    assert restored.seat_tokens[host.seat_token] == 'host'
+    assert restored.current_question_index == 1
+    assert restored.round.answers_by_sid() == game.round.answers_by_sid()
+    assert restored.round.counts == game.round.counts
+    assert sorted(restored.round.pending_sids()) == sorted(game.round.pending_sids())
+    assert [m['message'] for m in restored.chat] == ['hi']
+
+
+def test_stadium_round_trip_reseats_the_board():
+    game, host, guest = make_game('stadium')
+    restored = decode_game(encode_game(game), QUESTIONS.get)
+
+    assert [(p.name, p.score) for p in restored.board.top(3)] == [(p.name, p.score) for p in game.board.top(3)]
+    assert restored.board.connected == game.board.connected == 1
+    assert restored.round.answers_by_sid() == game.round.answers_by_sid()
+    assert restored.round.remaining() == game.round.remaining()
+
+
+def test_decode_skips_missing_questions():
+    game, _, _ = make_game()
+    assert decode_game(encode_game(game), {11: QUESTIONS[11]}.get) is None
+
+
+def test_snapshotter_restores_live_rooms(tmp_path):
+    flusher = Flusher()
+    snapshots = RoomSnapshotter(str(tmp_path / 'rooms.db'), flusher)
+    game, _, _ = make_game()
+    snapshots.mark(game)
+    assert flusher.requests == ['room_snapshots']
+    assert snapshots.flush() == 1
+
+    restored = snapshots.load(QUESTIONS.get)
+    assert [g.game_id for g in restored] == [game.game_id]
+    assert restored[0].final_scores() == game.final_scores()
+
+
+def test_finished_game_is_not_brought_back(tmp_path):
+    snapshots = RoomSnapshotter(str(tmp_path / 'rooms.db'), Flusher())
+    game, _, _ = make_game()
+    snapshots.mark(game)
+    snapshots.flush()
+
+    # end_game: the room lingers for its game_over screen, but chat can still arrive
+    game.finished = True
+    snapshots.discard(game.game_id)
+    game.chat.append({'name': 'Bob', 'message': 'gg'})
+    snapshots.mark(game)
+    snapshots.flush()
+    assert snapshots.load(QUESTIONS.get) == []
+
+
+def test_game_finished_after_mark_is_deleted_at_flush(tmp_path):
+    snapshots = RoomSnapshotter(str(tmp_path / 'rooms.db'), Flusher())
+    game, _, _ = make_game()
+    snapshots.mark(game)
+    snapshots.flush()
+    snapshots.mark(game)
+    game.finished = True
+    assert snapshots.flush() == 0
+    assert snapshots.load(QUESTIONS.get) == []
+
+
+def test_snapshots_off_without_a_path():
+    flusher = Flusher()
+    snapshots = RoomSnapshotter(None, flusher)
+    game, _, _ = make_game()
+    snapshots.mark(game)
+    snapshots.discard(game.game_id)
+    assert flusher.requests == []
+    assert snapshots.flush() == 0
+    assert snapshots.load(QUESTIONS.get) == []
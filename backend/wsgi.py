@@ -0,0 +1,10 @@
+"""WSGI entry point for running under gunicorn with an async worker, e.g.:
+
+    SERVER_MODE=eventlet gunicorn -k eventlet -w 1 --chdir backend wsgi:app
+
+One worker per process: rooms live in memory on the worker that owns them
+(see RENDER_DEPLOYMENT.md for running several).
+"""
+from app import create_app
+
+app = create_app(handle_signals=False)  # gunicorn handles SIGTERM; the atexit flushes still run
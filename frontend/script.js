@@ -47,6 +47,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const h2hFinalActionButton = document.getElementById('h2h-final-action-button');
     const h2hWaitingForPlayerDiv = document.getElementById('h2h-waiting-for-player');
     const h2hRoomCodeDisplay = document.getElementById('h2h-room-code-display');
+    const h2hSearchingDiv = document.getElementById('h2h-searching');
+    const h2hSearchStatus = document.getElementById('h2h-search-status');
     const h2hFeedbackMessageElem = document.getElementById('h2h-feedback-message');
     const h2hLifelineContainer = document.getElementById('h2h-lifeline-container'); // Added H2H lifelines
     const h2hFiftyFiftyBtn = document.getElementById('h2h-fifty-fifty-btn');
@@ -138,6 +140,13 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let currentPlayerName = '';
     let currentGameId = null;
+    let seatToken = null; // Lets us reclaim our seat if the socket drops mid-game
+    let scoreboardSeq = 0; // Last scoreboard_delta applied
+    let chatOldestId = null; // Id of the oldest chat message shown, for paging further back
+    let chatHasMore = false; // Server still keeps older messages than those shown
+    let isStadium = false; // Stadium rooms use the multiplayer screens with standings instead of a full scoreboard
+    let searchingQuickMatch = false; // Queued for a quick match; the server seats us when it finds an opponent
+    let scoreboardPlayers = {}; // sid -> player, kept in step with scoreboard deltas
     let currentGameMode = '';
     let isHost = false;
     let currentQuestionData = null;
@@ -227,7 +236,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 fetchAndPopulateH2HCategories(); // Populate categories for H2H
                 updateH2HConfigScreenUI(); // New function to handle UI changes
                 if (h2hWaitingForPlayerDiv) h2hWaitingForPlayerDiv.style.display = 'none'; // Hide waiting message
-            } else if (mode === 'multiplayer') {
+            } else if (mode === 'multiplayer' || mode === 'stadium') {
+                currentGameMode = 'multiplayer';
+                isStadium = mode === 'stadium';
                 showScreen('multiplayerConfig');
                 multiplayerGameIdJoinInput.value = '';
             }
@@ -236,6 +247,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     backToModeSelectBtns.forEach(button => {
         button.addEventListener('click', () => {
+            if (searchingQuickMatch) socket.emit('cancel_quick_match');
             resetGameStatePartial();
             showScreen('modeSelect');
         });
@@ -336,9 +348,17 @@ document.addEventListener('DOMContentLoaded', () => {
             h2hJoinOptionsContainer.style.display = 'block';
             h2hCreateOptionsContainer.style.display = 'none';
             h2hFinalActionButton.textContent = 'Join Game';
+        } else if (selectedAction === 'quick') {
+            // Only the category matters; the opponent is whoever the server pairs us with
+            h2hJoinOptionsContainer.style.display = 'none';
+            h2hCreateOptionsContainer.style.display = 'block';
+            if (h2hOpponentSelectContainer) h2hOpponentSelectContainer.style.display = 'none';
+            h2hBotLevelOptionsContainer.style.display = 'none';
+            h2hFinalActionButton.textContent = searchingQuickMatch ? 'Cancel Search' : 'Find Opponent';
         } else { // 'create'
             h2hJoinOptionsContainer.style.display = 'none';
             h2hCreateOptionsContainer.style.display = 'block';
+            if (h2hOpponentSelectContainer) h2hOpponentSelectContainer.style.display = 'block';
             h2hFinalActionButton.textContent = 'Create Game';
 
             // Show/hide bot level based on opponent type within create options
@@ -350,10 +370,17 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         h2hFinalActionButton.disabled = false; // Ensure button is enabled when switching options
         if (h2hWaitingForPlayerDiv) h2hWaitingForPlayerDiv.style.display = 'none'; // Hide waiting message
+        if (h2hSearchingDiv) h2hSearchingDiv.style.display = searchingQuickMatch ? 'block' : 'none';
     }
 
     if (h2hPrimaryActionSelect) {
-        h2hPrimaryActionSelect.addEventListener('change', updateH2HConfigScreenUI);
+        h2hPrimaryActionSelect.addEventListener('change', () => {
+            if (searchingQuickMatch) {
+                socket.emit('cancel_quick_match'); // Switching away from Quick Match leaves the queue
+                searchingQuickMatch = false;
+            }
+            updateH2HConfigScreenUI();
+        });
     }
 
     if (h2hOpponentTypeSelect) {
@@ -421,6 +448,19 @@ document.addEventListener('DOMContentLoaded', () => {
                     if (h2hWaitingForPlayerDiv) h2hWaitingForPlayerDiv.style.display = 'block';
                     if (h2hFinalActionButton) h2hFinalActionButton.disabled = true;
                 }
+            } else if (action === 'quick') {
+                if (searchingQuickMatch) {
+                    socket.emit('cancel_quick_match');
+                    searchingQuickMatch = false;
+                } else {
+                    socket.emit('quick_match', {
+                        name: currentPlayerName,
+                        categories: [h2hCategorySelect.value || 'all']
+                    });
+                    searchingQuickMatch = true;
+                    if (h2hSearchStatus) h2hSearchStatus.textContent = 'Looking for an opponent...';
+                }
+                updateH2HConfigScreenUI();
             } else if (action === 'join') {
                 const gameIdToJoin = h2hGameIdInput.value.trim();
                 if (gameIdToJoin) {
@@ -437,23 +477,51 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    socket.on('quick_match_queued', (data) => {
+        if (!searchingQuickMatch || !h2hSearchStatus) return;
+        h2hSearchStatus.textContent = `Looking for an opponent... (${data.waiting} waiting). ` +
+            `If nobody turns up in ${Math.round(data.bot_after)}s you'll face a bot.`;
+    });
+
+    socket.on('quick_match_cancelled', () => {
+        searchingQuickMatch = false;
+        if (screens.headToHeadConfig.classList.contains('active')) updateH2HConfigScreenUI();
+    });
+
+    // The server made the room for us; it starts by itself after a short countdown
+    socket.on('match_found', (data) => {
+        console.log('Match found:', data);
+        searchingQuickMatch = false;
+        currentGameMode = 'head_to_head';
+        seatToken = data.seat_token || null;
+        setupLobbyScreen(data.game_id, data.game_mode, data.players || [], data.is_host, 2);
+        startGameButton.style.display = 'none';
+        waitingForHostMessage.textContent = `Matched with ${data.opponent}! Kick-off in ${data.starts_in} seconds...`;
+        waitingForHostMessage.style.display = 'block';
+        if (h2hSearchingDiv) h2hSearchingDiv.style.display = 'none';
+        if (h2hChatContainer) h2hChatContainer.style.display = 'block';
+        showScreen('gameLobby');
+        showChatHistory(data.chat_history || [], data.chat_has_more, true);
+    });
+
     // --- Multiplayer ---
     createMultiplayerRoomBtn.addEventListener('click', () => {
         isHost = true;
         socket.emit('create_game', {
             name: currentPlayerName,
-            game_mode: 'multiplayer',
-            max_players: 8 // Default for multiplayer
+            game_mode: isStadium ? 'stadium' : 'multiplayer',
+            ...(isStadium ? {} : { max_players: 8 }) // Default for multiplayer; a stadium takes the server's limit
         });
     });
 
     socket.on('game_created', (data) => {
         currentGameId = data.game_id;
+        seatToken = data.seat_token || null;
         console.log('Game created:', data);
 
         if (data.game_mode === 'head_to_head' && isHost && data.num_bots === 0) {
             if (h2hRoomCodeDisplay) h2hRoomCodeDisplay.textContent = data.game_id;
-        } else if (data.game_mode === 'multiplayer' && isHost) {
+        } else if ((data.game_mode === 'multiplayer' || data.game_mode === 'stadium') && isHost) {
             multiplayerRoomIdDisplay.textContent = currentGameId;
             hostRoomIdSpan.textContent = currentGameId;
             numBotsMultiplayerInput.value = "0"; // Reset
@@ -487,7 +555,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // Emit 'configure_game' with all settings
         socket.emit('configure_game', {
             game_id: currentGameId,
-            max_players: maxPlayers,
+            ...(isStadium ? {} : { max_players: maxPlayers }),
             num_bots: numBots,
             categories: [selectedCategory], // Ensure categories is an array
             time_per_question: timePerQuestion,
@@ -585,11 +653,15 @@ document.addEventListener('DOMContentLoaded', () => {
 
     socket.on('game_joined', (data) => {
         console.log('Game joined:', data);
+        seatToken = data.seat_token || null;
+        if (data.game_mode === 'stadium') {
+            currentGameMode = 'multiplayer';
+            isStadium = true;
+        }
         setupLobbyScreen(data.game_id, currentGameMode, data.players, false, data.max_players); 
+        if (isStadium) lobbyPlayerCountSpan.textContent = data.audience;
         showScreen('gameLobby');
-        if (data.chat_history) {
-            data.chat_history.forEach(msg => displayChatMessage(msg));
-        }
+        showChatHistory(data.chat_history || [], data.chat_has_more, true);
     });
 
     socket.on('player_joined', (data) => {
@@ -628,6 +700,20 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    // Stadium rooms send a head count instead of the roster
+    socket.on('audience_update', (data) => {
+        if (data.game_id !== currentGameId) return;
+        lobbyPlayerCountSpan.textContent = data.audience;
+        lobbyMaxPlayersSpan.textContent = data.max_players;
+        if (screens.multiplayerHostOptions.classList.contains('active')) {
+            multiplayerLobbyPlayersUl.innerHTML = '';
+            const li = document.createElement('li');
+            li.className = 'player-entry';
+            li.textContent = `${data.audience} of ${data.max_players} players in the stadium`;
+            multiplayerLobbyPlayersUl.appendChild(li);
+        }
+    });
+
     startGameButton.addEventListener('click', () => {
         if (isHost && currentGameId) {
             socket.emit('start_game', { game_id: currentGameId });
@@ -743,11 +829,11 @@ document.addEventListener('DOMContentLoaded', () => {
             button.textContent = q.answers[index];
             button.disabled = false;
             button.className = 'answer-button'; // Reset classes
-            button.onclick = () => handleAnswerSubmit(q.answers[index], button); // Pass the button itself
+            button.onclick = () => handleAnswerSubmit(q.answers[index], button, index); // Pass the button itself
         });
     }
 
-    function handleAnswerSubmit(answer, clickedButton) { // Added clickedButton parameter
+    function handleAnswerSubmit(answer, clickedButton, answerIndex) { // Added clickedButton parameter
         clearInterval(questionTimerInterval);
         let currentAnswerButtons;
         if (currentGameMode === 'head_to_head') {
@@ -769,6 +855,7 @@ document.addEventListener('DOMContentLoaded', () => {
         socket.emit('submit_answer', {
             game_id: currentGameId,
             answer: answer,
+            answer_index: answerIndex, // Position in the answers as sent; the server checks this, not the text
             timestamp: new Date().toISOString() // Add timestamp
         });
     }
@@ -780,6 +867,7 @@ document.addEventListener('DOMContentLoaded', () => {
         lifelinesUsed = { fiftyFifty: false, ninetiethMinute: false, feelinGood: false }; // Reset lifelines at game start
         feelinGoodActive = false; // Reset Feelin' Good status
         updateLifelineButtons(); // Update button states
+        applyScoreboardSnapshot(data.scoreboard_seq || 0, data.players || []);
 
         if (backgroundMusic && !isMuted) backgroundMusic.pause(); // Pause music when game starts
 
@@ -791,9 +879,8 @@ document.addEventListener('DOMContentLoaded', () => {
             showScreen('multiplayerGameScreen');
             if (mpChatContainer) mpChatContainer.style.display = 'block';
             if (mpLifelineContainer) mpLifelineContainer.style.display = 'flex'; // Show MP lifelines
-            if (data.players) { 
-                updateMultiplayerScoreboard(data.players);
-            }
+            if (isStadium && data.standings) renderStandings(data.standings);
+            else renderScoreboard();
         } else {
             showScreen('question');
             // Hide lifelines for single player if they were somehow visible
@@ -916,6 +1003,9 @@ document.addEventListener('DOMContentLoaded', () => {
             currentFeedbackElem.textContent += ` Next question in ${data.duration}s...`;
         }
         
+        if (data.answer_counts) showAnswerShares(currentAnswerButtons, data.answer_counts.answers);
+        if (data.standings) renderStandings(data.standings);
+
         if(currentTimerSpan) currentTimerSpan.textContent = `Next in: ${data.duration}s`;
 
         let countdown = data.duration;
@@ -930,16 +1020,87 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 1000);
     });
 
-    socket.on('scoreboard_update', (playerList) => { // Changed 'data' to 'playerList' for clarity
-        console.log('Scoreboard update received:', playerList);
+    // The server sends a full list once (game start, rejoin) and then only numbered deltas
+    function applyScoreboardSnapshot(seq, players) {
+        scoreboardSeq = seq;
+        scoreboardPlayers = {};
+        players.forEach(player => { scoreboardPlayers[player.sid] = player; });
+        renderScoreboard();
+    }
+
+    function renderScoreboard() {
+        if (isStadium) return; // Stadium rooms get standings instead (renderStandings)
         if (currentGameMode === 'multiplayer' && screens.multiplayerGameScreen.classList.contains('active')) {
-            // The playerList is directly the array of players from get_player_list
-            if (playerList && Array.isArray(playerList)) { // Check if playerList is a valid array
-                updateMultiplayerScoreboard(playerList);
-            } else {
-                console.warn("Received scoreboard_update with invalid data:", playerList);
-            }
+            updateMultiplayerScoreboard(Object.values(scoreboardPlayers));
         }
+    }
+
+    // Our rank among everyone in a stadium: 1 + how many are in higher score buckets. Exact while
+    // buckets are one point wide, otherwise the best rank within our bucket (shown with a ~)
+    function rankFromStandings(standings, score) {
+        const bin = Math.min(Math.floor(score / standings.bin_width), standings.bins.length - 1);
+        let above = 0;
+        for (let i = bin + 1; i < standings.bins.length; i++) above += standings.bins[i];
+        return (standings.bin_width > 1 ? '~#' : '#') + (above + 1);
+    }
+
+    function renderStandings(standings) {
+        if (!mpScoreboardList) return;
+        mpScoreboardList.innerHTML = '';
+        standings.top.forEach(player => {
+            const li = document.createElement('li');
+            const nameSpan = document.createElement('span');
+            nameSpan.classList.add('player-name');
+            nameSpan.textContent = player.name + (player.is_bot ? ' (Bot)' : '');
+            const scoreSpan = document.createElement('span');
+            scoreSpan.classList.add('player-score');
+            scoreSpan.textContent = player.score;
+            li.appendChild(nameSpan);
+            li.appendChild(scoreSpan);
+            mpScoreboardList.appendChild(li);
+        });
+        const ownLi = document.createElement('li');
+        ownLi.classList.add('own-rank');
+        ownLi.textContent = `You: ${rankFromStandings(standings, playerScore)} of ${standings.audience} (${playerScore})`;
+        mpScoreboardList.appendChild(ownLi);
+    }
+
+    // Share of the room that picked each answer, shown on the buttons once the answer is revealed
+    function showAnswerShares(buttons, counts) {
+        const answered = counts.reduce((sum, count) => sum + count, 0);
+        if (!answered) return;
+        buttons.forEach((button, index) => {
+            const share = document.createElement('span');
+            share.classList.add('answer-share');
+            share.textContent = `${Math.round(100 * (counts[index] || 0) / answered)}%`;
+            button.appendChild(share);
+        });
+    }
+
+    socket.on('stadium_standings', (standings) => {
+        renderStandings(standings);
+    });
+
+    socket.on('scoreboard_snapshot', (data) => {
+        console.log('Scoreboard snapshot received:', data);
+        applyScoreboardSnapshot(data.seq, data.players);
+    });
+
+    socket.on('scoreboard_delta', (delta) => {
+        console.log('Scoreboard delta received:', delta);
+        if (delta.seq <= scoreboardSeq) return; // Already covered by a snapshot
+        if (delta.seq !== scoreboardSeq + 1) {
+            // Missed one; scores in a delta are absolute, so a fresh snapshot puts us right
+            socket.emit('request_scoreboard', { game_id: currentGameId });
+            return;
+        }
+        scoreboardSeq = delta.seq;
+        (delta.joined || []).forEach(player => { scoreboardPlayers[player.sid] = player; });
+        (delta.left || []).forEach(sid => { delete scoreboardPlayers[sid]; });
+        for (const sid in delta.scores) {
+            if (scoreboardPlayers[sid]) scoreboardPlayers[sid].score = delta.scores[sid];
+        }
+        renderScoreboard();
     });
 
     socket.on('update_scores', (data) => {
@@ -1313,6 +1474,11 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         displayGameOver(data.scores, data.winner_info); // Pass scores and winnerInfo to displayGameOver
+        if (data.standings) {
+            const rankLine = document.createElement('p');
+            rankLine.textContent = `You finished ${rankFromStandings(data.standings, playerScore)} of ${data.standings.audience} with ${playerScore} points.`;
+            finalScoresDiv.appendChild(rankLine);
+        }
         showScreen('gameOver');
         if (currentGameMode === 'singleplayer') {
             socket.emit('request_leaderboard'); 
@@ -1404,6 +1570,7 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     backFromLeaderboardBtn.addEventListener('click', () => {
+        socket.emit('leave_leaderboard'); // Stop live leaderboard updates
         if (lastScreen) {
             showScreen(lastScreen);
         } else {
@@ -1489,6 +1656,15 @@ document.addEventListener('DOMContentLoaded', () => {
         displayChatMessage(message);
     });
 
+    socket.on('chat_history_page', (data) => {
+        if (data.game_id !== currentGameId) return;
+        showChatHistory(data.messages, data.has_more, false);
+    });
+
+    socket.on('chat_rate_limited', (data) => {
+        displayChatNotice(`You're sending messages too fast. Try again in ${Math.ceil(data.retry_after || 1)}s.`);
+    });
+
     function sendH2HChatMessage() {
         const messageText = h2hChatMessageInput.value.trim();
         if (messageText && currentGameId) {
@@ -1511,7 +1687,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    function displayChatMessage(msg) {
+    function currentChatMessagesDiv() {
         let targetChatMessagesDiv;
         if (currentGameMode === 'head_to_head') {
             targetChatMessagesDiv = h2hChatMessagesDiv;
@@ -1519,14 +1695,63 @@ document.addEventListener('DOMContentLoaded', () => {
             targetChatMessagesDiv = mpChatMessagesDiv;
         } else {
             // No chat for single player or other modes currently
-            return;
+            return null;
         }
 
         if (!targetChatMessagesDiv) {
             console.error("Chat messages container not found for mode:", currentGameMode);
-            return;
         }
+        return targetChatMessagesDiv;
+    }
+
+    function displayChatMessage(msg) {
+        const targetChatMessagesDiv = currentChatMessagesDiv();
+        if (!targetChatMessagesDiv) return;
 
+        targetChatMessagesDiv.appendChild(buildChatMessageElement(msg));
+        targetChatMessagesDiv.scrollTop = targetChatMessagesDiv.scrollHeight;
+    }
+
+    function displayChatNotice(text) {
+        const targetChatMessagesDiv = currentChatMessagesDiv();
+        if (!targetChatMessagesDiv) return;
+
+        const noticeElement = document.createElement('div');
+        noticeElement.classList.add('chat-message', 'chat-notice');
+        noticeElement.textContent = text;
+        targetChatMessagesDiv.appendChild(noticeElement);
+        targetChatMessagesDiv.scrollTop = targetChatMessagesDiv.scrollHeight;
+    }
+
+    // Shows a page of chat history: the newest page on join (replace), older pages above what's shown
+    function showChatHistory(messages, hasMore, replace) {
+        const targetChatMessagesDiv = currentChatMessagesDiv();
+        if (!targetChatMessagesDiv) return;
+
+        if (replace) targetChatMessagesDiv.innerHTML = '';
+        let loadEarlierBtn = targetChatMessagesDiv.querySelector('.chat-load-earlier');
+        const firstMessage = loadEarlierBtn ? loadEarlierBtn.nextSibling : targetChatMessagesDiv.firstChild;
+        messages.forEach(msg => targetChatMessagesDiv.insertBefore(buildChatMessageElement(msg), firstMessage));
+
+        if (messages.length) chatOldestId = messages[0].id;
+        chatHasMore = !!hasMore;
+        if (chatHasMore && !loadEarlierBtn) {
+            loadEarlierBtn = document.createElement('button');
+            loadEarlierBtn.classList.add('chat-load-earlier');
+            loadEarlierBtn.textContent = 'Load earlier messages';
+            loadEarlierBtn.onclick = () => {
+                if (currentGameId && chatOldestId !== null) {
+                    socket.emit('request_chat_history', { game_id: currentGameId, before: chatOldestId });
+                }
+            };
+            targetChatMessagesDiv.insertBefore(loadEarlierBtn, targetChatMessagesDiv.firstChild);
+        } else if (!chatHasMore && loadEarlierBtn) {
+            loadEarlierBtn.remove();
+        }
+        if (replace) targetChatMessagesDiv.scrollTop = targetChatMessagesDiv.scrollHeight;
+    }
+
+    function buildChatMessageElement(msg) {
         const messageElement = document.createElement('div');
         messageElement.classList.add('chat-message');
 
@@ -1544,14 +1769,19 @@ document.addEventListener('DOMContentLoaded', () => {
 
         messageElement.appendChild(senderSpan);
         messageElement.appendChild(contentSpan);
-
-        targetChatMessagesDiv.appendChild(messageElement);
-        targetChatMessagesDiv.scrollTop = targetChatMessagesDiv.scrollHeight;
+        return messageElement;
     }
 
     // --- Utility and State Management ---
     function resetGameStatePartial() { 
         currentGameId = null;
+        seatToken = null;
+        chatOldestId = null;
+        chatHasMore = false;
+        scoreboardSeq = 0;
+        scoreboardPlayers = {};
+        isStadium = false;
+        searchingQuickMatch = false;
         isHost = false;
         currentQuestionData = null;
         playerScore = 0;
@@ -1583,10 +1813,47 @@ document.addEventListener('DOMContentLoaded', () => {
 
     socket.on('connect', () => {
         console.log('Connected to server with SID:', socket.id);
+        if (currentGameId && seatToken) {
+            // Reconnected after a drop: the server holds our seat for a short grace period
+            socket.emit('rejoin_game', { game_id: currentGameId, seat_token: seatToken });
+        }
+    });
+
+    socket.on('game_rejoined', (data) => {
+        console.log('Rejoined game:', data);
+        isHost = data.is_host;
+        playerScore = data.score;
+        lifelinesUsed = {
+            fiftyFifty: data.lifelines_used.fifty_fifty,
+            ninetiethMinute: data.lifelines_used.ninetieth_minute,
+            feelinGood: data.lifelines_used.feelin_good
+        };
+        applyScoreboardSnapshot(data.scoreboard_seq, data.players);
+        showChatHistory(data.chat_history || [], data.chat_has_more, true); // Catch up on anything said while away
+    });
+
+    socket.on('server_draining', () => {
+        // The server is restarting; our room is saved and 'connect' asks for the seat back afterwards
+        console.log('Server is restarting.');
+        displayChatNotice('The server is restarting. You will be reconnected to this game shortly.');
+    });
+
+    socket.on('rejoin_failed', (data) => {
+        console.log('Rejoin failed:', data.message);
+        alert(`Disconnected from server. ${data.message}`);
+        resetGameStateFull();
+    });
+
+    socket.on('player_rejoined', (data) => {
+        console.log('Player rejoined:', data.name);
     });
 
     socket.on('disconnect', () => {
         console.log('Disconnected from server.');
+        if (currentGameId && seatToken) {
+            clearInterval(questionTimerInterval);
+            return; // socket.io reconnects on its own; 'connect' then asks for our seat back
+        }
         alert('Disconnected from server. Please refresh the page.');
         resetGameStateFull();
         showScreen('initialSetup');